@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks for `modelplotpy`, run with `python benchmarks/benchmark_modelplotpy.py`."""
+
+import os
+import gc
+import resource
+import time
+import timeit
+import tempfile
+import contextlib
+import io
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+import modelplotpy as mp
+from modelplotpy import assign_ntiles, range01, modelplotpy
+
+
+def qcut_ntiles(probabilities, ntiles = 10, seed = 999):
+    """ The per class pd.qcut ntiles as they were computed before assign_ntiles """
+    n = probabilities.shape[0]
+    result = np.empty(probabilities.shape, dtype = np.int64)
+    for col in range(probabilities.shape[1]):
+        np.random.seed(seed)
+        prob_plus_smallrandom = range01(probabilities[:, [col]] + (np.random.uniform(size = (n, 1)) / 1000000))[:, 0]
+        result[:, col] = ntiles - pd.qcut(prob_plus_smallrandom, ntiles, labels = False)
+    return result
+
+
+def benchmark_assign_ntiles(n = 1000000, classes = 12, ntiles = 10, repeat = 3):
+    probabilities = np.random.RandomState(0).dirichlet([1] * classes, size = n)
+    qcut = min(timeit.repeat(lambda: qcut_ntiles(probabilities, ntiles), number = 1, repeat = repeat))
+    ranks = min(timeit.repeat(lambda: assign_ntiles(probabilities, ntiles), number = 1, repeat = repeat))
+    print('assign_ntiles (%d rows, %d classes): pd.qcut %.3fs, rank based %.3fs, speedup %.1fx' % (n, classes, qcut, ranks, qcut / ranks))
+
+
+def benchmark_compact_scores(n = 200000, classes = 5, models = 4, datasets = 3):
+    class_labels = np.array(['class %d' % k for k in range(classes)])
+    probabilities = [[np.random.RandomState(10 * i + j).dirichlet([1] * classes, size = n) for j in range(datasets)] for i in range(models)]
+    label_data = [pd.Series(class_labels[np.random.RandomState(j).randint(0, classes, n)]) for j in range(datasets)]
+    sizes = []
+    for compact in (False, True):
+        obj = modelplotpy.from_scores(probabilities, class_labels, label_data, ['dataset %d' % j for j in range(datasets)],
+                                      ['model %d' % i for i in range(models)], compact = compact)
+        sizes.append(obj.prepare_scores_and_ntiles().memory_usage(deep = True).sum() / 1e6)
+    print('prepare_scores_and_ntiles (%d rows, %d classes): default %.1f MB, compact %.1f MB, reduction %.1fx' % (n * models * datasets, classes, sizes[0], sizes[1], sizes[0] / sizes[1]))
+
+
+def benchmark_multiclass_counts(n = 100000, classes = 400, ntiles = 10):
+    labels = np.array(['class_%03d' % k for k in range(classes)])
+    random = np.random.RandomState(0)
+    probabilities = random.dirichlet([0.5] * classes, size = n)
+    obj = modelplotpy.from_scores([[probabilities]], list(labels), [labels[random.randint(classes, size = n)]], ['test'], ['model'], ntiles = ntiles)
+    obj._score_all()
+    def wide():
+        # the per class masks over the wide scores_and_ntiles frame, as before
+        scores_and_ntiles = obj.prepare_scores_and_ntiles()
+        for k in labels:
+            (scores_and_ntiles.target_class == k).groupby(scores_and_ntiles['dec_' + k]).agg(['size', 'sum'])
+    def counts():
+        obj.clear_cache()
+        obj.aggregate_counts()
+    wide_time = min(timeit.repeat(lambda: (obj.clear_cache(), wide()), number = 1, repeat = 1))
+    counts_time = min(timeit.repeat(counts, number = 1, repeat = 3))
+    print('multiclass counts (%d rows, %d classes): wide frame %.3fs, label code x ntile %.3fs, speedup %.1fx' % (n, classes, wide_time, counts_time, wide_time / counts_time))
+
+
+def benchmark_bootstrap(n = 100000, classes = 5, models = 4, datasets = 3, replicates = 1000):
+    random = np.random.RandomState(0)
+    labels = ['class_%d' % k for k in range(classes)]
+    probabilities = [[random.dirichlet([1] * classes, size = n) for j in range(datasets)] for i in range(models)]
+    label_data = [np.array(labels)[random.randint(classes, size = n)] for j in range(datasets)]
+    obj = modelplotpy.from_scores(probabilities, labels, label_data, ['dataset_%d' % j for j in range(datasets)], ['model_%d' % i for i in range(models)])
+    counts = obj.aggregate_counts()
+    # numpy releases the GIL while it draws and sums, so threads scale with the cores like processes do
+    timings = [('serial', min(timeit.repeat(lambda: counts.bootstrap(replicates), number = 1, repeat = 3)))]
+    for backend in ('threads', 'processes'):
+        timings.append((backend, min(timeit.repeat(lambda: counts.bootstrap(replicates, n_jobs = -1, backend = backend), number = 1, repeat = 3))))
+    print('bootstrap (%d groups, %d replicates, %d cores): %s' % (len(counts.groups), replicates, os.cpu_count(), ', '.join('%s %.3fs (%.1fx)' % (backend, seconds, timings[0][1] / seconds)
+                                                                                                                           for backend, seconds in timings)))
+
+
+def benchmark_aggregate_curves(n = 1000000, classes = 2, points = 2000):
+    random = np.random.RandomState(0)
+    labels = ['class_%d' % k for k in range(classes)]
+    probabilities = random.dirichlet([1] * classes, size = n)
+    label_data = np.array(labels)[random.randint(classes, size = n)]
+    obj = modelplotpy.from_scores([[probabilities]], labels, [label_data], ['test'], ['model'], ntiles = points)
+    obj._score_all()
+    def ntiles():
+        obj.clear_cache()
+        obj.aggregate_over_ntiles()
+    def curves():
+        obj.clear_cache()
+        obj.aggregate_curves(points)
+    ntiles_time = min(timeit.repeat(ntiles, number = 1, repeat = 3))
+    curves_time = min(timeit.repeat(curves, number = 1, repeat = 3))
+    print('curves (%d rows, %d points): %d ntiles %.3fs, continuous %.3fs' % (n, points, points, ntiles_time, curves_time))
+
+
+def benchmark_plot_report(n = 200000, classes = 4, models = 2, datasets = 2):
+    random = np.random.RandomState(0)
+    labels = ['class_%d' % k for k in range(classes)]
+    probabilities = [[random.dirichlet([1] * classes, size = n) for j in range(datasets)] for i in range(models)]
+    label_data = [np.array(labels)[random.randint(classes, size = n)] for j in range(datasets)]
+    args = (probabilities, labels, label_data, ['dataset %d' % j for j in range(datasets)], ['model %d' % i for i in range(models)])
+    directory = tempfile.mkdtemp()
+    plan = [{'scope': scope, 'select_targetclass': [label], 'plots': [(plot, os.path.join(directory, '%s %s %s.png' % (scope, label, plot)))
+                                                                        for plot in ('plot_cumgains', 'plot_cumlift')]}
+            for label in labels for scope in ('no_comparison', 'compare_models', 'compare_datasets')]
+    # one plotting_scope() call per scope, each computing its own aggregate
+    obj = modelplotpy.from_scores(*args, cache = False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = timeit.default_timer()
+        for entry in plan:
+            plot_input = obj.plotting_scope(scope = entry['scope'], select_targetclass = entry['select_targetclass'])
+            for plot, filename in entry['plots']:
+                ax = getattr(mp, plot)(plot_input, save_fig = False)
+                ax.figure.savefig(filename, dpi = 300)
+                plt.close(ax.figure)
+        separate = timeit.default_timer() - start
+        start = timeit.default_timer()
+        report = modelplotpy.from_scores(*args, cache = False).plot_report(plan)
+        batch = timeit.default_timer() - start
+    print('plot_report (%d scopes, %d plots): separate scopes %.2fs, report %.2fs (aggregate %.2fs, scope %.2fs, render %.2fs, save %.2fs)'
+          % (len(plan), len(report['files']), separate, batch, report['timings']['aggregate'], report['timings']['scope'],
+             report['timings']['render'], report['timings']['save']))
+
+
+def benchmark_headless_memory(plots = 10000, n = 10000):
+    X = pd.DataFrame(np.random.RandomState(0).normal(size = (n, 1)))
+    y = np.where(X[0] + np.random.RandomState(1).normal(size = n) > 1, 'yes', 'no')
+    obj = modelplotpy.from_scores([[np.column_stack([1 - range01(X[0]), range01(X[0])])]], ['no', 'yes'], [y], ['data'], ['model'])
+    with contextlib.redirect_stdout(io.StringIO()):
+        plot_input = obj.plotting_scope()
+    # the peak resident memory in MB, it stays flat if every figure is freed
+    rss = []
+    for plot in range(plots):
+        mp.plot_cumgains(plot_input, save_fig = False, headless = True)
+        if plot % (plots // 5) == 0:
+            gc.collect()
+            rss.append(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.)
+    print('headless rendering (%d plots): peak resident memory %s MB, pyplot figures %d' % (plots, ', '.join('%.0f' % r for r in rss), len(plt.get_fignums())))
+
+
+def benchmark_render_plots(plots = 32, n = 100000):
+    X = pd.DataFrame(np.random.RandomState(0).normal(size = (n, 2)))
+    y = np.where(X[0] + np.random.RandomState(1).normal(size = n) > 1, 'yes', 'no')
+    probabilities = [[np.column_stack([1 - range01(X[i] + X[1 - i] * 0.5), range01(X[i] + X[1 - i] * 0.5)])] for i in range(2)]
+    obj = modelplotpy.from_scores(probabilities, ['no', 'yes'], [y], ['data'], ['model a', 'model b'])
+    with contextlib.redirect_stdout(io.StringIO()):
+        plot_input = obj.plotting_scope(scope = 'compare_models')
+    directory = tempfile.mkdtemp()
+    jobs = [(('plot_cumgains', 'plot_cumlift')[plot % 2], plot_input, {}, os.path.join(directory, '%d.png' % plot)) for plot in range(plots)]
+    timings = []
+    for n_jobs in (1, 2, 4):
+        timings.append((n_jobs, min(timeit.repeat(lambda: mp.render_plots(jobs, n_jobs = n_jobs), number = 1, repeat = 2))))
+    print('render_plots (%d plots, %d cores): %s' % (plots, os.cpu_count(), ', '.join('%d jobs %.2fs (%.1fx)' % (n_jobs, seconds, timings[0][1] / seconds)
+                                                                                     for n_jobs, seconds in timings)))
+
+
+def benchmark_render_cache(plots = 24, n = 100000):
+    X = pd.DataFrame(np.random.RandomState(0).normal(size = (n, 1)))
+    y = np.where(X[0] + np.random.RandomState(1).normal(size = n) > 1, 'yes', 'no')
+    obj = modelplotpy.from_scores([[np.column_stack([1 - range01(X[0]), range01(X[0])])]], ['no', 'yes'], [y], ['data'], ['model'])
+    directory = tempfile.mkdtemp()
+    plan = [{'select_targetclass': ['yes'], 'plots': [('plot_cumgains', os.path.join(directory, 'gains %d.png' % plot), {'highlight_ntile': 1 + plot % 10})
+                                                      for plot in range(plots)]}]
+    cache = mp.render_cache(os.path.join(directory, 'cache'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        cold = timeit.timeit(lambda: obj.plot_report(plan, cache = cache), number = 1)
+        warm = timeit.timeit(lambda: obj.plot_report(plan, cache = cache), number = 1)
+    print('render_cache (%d plots, %d distinct): first run %.2fs, unchanged run %.3fs, %s' % (plots, min(plots, 10), cold, warm, cache.cache_info()))
+
+
+def benchmark_save_fig(plots = 20, n = 100000):
+    X = pd.DataFrame(np.random.RandomState(0).normal(size = (n, 1)))
+    y = np.where(X[0] + np.random.RandomState(1).normal(size = n) > 1, 'yes', 'no')
+    obj = modelplotpy.from_scores([[np.column_stack([1 - range01(X[0]), range01(X[0])])]], ['no', 'yes'], [y], ['data'], ['model'])
+    plot_input = obj.plotting_scope(select_targetclass = ['yes'])
+    directory = tempfile.mkdtemp()
+    def run(format, dpi, save_fig_async = False):
+        results = [mp.plot_cumgains(plot_input, save_fig_filename = os.path.join(directory, 'gains %d.%s' % (plot, format)), save_fig_format = format,
+                                    save_fig_dpi = dpi, save_fig_async = save_fig_async, highlight_ntile = 2, headless = True)
+                   for plot in range(plots)]
+        returned = time.perf_counter()
+        if save_fig_async:
+            [future.result() for future in results]
+        return returned
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for format, dpi in (('png', 300), ('png', 72), ('svg', 72), ('pdf', 72)):
+            start = time.perf_counter()
+            run(format, dpi)
+            timings.append('save_fig %s dpi %d (%d plots): %.2fs' % (format, dpi, plots, time.perf_counter() - start))
+        start = time.perf_counter()
+        returned = run('png', 300, save_fig_async = True)
+        timings.append('save_fig_async png dpi 300 (%d plots): returned after %.2fs, written after %.2fs' % (plots, returned - start, time.perf_counter() - start))
+    print('\n'.join(timings))
+
+
+if __name__ == '__main__':
+    benchmark_assign_ntiles()
+    benchmark_compact_scores()
+    benchmark_multiclass_counts()
+    benchmark_bootstrap()
+    benchmark_aggregate_curves()
+    benchmark_plot_report()
+    benchmark_headless_memory()
+    benchmark_render_plots()
+    benchmark_render_cache()
+    benchmark_save_fig()
@@ -1,13 +1,27 @@
 # -*- coding: utf-8 -*-
 
 import os
+import time
+import shutil
+import hashlib
+import atexit
+import queue
+import tempfile
+import warnings
+import threading
+import functools
+import concurrent.futures
 import numpy as np
 import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mtick
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 #from matplotlib.offsetbox import (TextArea, AnnotationBbox)
 
-def plot_response(plot_input, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text'):
+def plot_response(plot_input, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text',
+                  headless = False, save_fig_format = None, save_fig_dpi = 300, save_fig_async = False):
     """ Plotting response curve
     
     Parameters
@@ -27,158 +41,43 @@ def plot_response(plot_input, save_fig = True, save_fig_filename = '', highlight
         
     highlight_how : str, plot_text default
         Highlight_how specifies where information about the model performance is printed. It can be shown as text, on the plot or both.
-    
+
+    headless : bool, default False
+        Render the plot on an Agg canvas of its own instead of a pyplot figure: the plot is never shown and the figure is not
+        kept by pyplot, it is freed together with the returned axes. For batch jobs and for threads that render at the same time.
+
+    save_fig_format : str, default None
+        The file format of the saved plot, for example png, svg or pdf. By default it follows the extension of save_fig_filename
+        and it is png if no save_fig_filename is specified. It must match the extension of save_fig_filename if that names a format.
+
+    save_fig_dpi : int, default 300
+        The resolution of the saved plot in dots per inch. A low value gives small and quickly written png previews.
+
+    save_fig_async : bool, default False
+        Save the plot on a background thread and return at once. The plot is rendered headless and a concurrent.futures.Future
+        is returned instead of the axes, it gives the axes when the file is written. When many plots wait to be written,
+        the next plot waits for the oldest one.
+
     Returns
     -------
     It returns a matplotlib.axes._subplots.AxesSubplot object that can be transformed into the same plot with the .figure command.
     The plot is by default written to disk (save_fig = True). The location and filetype of the file depend on the save_fig_filename parameter.
     If the save_fig_filename parameter is empty (not specified), the plot will be written to the working directory as png. 
-    Otherwise the location and file type is specified by the user.
+    Otherwise the location and file type is specified by the user. With save_fig_async a future of the axes is returned.
         
     Raises
     ------
     TypeError: If `highlight_ntile` is not specified as an int.
-    ValueError: If the wrong `highlight_how` value is specified.
+    ValueError: If the wrong `highlight_how` value is specified or `save_fig_format` does not match the extension of `save_fig_filename`.
     """
-    
-    models   = plot_input.model_label.unique().tolist()
-    datasets = plot_input.dataset_label.unique().tolist()
-    classes  = plot_input.target_class.unique().tolist()
-    scope = plot_input.scope.unique()[0]
-    ntiles = plot_input.ntile.nunique() - 1
-    colors = ("#E41A1C", "#377EB8", "#4DAF4A", "#984EA3", "#FF7F00", "#FFFF33", "#A65628", "#F781BF", "#999999")
-    
-    if ntiles == 10:
-        description_label = 'decile'
-    elif ntiles == 100:
-        description_label = 'percentile'
-    else:
-        description_label = 'ntile'
-
-    if ntiles <= 20:
-        xlabper = 1
-    elif ntiles <= 40:
-        xlabper = 2
-    else:
-        xlabper = 5
-
-    fig, ax = plt.subplots(figsize = (12,7))
-    ax.set_xlabel(description_label)
-    ax.set_ylabel("response")
-    plt.suptitle('Response', fontsize = 16)
-    ax.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
-    ax.set_xticks(np.arange(0, ntiles + 1, xlabper))
-    ax.spines['right'].set_visible(False)
-    ax.spines['top'].set_visible(False)
-    ax.yaxis.set_ticks_position('left')
-    ax.xaxis.set_ticks_position('bottom')
-    ax.grid(True)
-    ax.set_xlim([1, ntiles])
-    ax.set_ylim([0, 1])
-    
-    if scope == "no_comparison":
-        ax.set_title("model: %s & dataset: %s & target class: %s" % (models[0], datasets[0], classes[0]), fontweight = 'bold')
-        ax.plot(plot_input.ntile, plot_input.pct, label = classes[0], color = colors[0])
-        ax.plot(plot_input.ntile, plot_input.pct_ref, linestyle = 'dashed', label = "overall response (%s)" % classes[0], color = colors[0])
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    elif scope == "compare_datasets":
-        for col, i in enumerate(datasets):
-            ax.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.pct[plot_input.dataset_label == i], label = i, color = colors[col])
-            ax.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.pct_ref[plot_input.dataset_label == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
-        ax.set_title("scope: comparing datasets & model: %s & target class: %s" % (models[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    elif scope == "compare_models":
-        for col, i in enumerate(models):
-            ax.plot(plot_input.ntile[plot_input.model_label == i], plot_input.pct[plot_input.model_label == i], label = i, color = colors[col])
-            ax.plot(plot_input.ntile[plot_input.model_label == i], plot_input.pct_ref[plot_input.model_label == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
-        ax.set_title("scope: comparing models & dataset: %s & target class: %s" % (datasets[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    else: #compare_targetclasses
-        for col, i in enumerate(classes):
-            ax.plot(plot_input.ntile[plot_input.target_class == i], plot_input.pct[plot_input.target_class == i], label = i, color = colors[col])
-            ax.plot(plot_input.ntile[plot_input.target_class == i], plot_input.pct_ref[plot_input.target_class == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
-        ax.set_title("Scope: comparing target classes & dataset: %s & model: %s" % (datasets[0], models[0]), fontweight = 'bold')
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    
-    if highlight_ntile != False:
-        
-        if highlight_ntile not in np.linspace(1, ntiles, num = ntiles).tolist():
-            raise TypeError('Invalid value for highlight_ntile parameter. It must be an int value between 1 and %d' % (ntiles))
-            
-        if highlight_how not in ('plot','text','plot_text'):
-            raise ValueError('Invalid highlight_how value, it must be one of the following: plot, text or plot_text.')
-        
-        else:
-            text = ''
-            if scope == "no_comparison":
-                cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, 'pct'].tolist()
-                plt.plot([1, highlight_ntile], [cumpct[0]] * 2, linestyle = '-.', color = colors[0], lw = 1.5)
-                plt.plot([highlight_ntile] * 2 , [0] + [cumpct[0]], linestyle = '-.', color = colors[0], lw = 1.5)
-                xy = tuple([highlight_ntile] + [cumpct[0]])
-                ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[0])
-                ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                         textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                         bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[0]), #fc = 'yellow', alpha = 0.3),
-                         arrowprops = dict(arrowstyle = '->', color = 'black'))
-                text += 'When we select %s %d from model %s in dataset %s the percentage of %s cases in the selection is %d' % (description_label, highlight_ntile, models[0], datasets[0], classes[0], int(cumpct[0] * 100)) + '%.\n'
-            elif scope == "compare_datasets":
-                for col, i in enumerate(datasets):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['dataset_label', 'pct']]
-                    cumpct = cumpct.pct[cumpct.dataset_label == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[col]), #fc = 'yellow', alpha = 0.3),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %s %d from model %s in dataset %s the percentage of %s cases in the selection is %d' % (description_label, highlight_ntile, models[0], datasets[col], classes[0], int(cumpct[0] * 100)) + '%.\n'
-            elif scope == "compare_models":
-                for col, i in enumerate(models):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['model_label', 'pct']]
-                    cumpct = cumpct.pct[cumpct.model_label == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[col]), #fc = 'yellow', alpha = 0.3),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %s %d from model %s in dataset %s the percentage of %s cases in the selection is %d' % (description_label, highlight_ntile, models[col], datasets[0], classes[0], int(cumpct[0] * 100)) + '%.\n'
-            else: # compare targetvalues
-                for col, i in enumerate(classes):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['target_class', 'pct']]
-                    cumpct = cumpct.pct[cumpct.target_class == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[col]), #fc = 'yellow', alpha = 0.3),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %s %d from model %s in dataset %s the percentage of %s cases in the selection is %d' % (description_label, highlight_ntile, models[0], datasets[0], classes[col], int(cumpct[0] * 100)) + '%.\n'
-            if highlight_how in ('text', 'plot_text'):
-                print(text[:-1])
-            if highlight_how in ('plot', 'plot_text'):
-                fig.text(.15, -0.001, text[:-1], ha='left')
-    
-    if save_fig == True:
-        if not save_fig_filename:
-            location = '%s/Response plot.png' % os.getcwd()
-            plt.savefig(location, dpi = 300)
-            print("The response plot is saved in %s" % location)
-        else:
-            plt.savefig(save_fig_filename, dpi = 300)
-            print("The response plot is saved in %s" % save_fig_filename)
-        plt.show()
-        plt.gcf().clear()
-    plt.show()
-    return ax
-
-def plot_cumresponse(plot_input, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text'):
+    return _plot_curves(plot_input, 'pct', 'response', 'Response', save_fig, save_fig_filename, highlight_ntile, highlight_how,
+                        reference = ('pct_ref', 'overall response (%s)'), ylim = [0, 1], legend = 'upper right',
+                        text = 'When we select %(description)s %(ntile)d from model %(model)s in dataset %(dataset)s the percentage of %(target_class)s cases in the selection is %(percent)d%%.',
+                        headless = headless, save_fig_format = save_fig_format, save_fig_dpi = save_fig_dpi, save_fig_async = save_fig_async,
+                        name = 'response', filename = 'Response plot.png')
+
+def plot_cumresponse(plot_input, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text', confidence_bands = False,
+                     headless = False, save_fig_format = None, save_fig_dpi = 300, save_fig_async = False):
     """ Plotting cumulative response curve
     
     Parameters
@@ -198,158 +97,47 @@ def plot_cumresponse(plot_input, save_fig = True, save_fig_filename = '', highli
 
     highlight_how : str, plot_text default
         Highlight_how specifies where information about the model performance is printed. It can be shown as text, on the plot or both.
-        
+
+    confidence_bands : bool, default False
+        Shade the bootstrap confidence band around every curve, plot_input must come from plotting_scope() with bootstrap replicates.
+
+    headless : bool, default False
+        Render the plot on an Agg canvas of its own instead of a pyplot figure: the plot is never shown and the figure is not
+        kept by pyplot, it is freed together with the returned axes. For batch jobs and for threads that render at the same time.
+
+    save_fig_format : str, default None
+        The file format of the saved plot, for example png, svg or pdf. By default it follows the extension of save_fig_filename
+        and it is png if no save_fig_filename is specified. It must match the extension of save_fig_filename if that names a format.
+
+    save_fig_dpi : int, default 300
+        The resolution of the saved plot in dots per inch. A low value gives small and quickly written png previews.
+
+    save_fig_async : bool, default False
+        Save the plot on a background thread and return at once. The plot is rendered headless and a concurrent.futures.Future
+        is returned instead of the axes, it gives the axes when the file is written. When many plots wait to be written,
+        the next plot waits for the oldest one.
+
     Returns
     -------
     It returns a matplotlib.axes._subplots.AxesSubplot object that can be transformed into the same plot with the .figure command.
     The plot is by default written to disk (save_fig = True). The location and filetype of the file depend on the save_fig_filename parameter.
     If the save_fig_filename parameter is empty (not specified), the plot will be written to the working directory as png. 
-    Otherwise the location and file type is specified by the user.
+    Otherwise the location and file type is specified by the user. With save_fig_async a future of the axes is returned.
         
     Raises
     ------
+    ValueError: If `confidence_bands` is True and plot_input has no bootstrap bands.
     TypeError: If `highlight_ntile` is not specified as an int.
-    ValueError: If the wrong `highlight_how` value is specified.
+    ValueError: If the wrong `highlight_how` value is specified or `save_fig_format` does not match the extension of `save_fig_filename`.
     """
-    models   = plot_input.model_label.unique().tolist()
-    datasets = plot_input.dataset_label.unique().tolist()
-    classes  = plot_input.target_class.unique().tolist()
-    scope = plot_input.scope.unique()[0]
-    ntiles = plot_input.ntile.nunique() - 1
-    colors = ("#E41A1C", "#377EB8", "#4DAF4A", "#984EA3", "#FF7F00", "#FFFF33", "#A65628", "#F781BF", "#999999")
-    
-    if ntiles == 10:
-        description_label = 'decile'
-    elif ntiles == 100:
-        description_label = 'percentile'
-    else:
-        description_label = 'ntile'
-    
-    if ntiles <= 20:
-        xlabper = 1
-    elif ntiles <= 40:
-        xlabper = 2
-    else:
-        xlabper = 5
-
-    fig, ax = plt.subplots(figsize = (12,7))
-    ax.set_xlabel(description_label)
-    ax.set_ylabel("cumulative response")
-    plt.suptitle('Cumulative response', fontsize = 16)
-    ax.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
-    ax.set_xticks(np.arange(0, ntiles + 1, xlabper))
-    ax.spines['right'].set_visible(False)
-    ax.spines['top'].set_visible(False)
-    ax.yaxis.set_ticks_position('left')
-    ax.xaxis.set_ticks_position('bottom')
-    ax.grid(True)
-    ax.set_xlim([1, ntiles])
-    ax.set_ylim([0, 1])
-    
-    if scope == "no_comparison":
-        ax.set_title("model: %s & dataset: %s & target class: %s" % (models[0], datasets[0], classes[0]), fontweight = 'bold')
-        ax.plot(plot_input.ntile, plot_input.cumpct, label = classes[0], color = colors[0])
-        ax.plot(plot_input.ntile, plot_input.pct_ref, linestyle = 'dashed', label = "overall response (%s)" % classes[0], color = colors[0])
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    elif scope == "compare_datasets":
-        for col, i in enumerate(datasets):
-            ax.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.cumpct[plot_input.dataset_label == i], label = i, color = colors[col])
-            ax.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.pct_ref[plot_input.dataset_label == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
-        ax.set_title("scope: comparing datasets & model: %s & target class: %s" % (models[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    elif scope == "compare_models":
-        for col, i in enumerate(models):
-            ax.plot(plot_input.ntile[plot_input.model_label == i], plot_input.cumpct[plot_input.model_label == i], label = i, color = colors[col])
-            ax.plot(plot_input.ntile[plot_input.model_label == i], plot_input.pct_ref[plot_input.model_label == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
-        ax.set_title("Scope: comparing models & dataset: %s & target class: %s" % (datasets[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    else: #compare_targetclasses
-        for col, i in enumerate(classes):
-            ax.plot(plot_input.ntile[plot_input.target_class == i], plot_input.cumpct[plot_input.target_class == i], label = i, color = colors[col])
-            ax.plot(plot_input.ntile[plot_input.target_class == i], plot_input.pct_ref[plot_input.target_class == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
-        ax.set_title("Comparing target classes & dataset: %s & model: %s" % (datasets[0], models[0]), fontweight = 'bold')
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    
-    if highlight_ntile != False:
-        
-        if highlight_ntile not in np.linspace(1, ntiles, num = ntiles).tolist():
-            raise TypeError('Invalid value for highlight_ntile parameter. It must be an int value between 1 and %d' % (ntiles))
-            
-        if highlight_how not in ('plot','text','plot_text'):
-            raise ValueError('Invalid highlight_how value, it must be one of the following: plot, text or plot_text.')
-        
-        else:
-            text = ''
-            if scope == "no_comparison":
-                cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, 'cumpct'].tolist()
-                plt.plot([1, highlight_ntile], [cumpct[0]] * 2, linestyle = '-.', color = colors[0], lw = 1.5)
-                plt.plot([highlight_ntile] * 2 , [0] + [cumpct[0]], linestyle = '-.', color = colors[0], lw = 1.5)
-                xy = tuple([highlight_ntile] + [cumpct[0]])
-                ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[0])
-                ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                         textcoords = 'offset points', ha = 'center', va = 'bottom', color = 'black',
-                         bbox = dict(boxstyle = 'round, pad = 0.4', alpha = 1, fc = colors[0]),
-                         arrowprops = dict(arrowstyle = '->', color = 'black'))
-                text += 'When we select %ss 1 until %d according to model %s in dataset %s the percentage of %s cases in the selection is %d' % (description_label, highlight_ntile, models[0], datasets[0], classes[0], int(cumpct[0] * 100)) + '%.\n'
-            elif scope == "compare_datasets":
-                for col, i in enumerate(datasets):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['dataset_label', 'cumpct']]
-                    cumpct = cumpct.cumpct[cumpct.dataset_label == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords = 'offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox = dict(boxstyle = 'round, pad = 0.4', alpha = 1, fc = colors[col]),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %ss 1 until %d according to model %s in dataset %s the percentage of %s cases in the selection is %d' % (description_label, highlight_ntile, models[0], datasets[col], classes[0], int(cumpct[0] * 100)) + '%.\n'
-            elif scope == "compare_models":
-                for col, i in enumerate(models):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['model_label', 'cumpct']]
-                    cumpct = cumpct.cumpct[cumpct.model_label == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords = 'offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox = dict(boxstyle = 'round, pad = 0.4', alpha = 1, fc = colors[col]),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %ss 1 until %d according to model %s in dataset %s the percentage of %s cases in the selection is %d' % (description_label, highlight_ntile, models[col], datasets[0], classes[0], int(cumpct[0] * 100)) + '%.\n'
-            else: # compare targetvalues
-                for col, i in enumerate(classes):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['target_class', 'cumpct']]
-                    cumpct = cumpct.cumpct[cumpct.target_class == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords = 'offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox = dict(boxstyle = 'round, pad = 0.4', alpha = 1, fc = colors[col]),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %ss 1 until %d according to model %s in dataset %s the percentage of %s cases in the selection is %d' % (description_label, highlight_ntile, models[0], datasets[0], classes[col], int(cumpct[0] * 100)) + '%.\n'
-            
-            if highlight_how in ('text', 'plot_text'):
-                print(text[:-1])
-            if highlight_how in ('plot', 'plot_text'):
-                fig.text(.15, -0.001, text[:-1], ha='left')
-                    
-    if save_fig == True:
-        if not save_fig_filename:
-            location = '%s/Cumulative response plot.png' % os.getcwd()
-            plt.savefig(location, dpi = 300)
-            print("The cumulative response plot is saved in %s" % location)
-        else:
-            plt.savefig(save_fig_filename, dpi = 300)
-            print("The cumulative response plot is saved in %s" % save_fig_filename)
-        plt.show()
-        plt.gcf().clear()
-    plt.show()
-    return ax
-
-def plot_cumlift(plot_input, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text'):
+    return _plot_curves(plot_input, 'cumpct', 'cumulative response', 'Cumulative response', save_fig, save_fig_filename, highlight_ntile, highlight_how,
+                        reference = ('pct_ref', 'overall response (%s)'), ylim = [0, 1], legend = 'upper right', confidence_bands = confidence_bands,
+                        text = 'When we select %(description)ss 1 until %(ntile)d according to model %(model)s in dataset %(dataset)s the percentage of %(target_class)s cases in the selection is %(percent)d%%.',
+                        headless = headless, save_fig_format = save_fig_format, save_fig_dpi = save_fig_dpi, save_fig_async = save_fig_async,
+                        name = 'cumulative response', filename = 'Cumulative response plot.png')
+
+def plot_cumlift(plot_input, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text', confidence_bands = False,
+                 headless = False, save_fig_format = None, save_fig_dpi = 300, save_fig_async = False):
     """ Plotting cumulative lift curve
     
     Parameters
@@ -369,159 +157,47 @@ def plot_cumlift(plot_input, save_fig = True, save_fig_filename = '', highlight_
 
     highlight_how : str, plot_text default
         Highlight_how specifies where information about the model performance is printed. It can be shown as text, on the plot or both.
-    
+
+    confidence_bands : bool, default False
+        Shade the bootstrap confidence band around every curve, plot_input must come from plotting_scope() with bootstrap replicates.
+
+    headless : bool, default False
+        Render the plot on an Agg canvas of its own instead of a pyplot figure: the plot is never shown and the figure is not
+        kept by pyplot, it is freed together with the returned axes. For batch jobs and for threads that render at the same time.
+
+    save_fig_format : str, default None
+        The file format of the saved plot, for example png, svg or pdf. By default it follows the extension of save_fig_filename
+        and it is png if no save_fig_filename is specified. It must match the extension of save_fig_filename if that names a format.
+
+    save_fig_dpi : int, default 300
+        The resolution of the saved plot in dots per inch. A low value gives small and quickly written png previews.
+
+    save_fig_async : bool, default False
+        Save the plot on a background thread and return at once. The plot is rendered headless and a concurrent.futures.Future
+        is returned instead of the axes, it gives the axes when the file is written. When many plots wait to be written,
+        the next plot waits for the oldest one.
+
     Returns
     -------
     It returns a matplotlib.axes._subplots.AxesSubplot object that can be transformed into the same plot with the .figure command.
     The plot is by default written to disk (save_fig = True). The location and filetype of the file depend on the save_fig_filename parameter.
     If the save_fig_filename parameter is empty (not specified), the plot will be written to the working directory as png. 
-    Otherwise the location and file type is specified by the user.
+    Otherwise the location and file type is specified by the user. With save_fig_async a future of the axes is returned.
         
     Raises
     ------
+    ValueError: If `confidence_bands` is True and plot_input has no bootstrap bands.
     TypeError: If `highlight_ntile` is not specified as an int.
-    ValueError: If the wrong `highlight_how` value is specified.
+    ValueError: If the wrong `highlight_how` value is specified or `save_fig_format` does not match the extension of `save_fig_filename`.
     """
-    models   = plot_input.model_label.unique().tolist()
-    datasets = plot_input.dataset_label.unique().tolist()
-    classes  = plot_input.target_class.unique().tolist()
-    scope = plot_input.scope.unique()[0]
-    ntiles = plot_input.ntile.nunique() - 1
-    colors = ("#E41A1C", "#377EB8", "#4DAF4A", "#984EA3", "#FF7F00", "#FFFF33", "#A65628", "#F781BF", "#999999")
-    
-    if ntiles == 10:
-        description_label = 'decile'
-    elif ntiles == 100:
-        description_label = 'percentile'
-    else:
-        description_label = 'ntile'
-      
-    if ntiles <= 20:
-        xlabper = 1
-    elif ntiles <= 40:
-        xlabper = 2
-    else:
-        xlabper = 5
-
-    fig, ax = plt.subplots(figsize = (12,7))
-    ax.set_xlabel(description_label)
-    ax.set_ylabel("cumulative lift")
-    plt.suptitle('Cumulative lift', fontsize = 16)
-    ax.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
-    ax.set_xticks(np.arange(0, ntiles + 1, xlabper))
-    ax.spines['right'].set_visible(False)
-    ax.spines['top'].set_visible(False)
-    ax.yaxis.set_ticks_position('left')
-    ax.xaxis.set_ticks_position('bottom')
-    ax.grid(True)
-    ax.set_xlim([1, ntiles])
-    ax.set_ylim([0, max(plot_input.cumlift)])
-    ax.plot(list(range(1, ntiles + 1, 1)), [1] * ntiles, linestyle = 'dashed', label = "no lift", color = 'grey')
-    
-    if scope == "no_comparison":
-        ax.set_title("model: %s & dataset: %s & target class: %s" % (models[0], datasets[0], classes[0]), fontweight = 'bold')
-        ax.plot(plot_input.ntile, plot_input.cumlift, label = classes[0], color = colors[0])
-        #ax.plot(plot_input.ntile, plot_input.cumlift_ref, linestyle = 'dashed', label = "overall response (%s)" % classes[0], color = colors[0])
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    elif scope == "compare_datasets":
-        for col, i in enumerate(datasets):
-            ax.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.cumlift[plot_input.dataset_label == i], label = i, color = colors[col])
-            #ax.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.cumlift_ref[plot_input.dataset_label == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
-        ax.set_title("scope: comparing datasets & model: %s & target class: %s" % (models[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    elif scope == "compare_models":
-        for col, i in enumerate(models):
-            ax.plot(plot_input.ntile[plot_input.model_label == i], plot_input.cumlift[plot_input.model_label == i], label = i, color = colors[col])
-            #ax.plot(plot_input.ntile[plot_input.model_label == i], plot_input.cumlift_ref[plot_input.model_label == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
-        ax.set_title("scope: comparing models & dataset: %s & target class: %s" % (datasets[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    else: #compare_targetclasses
-        for col, i in enumerate(classes):
-            ax.plot(plot_input.ntile[plot_input.target_class == i], plot_input.cumlift[plot_input.target_class == i], label = i, color = colors[col])
-            #ax.plot(plot_input.ntile[plot_input.target_class == i], plot_input.cumlift_ref[plot_input.target_class == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
-        ax.set_title("scope: comparing target classes & dataset: %s & model: %s" % (datasets[0], models[0]), fontweight = 'bold')
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    
-    if highlight_ntile != False:
-        
-        if highlight_ntile not in np.linspace(1, ntiles, num = ntiles).tolist():
-            raise TypeError('Invalid value for highlight_ntile parameter. It must be an int value between 1 and %d' % (ntiles))
-            
-        if highlight_how not in ('plot','text','plot_text'):
-            raise ValueError('Invalid highlight_how value, it must be one of the following: plot, text or plot_text.')
-        
-        else:
-            text = ''
-            if scope == "no_comparison":
-                cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, 'cumlift'].tolist()
-                plt.plot([1, highlight_ntile], [cumpct[0]] * 2, linestyle = '-.', color = colors[0], lw = 1.5)
-                plt.plot([highlight_ntile] * 2 , [0] + [cumpct[0]], linestyle = '-.', color = colors[0], lw = 1.5)
-                xy = tuple([highlight_ntile] + [cumpct[0]])
-                ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[0])
-                ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                         textcoords = 'offset points', ha = 'center', va = 'bottom', color = 'black',
-                         bbox = dict(boxstyle = 'round, pad = 0.4', alpha = 1, fc = colors[0]),
-                         arrowprops = dict(arrowstyle = '->', color = 'black'))
-                text += 'When we select %d' % int((float(highlight_ntile) / ntiles) * 100) + '%' + ' with the highest probability according to model %s in dataset %s, this selection for target class %s is %s times than selecting without a model.\n' % (models[0], datasets[0], classes[0], str(round(cumpct[0], 2)))
-            elif scope == "compare_datasets":
-                for col, i in enumerate(datasets):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['dataset_label', 'cumlift']]
-                    cumpct = cumpct.cumlift[cumpct.dataset_label == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords = 'offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox = dict(boxstyle = 'round, pad = 0.4', alpha = 1, fc = colors[col]),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %d' % int((float(highlight_ntile) / ntiles) * 100) + '%' + ' with the highest probability according to model %s in dataset %s, this selection for target class %s is %s times than selecting without a model.\n' % (models[0], datasets[col], classes[0], str(round(cumpct[0], 2)))
-            elif scope == "compare_models":
-                for col, i in enumerate(models):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['model_label', 'cumlift']]
-                    cumpct = cumpct.cumlift[cumpct.model_label == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords = 'offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox = dict(boxstyle = 'round, pad = 0.4', alpha = 1, fc = colors[col]),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %d' % int((float(highlight_ntile) / ntiles) * 100) + '%' + ' with the highest probability according to model %s in dataset %s, this selection for target class %s is %s times than selecting without a model.\n' % (models[col], datasets[0], classes[0], str(round(cumpct[0], 2)))
-            else: # compare targetvalues
-                for col, i in enumerate(classes):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['target_class', 'cumlift']]
-                    cumpct = cumpct.cumlift[cumpct.target_class == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords = 'offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox = dict(boxstyle = 'round, pad = 0.4', alpha = 1, fc = colors[col]),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %d' % int((float(highlight_ntile) / ntiles) * 100) + '%' + ' with the highest probability according to model %s in dataset %s, this selection for target class %s is %s times than selecting without a model.\n' % (models[0], datasets[0], classes[col], str(round(cumpct[0], 2)))
-            
-            if highlight_how in ('text', 'plot_text'):
-                print(text[:-1])
-            if highlight_how in ('plot', 'plot_text'):
-                fig.text(.15, -0.001, text[:-1], ha='left')
-    
-    if save_fig == True:
-        if not save_fig_filename:
-            location = '%s/Cumulative lift plot.png' % os.getcwd()
-            plt.savefig(location, dpi = 300)
-            print("The cumulative lift plot is saved in %s" % location)
-        else:
-            plt.savefig(save_fig_filename, dpi = 300)
-            print("The cumulative lift plot is saved in %s" % save_fig_filename)
-        plt.show()
-        plt.gcf().clear()
-    plt.show()
-    return ax
-
-def plot_cumgains(plot_input, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text'):
+    return _plot_curves(plot_input, 'cumlift', 'cumulative lift', 'Cumulative lift', save_fig, save_fig_filename, highlight_ntile, highlight_how,
+                        baseline = (1, 'no lift'), ylim = [0, max(plot_input.cumlift)], legend = 'upper right', confidence_bands = confidence_bands,
+                        text = 'When we select %(share)d%% with the highest probability according to model %(model)s in dataset %(dataset)s, this selection for target class %(target_class)s is %(times)s times than selecting without a model.',
+                        headless = headless, save_fig_format = save_fig_format, save_fig_dpi = save_fig_dpi, save_fig_async = save_fig_async,
+                        name = 'cumulative lift', filename = 'Cumulative lift plot.png')
+
+def plot_cumgains(plot_input, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text', confidence_bands = False,
+                  headless = False, save_fig_format = None, save_fig_dpi = 300, save_fig_async = False):
     """ Plotting cumulative gains curve
     
     Parameters
@@ -541,159 +217,47 @@ def plot_cumgains(plot_input, save_fig = True, save_fig_filename = '', highlight
     
     highlight_how : str, plot_text default
         Highlight_how specifies where information about the model performance is printed. It can be shown as text, on the plot or both.
-    
+
+    confidence_bands : bool, default False
+        Shade the bootstrap confidence band around every curve, plot_input must come from plotting_scope() with bootstrap replicates.
+
+    headless : bool, default False
+        Render the plot on an Agg canvas of its own instead of a pyplot figure: the plot is never shown and the figure is not
+        kept by pyplot, it is freed together with the returned axes. For batch jobs and for threads that render at the same time.
+
+    save_fig_format : str, default None
+        The file format of the saved plot, for example png, svg or pdf. By default it follows the extension of save_fig_filename
+        and it is png if no save_fig_filename is specified. It must match the extension of save_fig_filename if that names a format.
+
+    save_fig_dpi : int, default 300
+        The resolution of the saved plot in dots per inch. A low value gives small and quickly written png previews.
+
+    save_fig_async : bool, default False
+        Save the plot on a background thread and return at once. The plot is rendered headless and a concurrent.futures.Future
+        is returned instead of the axes, it gives the axes when the file is written. When many plots wait to be written,
+        the next plot waits for the oldest one.
+
     Returns
     -------
     It returns a matplotlib.axes._subplots.AxesSubplot object that can be transformed into the same plot with the .figure command.
     The plot is by default written to disk (save_fig = True). The location and filetype of the file depend on the save_fig_filename parameter.
     If the save_fig_filename parameter is empty (not specified), the plot will be written to the working directory as png. 
-    Otherwise the location and file type is specified by the user.
+    Otherwise the location and file type is specified by the user. With save_fig_async a future of the axes is returned.
         
     Raises
     ------
+    ValueError: If `confidence_bands` is True and plot_input has no bootstrap bands.
     TypeError: If `highlight_ntile` is not specified as an int.
-    ValueError: If the wrong `highlight_how` value is specified.
+    ValueError: If the wrong `highlight_how` value is specified or `save_fig_format` does not match the extension of `save_fig_filename`.
     """
-    models   = plot_input.model_label.unique().tolist()
-    datasets = plot_input.dataset_label.unique().tolist()
-    classes  = plot_input.target_class.unique().tolist()
-    scope = plot_input.scope.unique()[0]
-    ntiles = plot_input.ntile.nunique() - 1
-    colors = ("#E41A1C", "#377EB8", "#4DAF4A", "#984EA3", "#FF7F00", "#FFFF33", "#A65628", "#F781BF", "#999999")
-    
-    if ntiles == 10:
-        description_label = 'decile'
-    elif ntiles == 100:
-        description_label = 'percentile'
-    else:
-        description_label = 'ntile'
-    
-    if ntiles <= 20:
-        xlabper = 1
-    elif ntiles <= 40:
-        xlabper = 2
-    else:
-        xlabper = 5
-
-    fig, ax = plt.subplots(figsize = (12,7))
-    ax.set_xlabel(description_label)
-    ax.set_ylabel("cumulative gains")
-    plt.suptitle('Cumulative gains', fontsize = 16)
-    ax.set_xticks(np.arange(0, ntiles + 1, xlabper))
-    ax.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
-    ax.spines['right'].set_visible(False)
-    ax.spines['top'].set_visible(False)
-    ax.yaxis.set_ticks_position('left')
-    ax.xaxis.set_ticks_position('bottom')
-    #ax.plot(list(range(0, ntiles + 1, 1)), np.linspace(0, 1, num = ntiles + 1).tolist(), linestyle = 'dashed', label = "minimal gains", color = 'grey')    
-    ax.grid(True)
-    ax.set_xlim([0, ntiles])
-    ax.set_ylim([0, 1])
-    
-    if scope == "no_comparison":
-        ax.set_title("model: %s & dataset: %s & target class: %s" % (models[0], datasets[0], classes[0]), fontweight = 'bold')
-        ax.plot(plot_input.ntile, plot_input.cumgain, label = classes[0], color = colors[0])
-        ax.plot(plot_input.ntile, plot_input.gain_opt, linestyle = 'dashed', label = "optimal gains (%s)" % classes[0], color = colors[0], linewidth = 1.5)
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
-    elif scope == "compare_datasets":
-        for col, i in enumerate(datasets):
-            ax.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.cumgain[plot_input.dataset_label == i], label = i, color = colors[col])
-            ax.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.gain_opt[plot_input.dataset_label == i], linestyle = 'dashed', label = "optimal gains (%s)" % i, color = colors[col], linewidth = 1.5)
-        ax.set_title("scope: comparing datasets & model: %s & target class: %s" % (models[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
-    elif scope == "compare_models":
-        for col, i in enumerate(models):
-            ax.plot(plot_input.ntile[plot_input.model_label == i], plot_input.cumgain[plot_input.model_label == i], label = i, color = colors[col])
-            ax.plot(plot_input.ntile[plot_input.model_label == i], plot_input.gain_opt[plot_input.model_label == i], linestyle = 'dashed', label = "optimal gains (%s)" % i, color = colors[col], linewidth = 1.5)
-        ax.set_title("scope: comparing models & dataset: %s & target class: %s" % (datasets[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
-    else: #compare_targetclasses
-        for col, i in enumerate(classes):
-            ax.plot(plot_input.ntile[plot_input.target_class == i], plot_input.cumgain[plot_input.target_class == i], label = i, color = colors[col])
-            ax.plot(plot_input.ntile[plot_input.target_class == i], plot_input.gain_opt[plot_input.target_class == i], linestyle = 'dashed', label = "optimal gains (%s)" % i, color = colors[col], linewidth = 1.5)
-        ax.set_title("scope: comparing target classes & dataset: %s & model: %s" % (datasets[0], models[0]), fontweight = 'bold')
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
-    
-    if highlight_ntile != False:
-        
-        if highlight_ntile not in np.linspace(1, ntiles, num = ntiles).tolist():
-            raise TypeError('Invalid value for highlight_ntile parameter. It must be an int value between 1 and %d' % (ntiles))
-            
-        if highlight_how not in ('plot','text','plot_text'):
-            raise ValueError('Invalid highlight_how value, it must be one of the following: plot, text or plot_text.')
-        
-        else:
-            text = ''
-            if scope == "no_comparison":
-                cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, 'cumgain'].tolist()
-                plt.plot([0, highlight_ntile], [cumpct[0]] * 2, linestyle = '-.', color = colors[0], lw = 1.5)
-                plt.plot([highlight_ntile] * 2 , [0] + [cumpct[0]], linestyle = '-.', color = colors[0], lw = 1.5)
-                xy = tuple([highlight_ntile] + [cumpct[0]])
-                ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[0])
-                ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                         textcoords = 'offset points', ha = 'center', va = 'bottom', color = 'black',
-                         bbox = dict(boxstyle = 'round, pad = 0.4', alpha = 1, fc = colors[0]),
-                         arrowprops = dict(arrowstyle = '->', color = 'black'))
-                text += 'When we select %d' % int((float(highlight_ntile) / ntiles) * 100) + '%' + ' with the highest probability according to model %s, this selection holds %d' % (models[0], int(cumpct[0] * 100)) + '%' + ' of all %s cases in dataset %s.\n'  % (classes[0], datasets[0])
-            elif scope == "compare_datasets":
-                for col, i in enumerate(datasets):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['dataset_label', 'cumgain']]
-                    cumpct = cumpct.cumgain[cumpct.dataset_label == i].tolist()
-                    plt.plot([0, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords = 'offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox = dict(boxstyle = 'round, pad = 0.4', alpha = 1, fc = colors[col]),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %d' % int((float(highlight_ntile) / ntiles) * 100) + '%' + ' with the highest probability according to model %s, this selection holds %d' % (models[0], int(cumpct[0] * 100)) + '%' + ' of all %s cases in dataset %s.\n'  % (classes[0], datasets[col])
-            elif scope == "compare_models":
-                for col, i in enumerate(models):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['model_label', 'cumgain']]
-                    cumpct = cumpct.cumgain[cumpct.model_label == i].tolist()
-                    plt.plot([0, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords = 'offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox = dict(boxstyle = 'round, pad = 0.4', alpha = 1, fc = colors[col]),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %d' % int((float(highlight_ntile) / ntiles) * 100) + '%' + ' with the highest probability according to model %s, this selection holds %d' % (models[col], int(cumpct[0] * 100)) + '%' + ' of all %s cases in dataset %s.\n'  % (classes[0], datasets[0])
-            else: # compare targetvalues
-                for col, i in enumerate(classes):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['target_class', 'cumgain']]
-                    cumpct = cumpct.cumgain[cumpct.target_class == i].tolist()
-                    plt.plot([0, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords = 'offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox = dict(boxstyle = 'round, pad = 0.4', alpha = 1, fc = colors[col]),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %d' % int((float(highlight_ntile) / ntiles) * 100) + '%' + ' with the highest probability according to model %s, this selection holds %d' % (models[0], int(cumpct[0] * 100)) + '%' + ' of all %s cases in dataset %s.\n'  % (classes[col], datasets[0])
-            
-            if highlight_how in ('text', 'plot_text'):
-                print(text[:-1])
-            if highlight_how in ('plot', 'plot_text'):
-                fig.text(.15, -0.001, text[:-1], ha='left')
-    
-    if save_fig == True:
-        if not save_fig_filename:
-            location = '%s/Cumulative gains plot.png' % os.getcwd()
-            plt.savefig(location, dpi = 300)
-            print("The cumulative gains plot is saved in %s" % location)
-        else:
-            plt.savefig(save_fig_filename, dpi = 300)
-            print("The cumulative gains plot is saved in %s" % save_fig_filename)
-        plt.show()
-        plt.gcf().clear()
-    plt.show()
-    return ax
-
-def plot_all(plot_input, save_fig = True, save_fig_filename = ''):
+    return _plot_curves(plot_input, 'cumgain', 'cumulative gains', 'Cumulative gains', save_fig, save_fig_filename, highlight_ntile, highlight_how,
+                        reference = ('gain_opt', 'optimal gains (%s)'), xmin = 0, ylim = [0, 1], legend = 'lower right', confidence_bands = confidence_bands,
+                        text = 'When we select %(share)d%% with the highest probability according to model %(model)s, this selection holds %(percent)d%% of all %(target_class)s cases in dataset %(dataset)s.',
+                        headless = headless, save_fig_format = save_fig_format, save_fig_dpi = save_fig_dpi, save_fig_async = save_fig_async,
+                        name = 'cumulative gains', filename = 'Cumulative gains plot.png')
+
+def plot_all(plot_input, save_fig = True, save_fig_filename = '',
+             headless = False, save_fig_format = None, save_fig_dpi = 300, save_fig_async = False):
     """ Plotting cumulative gains curve
 
     Parameters
@@ -708,19 +272,38 @@ def plot_all(plot_input, save_fig = True, save_fig_filename = ''):
         Specify the path and filetype to save the plot.
         If nothing specified, the plot will be saved as jpeg to the current working directory.
 
+    headless : bool, default False
+        Render the plot on an Agg canvas of its own instead of a pyplot figure: the plot is never shown and the figure is not
+        kept by pyplot, it is freed together with the returned axes. For batch jobs and for threads that render at the same time.
+
+    save_fig_format : str, default None
+        The file format of the saved plot, for example png, svg or pdf. By default it follows the extension of save_fig_filename
+        and it is png if no save_fig_filename is specified. It must match the extension of save_fig_filename if that names a format.
+
+    save_fig_dpi : int, default 300
+        The resolution of the saved plot in dots per inch. A low value gives small and quickly written png previews.
+
+    save_fig_async : bool, default False
+        Save the plot on a background thread and return at once. The plot is rendered headless and a concurrent.futures.Future
+        is returned instead of the axes, it gives the axes when the file is written. When many plots wait to be written,
+        the next plot waits for the oldest one.
+
     Returns
     -------
     It returns a matplotlib.axes._subplots.AxesSubplot object that can be transformed into the same plot with the .figure command.
     The plot is by default written to disk (save_fig = True). The location and filetype of the file depend on the save_fig_filename parameter.
     If the save_fig_filename parameter is empty (not specified), the plot will be written to the working directory as png. 
-    Otherwise the location and file type is specified by the user.
+    Otherwise the location and file type is specified by the user. With save_fig_async a future of the axes is returned.
+
+    Raises
+    ------
+    ValueError: If `save_fig_format` does not match the extension of `save_fig_filename`.
     """
     models   = plot_input.model_label.unique().tolist()
     datasets = plot_input.dataset_label.unique().tolist()
     classes  = plot_input.target_class.unique().tolist()
     scope = plot_input.scope.unique()[0]
-    ntiles = plot_input.ntile.nunique() - 1
-    colors = ("#E41A1C", "#377EB8", "#4DAF4A", "#984EA3", "#FF7F00", "#FFFF33", "#A65628", "#F781BF", "#999999")
+    ntiles = int(round(plot_input.ntile.max()))
 
     if ntiles == 10:
         description_label = 'decile'
@@ -736,7 +319,7 @@ def plot_all(plot_input, save_fig = True, save_fig_filename = ''):
     else:
         xlabper = 5
 
-    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, sharex = False, sharey = False, figsize = (15,10))
+    fig, ((ax1, ax2), (ax3, ax4)) = _new_figure(headless or save_fig_async, 2, 2, figsize = (15,10))
     ax1.set_title('Cumulative gains', fontweight='bold')
     ax1.set_ylabel('cumulative gains')
     #ax1.set_xlabel('decile')
@@ -793,74 +376,67 @@ def plot_all(plot_input, save_fig = True, save_fig_filename = ''):
     
     if scope == "no_comparison":
         title = "model: %s & dataset: %s & target class: %s" % (models[0], datasets[0], classes[0])
-        ax1.plot(plot_input.ntile, plot_input.cumgain, label = classes[0], color = colors[0])
-        ax1.plot(plot_input.ntile, plot_input.gain_opt, linestyle = 'dashed', label = "optimal gains (%s)" % classes[0], color = colors[0])
+        ax1.plot(plot_input.ntile, plot_input.cumgain, label = classes[0], color = _COLORS[0])
+        ax1.plot(plot_input.ntile, plot_input.gain_opt, linestyle = 'dashed', label = "optimal gains (%s)" % classes[0], color = _COLORS[0])
         ax1.legend(loc = 'lower right', shadow = False, frameon = False)
-        ax2.plot(plot_input.ntile, plot_input.cumlift, label = classes[0], color = colors[0])
+        ax2.plot(plot_input.ntile, plot_input.cumlift, label = classes[0], color = _COLORS[0])
         ax2.legend(loc = 'upper right', shadow = False, frameon = False)
-        ax3.plot(plot_input.ntile, plot_input.pct, label = classes[0], color = colors[0])
-        ax3.plot(plot_input.ntile, plot_input.pct_ref, linestyle = 'dashed', label = "overall response (%s)" % classes[0], color = colors[0])
+        ax3.plot(plot_input.ntile, plot_input.pct, label = classes[0], color = _COLORS[0])
+        ax3.plot(plot_input.ntile, plot_input.pct_ref, linestyle = 'dashed', label = "overall response (%s)" % classes[0], color = _COLORS[0])
         ax3.legend(loc = 'upper right', shadow = False, frameon = False)
-        ax4.plot(plot_input.ntile, plot_input.cumpct, label = classes[0], color = colors[0])
-        ax4.plot(plot_input.ntile, plot_input.pct_ref, linestyle = 'dashed', label = "overall response (%s)" % classes[0], color = colors[0])
+        ax4.plot(plot_input.ntile, plot_input.cumpct, label = classes[0], color = _COLORS[0])
+        ax4.plot(plot_input.ntile, plot_input.pct_ref, linestyle = 'dashed', label = "overall response (%s)" % classes[0], color = _COLORS[0])
         ax4.legend(loc = 'upper right', shadow = False, frameon = False)
     elif scope == "compare_datasets":
         title = "scope: comparing datasets & model: %s & target class: %s" % (models[0], classes[0])
+        series = _split_series(plot_input, 'dataset_label')
         for col, i in enumerate(datasets):
-            ax1.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.cumgain[plot_input.dataset_label == i], label = i, color = colors[col])
-            ax1.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.gain_opt[plot_input.dataset_label == i], linestyle = 'dashed', label = "optimal gains (%s)" % i, color = colors[col])
-            ax2.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.cumlift[plot_input.dataset_label == i], label = i, color = colors[col])
-            ax3.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.pct[plot_input.dataset_label == i], label = i, color = colors[col])
-            ax3.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.pct_ref[plot_input.dataset_label == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
-            ax4.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.cumpct[plot_input.dataset_label == i], label = i, color = colors[col])
-            ax4.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.pct_ref[plot_input.dataset_label == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
+            ax1.plot(series[i].ntile, series[i].cumgain, label = i, color = _COLORS[col])
+            ax1.plot(series[i].ntile, series[i].gain_opt, linestyle = 'dashed', label = "optimal gains (%s)" % i, color = _COLORS[col])
+            ax2.plot(series[i].ntile, series[i].cumlift, label = i, color = _COLORS[col])
+            ax3.plot(series[i].ntile, series[i].pct, label = i, color = _COLORS[col])
+            ax3.plot(series[i].ntile, series[i].pct_ref, linestyle = 'dashed', label = "overall response (%s)" % i, color = _COLORS[col])
+            ax4.plot(series[i].ntile, series[i].cumpct, label = i, color = _COLORS[col])
+            ax4.plot(series[i].ntile, series[i].pct_ref, linestyle = 'dashed', label = "overall response (%s)" % i, color = _COLORS[col])
         ax1.legend(loc = 'lower right', shadow = False, frameon = False)
         ax2.legend(loc = 'upper right', shadow = False, frameon = False)
         ax3.legend(loc = 'upper right', shadow = False, frameon = False)
         ax4.legend(loc = 'upper right', shadow = False, frameon = False)        
     elif scope == "compare_models":
         title = "scope: comparing models & dataset: %s & target class: %s" % (datasets[0], classes[0])
+        series = _split_series(plot_input, 'model_label')
         for col, i in enumerate(models):
-            ax1.plot(plot_input.ntile[plot_input.model_label == i], plot_input.cumgain[plot_input.model_label == i], label = i, color = colors[col])
-            ax1.plot(plot_input.ntile[plot_input.model_label == i], plot_input.gain_opt[plot_input.model_label == i], linestyle = 'dashed', label = "optimal gains (%s)" % i, color = colors[col])
-            ax2.plot(plot_input.ntile[plot_input.model_label == i], plot_input.cumlift[plot_input.model_label == i], label = i, color = colors[col])
-            ax3.plot(plot_input.ntile[plot_input.model_label == i], plot_input.pct[plot_input.model_label == i], label = i, color = colors[col])
-            ax3.plot(plot_input.ntile[plot_input.model_label == i], plot_input.pct_ref[plot_input.model_label == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
-            ax4.plot(plot_input.ntile[plot_input.model_label == i], plot_input.cumpct[plot_input.model_label == i], label = i, color = colors[col])
-            ax4.plot(plot_input.ntile[plot_input.model_label == i], plot_input.pct_ref[plot_input.model_label == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])            
+            ax1.plot(series[i].ntile, series[i].cumgain, label = i, color = _COLORS[col])
+            ax1.plot(series[i].ntile, series[i].gain_opt, linestyle = 'dashed', label = "optimal gains (%s)" % i, color = _COLORS[col])
+            ax2.plot(series[i].ntile, series[i].cumlift, label = i, color = _COLORS[col])
+            ax3.plot(series[i].ntile, series[i].pct, label = i, color = _COLORS[col])
+            ax3.plot(series[i].ntile, series[i].pct_ref, linestyle = 'dashed', label = "overall response (%s)" % i, color = _COLORS[col])
+            ax4.plot(series[i].ntile, series[i].cumpct, label = i, color = _COLORS[col])
+            ax4.plot(series[i].ntile, series[i].pct_ref, linestyle = 'dashed', label = "overall response (%s)" % i, color = _COLORS[col])            
         ax1.legend(loc = 'lower right', shadow = False, frameon = False)
         ax2.legend(loc = 'upper right', shadow = False, frameon = False)
         ax3.legend(loc = 'upper right', shadow = False, frameon = False)
         ax4.legend(loc = 'upper right', shadow = False, frameon = False)
     else: #compare_targetclasses
         title = "scope: comparing target classes & dataset: %s & model: %s" % (datasets[0], models[0])
+        series = _split_series(plot_input, 'target_class')
         for col, i in enumerate(classes):
-            ax1.plot(plot_input.ntile[plot_input.target_class == i], plot_input.cumgain[plot_input.target_class == i], label = i, color = colors[col])
-            ax1.plot(plot_input.ntile[plot_input.target_class == i], plot_input.gain_opt[plot_input.target_class == i], linestyle = 'dashed', label = "optimal gains (%s)" % i, color = colors[col])
-            ax2.plot(plot_input.ntile[plot_input.target_class == i], plot_input.cumlift[plot_input.target_class == i], label = i, color = colors[col])
-            ax3.plot(plot_input.ntile[plot_input.target_class == i], plot_input.pct[plot_input.target_class == i], label = i, color = colors[col])
-            ax3.plot(plot_input.ntile[plot_input.target_class == i], plot_input.pct_ref[plot_input.target_class == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
-            ax4.plot(plot_input.ntile[plot_input.target_class == i], plot_input.cumpct[plot_input.target_class == i], label = i, color = colors[col])
-            ax4.plot(plot_input.ntile[plot_input.target_class == i], plot_input.pct_ref[plot_input.target_class == i], linestyle = 'dashed', label = "overall response (%s)" % i, color = colors[col])
+            ax1.plot(series[i].ntile, series[i].cumgain, label = i, color = _COLORS[col])
+            ax1.plot(series[i].ntile, series[i].gain_opt, linestyle = 'dashed', label = "optimal gains (%s)" % i, color = _COLORS[col])
+            ax2.plot(series[i].ntile, series[i].cumlift, label = i, color = _COLORS[col])
+            ax3.plot(series[i].ntile, series[i].pct, label = i, color = _COLORS[col])
+            ax3.plot(series[i].ntile, series[i].pct_ref, linestyle = 'dashed', label = "overall response (%s)" % i, color = _COLORS[col])
+            ax4.plot(series[i].ntile, series[i].cumpct, label = i, color = _COLORS[col])
+            ax4.plot(series[i].ntile, series[i].pct_ref, linestyle = 'dashed', label = "overall response (%s)" % i, color = _COLORS[col])
         ax1.legend(loc = 'lower right', shadow = False, frameon = False)
         ax2.legend(loc = 'upper right', shadow = False, frameon = False)
         ax3.legend(loc = 'upper right', shadow = False, frameon = False)
         ax4.legend(loc = 'upper right', shadow = False, frameon = False)
-    plt.suptitle(title, fontsize = 16)
-    if save_fig == True:
-        if not save_fig_filename:
-            location = '%s/Plot all.png' % os.getcwd()
-            plt.savefig(location, dpi = 300)
-            print("The plot all plot is saved in %s" % location)
-        else:
-            plt.savefig(save_fig_filename, dpi = 300)
-            print("The plot all plot is saved in %s" % save_fig_filename)
-        plt.show()
-        plt.gcf().clear()
-    plt.show()
-    return ax1
+    fig.suptitle(title, fontsize = 16)
+    return _finish_plot(fig, ax1, save_fig, save_fig_filename, 'Plot all.png', 'plot all', headless, save_fig_format, save_fig_dpi, save_fig_async)
 
-def plot_costsrevs(plot_input, fixed_costs, variable_costs_per_unit, profit_per_unit, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text'):
+def plot_costsrevs(plot_input, fixed_costs, variable_costs_per_unit, profit_per_unit, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text',
+                   headless = False, save_fig_format = None, save_fig_dpi = 300, save_fig_async = False):
     """ Plotting costs / revenue curve
     
     Parameters
@@ -889,164 +465,52 @@ def plot_costsrevs(plot_input, fixed_costs, variable_costs_per_unit, profit_per_
         
     highlight_how : str, plot_text default
         Highlight_how specifies where information about the model performance is printed. It can be shown as text, on the plot or both.
-    
+
+    headless : bool, default False
+        Render the plot on an Agg canvas of its own instead of a pyplot figure: the plot is never shown and the figure is not
+        kept by pyplot, it is freed together with the returned axes. For batch jobs and for threads that render at the same time.
+
+    save_fig_format : str, default None
+        The file format of the saved plot, for example png, svg or pdf. By default it follows the extension of save_fig_filename
+        and it is png if no save_fig_filename is specified. It must match the extension of save_fig_filename if that names a format.
+
+    save_fig_dpi : int, default 300
+        The resolution of the saved plot in dots per inch. A low value gives small and quickly written png previews.
+
+    save_fig_async : bool, default False
+        Save the plot on a background thread and return at once. The plot is rendered headless and a concurrent.futures.Future
+        is returned instead of the axes, it gives the axes when the file is written. When many plots wait to be written,
+        the next plot waits for the oldest one.
+
     Returns
     -------
     It returns a matplotlib.axes._subplots.AxesSubplot object that can be transformed into the same plot with the .figure command.
     The plot is by default written to disk (save_fig = True). The location and filetype of the file depend on the save_fig_filename parameter.
     If the save_fig_filename parameter is empty (not specified), the plot will be written to the working directory as png. 
-    Otherwise the location and file type is specified by the user.
+    Otherwise the location and file type is specified by the user. With save_fig_async a future of the axes is returned.
         
     Raises
     ------
     TypeError: If `highlight_ntile` is not specified as an int.
-    ValueError: If the wrong `highlight_how` value is specified.
+    ValueError: If the wrong `highlight_how` value is specified or `save_fig_format` does not match the extension of `save_fig_filename`.
     """
-    
-    models   = plot_input.model_label.unique().tolist()
-    datasets = plot_input.dataset_label.unique().tolist()
-    classes  = plot_input.target_class.unique().tolist()
-    scope = plot_input.scope.unique()[0]
-    ntiles = plot_input.ntile.nunique() - 1
-    colors = ("#E41A1C", "#377EB8", "#4DAF4A", "#984EA3", "#FF7F00", "#FFFF33", "#A65628", "#F781BF", "#999999")
+    # the costs and revenues are added to a copy, so threads can plot the same plot_input with other costs
+    plot_input = plot_input.copy()
     plot_input['variable_costs'] = variable_costs_per_unit * plot_input.cumtot
     plot_input['investments'] = fixed_costs + plot_input.variable_costs 
     plot_input['revenues'] = profit_per_unit * plot_input.cumpos
-    
-    if ntiles == 10:
-        description_label = 'decile'
-    elif ntiles == 100:
-        description_label = 'percentile'
-    else:
-        description_label = 'ntile'
-    
-    if ntiles <= 20:
-        xlabper = 1
-    elif ntiles <= 40:
-        xlabper = 2
-    else:
-        xlabper = 5
-    
-    fig, ax = plt.subplots(figsize = (12,7))
-    ax.set_xlabel(description_label)
-    ax.set_ylabel("costs / revenue")
-    plt.suptitle('Costs / Revenues', fontsize = 16)
-    #ax.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
-    ax.set_xticks(np.arange(0, ntiles + 1, xlabper))
-    #ax.set_xticks(np.arange(1, ntiles + 1, 1))
-    ax.spines['right'].set_visible(False)
-    ax.spines['top'].set_visible(False)
-    ax.yaxis.set_ticks_position('left')
-    ax.xaxis.set_ticks_position('bottom')
-    ax.grid(True)
-    ax.set_xlim([1, ntiles])
-    #ax.set_ylim([0, 1])
-    
-    if scope == "no_comparison":
-        ax.set_title("model: %s & dataset: %s & target class: %s" % (models[0], datasets[0], classes[0]), fontweight = 'bold')
-        ax.plot(plot_input.ntile, plot_input.revenues, label = classes[0], color = colors[0])
-        ax.plot(plot_input.ntile, plot_input.investments, linestyle = 'dashed', label = "total costs", color = colors[0])
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
-    elif scope == "compare_datasets":
-        for col, i in enumerate(datasets):
-            ax.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.revenues[plot_input.dataset_label == i], label = i, color = colors[col])
-            ax.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.investments[plot_input.dataset_label == i], linestyle = 'dashed', label = "total costs (%s)" % i, color = colors[col])
-        ax.set_title("scope: comparing datasets & model: %s & target class: %s" % (models[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    elif scope == "compare_models":
-        ax.plot(list(range(0, ntiles + 1, 1)), fixed_costs + variable_costs_per_unit * plot_input.cumtot.unique(), linestyle = 'dashed', label = "total costs", color = 'grey')
-        for col, i in enumerate(models):
-            ax.plot(plot_input.ntile[plot_input.model_label == i], plot_input.revenues[plot_input.model_label == i], label = "revenues (%s)" % i, color = colors[col])
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
-        ax.set_title("scope: comparing models & dataset: %s & target class: %s" % (datasets[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
-    else: #compare_targetclasses
-        for col, i in enumerate(classes):
-            ax.plot(plot_input.ntile[plot_input.target_class == i], plot_input.revenues[plot_input.target_class == i], label = i, color = colors[col])
-            ax.plot(plot_input.ntile[plot_input.target_class == i], plot_input.investments[plot_input.target_class == i], linestyle = 'dashed', label = "total costs (%s)" % i, color = colors[col])
-        ax.set_title("Scope: comparing target classes & dataset: %s & model: %s" % (datasets[0], models[0]), fontweight = 'bold')
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
-    
-    if highlight_ntile != False:
-        
-        if highlight_ntile not in np.linspace(1, ntiles, num = ntiles).tolist():
-            raise TypeError('Invalid value for highlight_ntile parameter. It must be an int value between 1 and %d' % (ntiles))
-            
-        if highlight_how not in ('plot','text','plot_text'):
-            raise ValueError('Invalid highlight_how value, it must be one of the following: plot, text or plot_text.')
-        
-        else:
-            text = ''
-            if scope == "no_comparison":
-                cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, 'revenues'].tolist()
-                plt.plot([1, highlight_ntile], [cumpct[0]] * 2, linestyle = '-.', color = colors[0], lw = 1.5)
-                plt.plot([highlight_ntile] * 2 , [0] + [cumpct[0]], linestyle = '-.', color = colors[0], lw = 1.5)
-                xy = tuple([highlight_ntile] + [cumpct[0]])
-                ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[0])
-                ax.annotate("€" + str(int(cumpct[0])), xy = xy, xytext = (-30, -30), 
-                         textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                         bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[0]), #fc = 'yellow', alpha = 0.3),
-                         arrowprops = dict(arrowstyle = '->', color = 'black'))
-                text += 'When we select %s 1 until %d from model %s in dataset %s the percentage of %s cases in the revenue is %d' % (description_label, highlight_ntile, models[0], datasets[0], classes[0], int(cumpct[0])) + '.\n'
-            elif scope == "compare_datasets":
-                for col, i in enumerate(datasets):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['dataset_label', 'revenues']]
-                    cumpct = cumpct.revenues[cumpct.dataset_label == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate("€" + str(int(cumpct[0])), xy = xy, xytext = (-30, -30), 
-                             textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[col]), #fc = 'yellow', alpha = 0.3),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %s 1 until %d from model %s in dataset %s the percentage of %s cases in the revenue is %d' % (description_label, highlight_ntile, models[0], datasets[col], classes[0], int(cumpct[0])) + '.\n'
-            elif scope == "compare_models":
-                for col, i in enumerate(models):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['model_label', 'revenues']]
-                    cumpct = cumpct.revenues[cumpct.model_label == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate("€" + str(int(cumpct[0])), xy = xy, xytext = (-30, -30), 
-                             textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[col]), #fc = 'yellow', alpha = 0.3),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %s 1 until %d from model %s in dataset %s the percentage of %s cases in the revenue is %d' % (description_label, highlight_ntile, models[col], datasets[0], classes[0], int(cumpct[0])) + '.\n'
-            else: # compare targetvalues
-                for col, i in enumerate(classes):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['target_class', 'revenues']]
-                    cumpct = cumpct.revenues[cumpct.target_class == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate("€" + str(int(cumpct[0])), xy = xy, xytext = (-30, -30), 
-                             textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[col]), #fc = 'yellow', alpha = 0.3),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %s 1 until %d from model %s in dataset %s the percentage of %s cases in the revenue is %d' % (description_label, highlight_ntile, models[0], datasets[0], classes[col], int(cumpct[0])) + '.\n'
-            if highlight_how in ('text', 'plot_text'):
-                print(text[:-1])
-            if highlight_how in ('plot', 'plot_text'):
-                fig.text(.15, -0.001, text[:-1], ha='left')
-    
-    if save_fig == True:
-        if not save_fig_filename:
-            location = '%s/Costs Revenues plot.png' % os.getcwd()
-            plt.savefig(location, dpi = 300)
-            print("The costs / revenues plot is saved in %s" % location)
-        else:
-            plt.savefig(save_fig_filename, dpi = 300)
-            print("The costs / revenues plot is saved in %s" % save_fig_filename)
-        plt.show()
-        plt.gcf().clear()
-    plt.show()
-    return ax
-
-
-def plot_profit(plot_input, fixed_costs, variable_costs_per_unit, profit_per_unit, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text'):
+    # comparing models on one dataset, the models share the costs of every ntile
+    shared = plot_input.scope.iat[0] == 'compare_models'
+    return _plot_curves(plot_input, 'revenues', 'costs / revenue', 'Costs / Revenues', save_fig, save_fig_filename, highlight_ntile, highlight_how,
+                        reference = None if shared else ('investments', 'total costs (%s)'), shared_reference = ('investments', 'total costs') if shared else None,
+                        percent = False, legend = 'lower right', legend_compare_datasets = 'upper right', compare_models_label = 'revenues (%s)',
+                        text = 'When we select %(description)s 1 until %(ntile)d from model %(model)s in dataset %(dataset)s the percentage of %(target_class)s cases in the revenue is %(amount)d.',
+                        headless = headless, save_fig_format = save_fig_format, save_fig_dpi = save_fig_dpi, save_fig_async = save_fig_async,
+                        name = 'costs / revenues', filename = 'Costs Revenues plot.png')
+
+
+def plot_profit(plot_input, fixed_costs, variable_costs_per_unit, profit_per_unit, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text',
+                headless = False, save_fig_format = None, save_fig_dpi = 300, save_fig_async = False):
     """ Plotting profit curve
     
     Parameters
@@ -1075,165 +539,49 @@ def plot_profit(plot_input, fixed_costs, variable_costs_per_unit, profit_per_uni
         
     highlight_how : str, plot_text default
         Highlight_how specifies where information about the model performance is printed. It can be shown as text, on the plot or both.
-    
+
+    headless : bool, default False
+        Render the plot on an Agg canvas of its own instead of a pyplot figure: the plot is never shown and the figure is not
+        kept by pyplot, it is freed together with the returned axes. For batch jobs and for threads that render at the same time.
+
+    save_fig_format : str, default None
+        The file format of the saved plot, for example png, svg or pdf. By default it follows the extension of save_fig_filename
+        and it is png if no save_fig_filename is specified. It must match the extension of save_fig_filename if that names a format.
+
+    save_fig_dpi : int, default 300
+        The resolution of the saved plot in dots per inch. A low value gives small and quickly written png previews.
+
+    save_fig_async : bool, default False
+        Save the plot on a background thread and return at once. The plot is rendered headless and a concurrent.futures.Future
+        is returned instead of the axes, it gives the axes when the file is written. When many plots wait to be written,
+        the next plot waits for the oldest one.
+
     Returns
     -------
     It returns a matplotlib.axes._subplots.AxesSubplot object that can be transformed into the same plot with the .figure command.
     The plot is by default written to disk (save_fig = True). The location and filetype of the file depend on the save_fig_filename parameter.
     If the save_fig_filename parameter is empty (not specified), the plot will be written to the working directory as png. 
-    Otherwise the location and file type is specified by the user.
+    Otherwise the location and file type is specified by the user. With save_fig_async a future of the axes is returned.
         
     Raises
     ------
     TypeError: If `highlight_ntile` is not specified as an int.
-    ValueError: If the wrong `highlight_how` value is specified.
+    ValueError: If the wrong `highlight_how` value is specified or `save_fig_format` does not match the extension of `save_fig_filename`.
     """
-    
-    models   = plot_input.model_label.unique().tolist()
-    datasets = plot_input.dataset_label.unique().tolist()
-    classes  = plot_input.target_class.unique().tolist()
-    scope = plot_input.scope.unique()[0]
-    ntiles = plot_input.ntile.nunique() - 1
-    colors = ("#E41A1C", "#377EB8", "#4DAF4A", "#984EA3", "#FF7F00", "#FFFF33", "#A65628", "#F781BF", "#999999")
-    
+    # the costs and revenues are added to a copy, so threads can plot the same plot_input with other costs
+    plot_input = plot_input.copy()
     plot_input['variable_costs'] = variable_costs_per_unit * plot_input.cumtot
     plot_input['investments'] = fixed_costs + plot_input.variable_costs 
     plot_input['revenues'] = profit_per_unit * plot_input.cumpos
     plot_input['profit'] = plot_input.revenues - plot_input.investments
-    
-    if ntiles == 10:
-        description_label = 'decile'
-    elif ntiles == 100:
-        description_label = 'percentile'
-    else:
-        description_label = 'ntile'
-    
-    if ntiles <= 20:
-        xlabper = 1
-    elif ntiles <= 40:
-        xlabper = 2
-    else:
-        xlabper = 5
-    
-    fig, ax = plt.subplots(figsize = (12,7))
-    ax.set_xlabel(description_label)
-    ax.set_ylabel("profit")
-    plt.suptitle('Profit', fontsize = 16)
-    #ax.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
-    ax.set_xticks(np.arange(0, ntiles + 1, xlabper))
-    #ax.set_xticks(np.arange(1, ntiles + 1, 1))
-    ax.spines['right'].set_visible(False)
-    ax.spines['top'].set_visible(False)
-    ax.yaxis.set_ticks_position('left')
-    ax.xaxis.set_ticks_position('bottom')
-    ax.grid(True)
-    ax.set_xlim([1, ntiles])
-    ax.plot(list(range(1, ntiles + 1, 1)), [0] * ntiles, linestyle = 'dashed', label = "break even", color = 'grey')
-
-    if scope == "no_comparison":
-        #ax.plot(list(range(0, ntiles + 1, 1)), fixed_costs + variable_costs_per_unit * plot_input.cumtot.unique(), linestyle = 'dashed', label = "total costs", color = 'grey')
-        ax.set_title("model: %s & dataset: %s & target class: %s" % (models[0], datasets[0], classes[0]), fontweight = 'bold')
-        ax.plot(plot_input.ntile, plot_input.profit, label = classes[0], color = colors[0])
-        #ax.plot(plot_input.ntile, plot_input.cumcosts, linestyle = 'dashed', label = "total costs", color = colors[0])
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
-    elif scope == "compare_datasets":
-        for col, i in enumerate(datasets):
-            ax.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.profit[plot_input.dataset_label == i], label = i, color = colors[col])
-            #ax.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.cumcosts[plot_input.dataset_label == i], linestyle = 'dashed', label = "total costs (%s)" % i, color = colors[col])
-        ax.set_title("scope: comparing datasets & model: %s & target class: %s" % (models[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
-    elif scope == "compare_models":
-        for col, i in enumerate(models):
-            ax.plot(plot_input.ntile[plot_input.model_label == i], plot_input.profit[plot_input.model_label == i], label = "profit (%s)" % i, color = colors[col])
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
-        ax.set_title("scope: comparing models & dataset: %s & target class: %s" % (datasets[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
-    else: #compare_targetclasses
-        for col, i in enumerate(classes):
-            ax.plot(plot_input.ntile[plot_input.target_class == i], plot_input.profit[plot_input.target_class == i], label = i, color = colors[col])
-            #ax.plot(plot_input.ntile[plot_input.target_class == i], plot_input.cumcosts[plot_input.target_class == i], linestyle = 'dashed', label = "total costs (%s)" % i, color = colors[col])
-        ax.set_title("Scope: comparing target classes & dataset: %s & model: %s" % (datasets[0], models[0]), fontweight = 'bold')
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
-    
-    if highlight_ntile != False:
-        
-        if highlight_ntile not in np.linspace(1, ntiles, num = ntiles).tolist():
-            raise TypeError('Invalid value for highlight_ntile parameter. It must be an int value between 1 and %d' % (ntiles))
-            
-        if highlight_how not in ('plot','text','plot_text'):
-            raise ValueError('Invalid highlight_how value, it must be one of the following: plot, text or plot_text.')
-            
-        else:
-            text = ''
-            if scope == "no_comparison":
-                cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, 'profit'].tolist()
-                plt.plot([1, highlight_ntile], [cumpct[0]] * 2, linestyle = '-.', color = colors[0], lw = 1.5)
-                plt.plot([highlight_ntile] * 2 , [0] + [cumpct[0]], linestyle = '-.', color = colors[0], lw = 1.5)
-                xy = tuple([highlight_ntile] + [cumpct[0]])
-                ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[0])
-                ax.annotate("€" + str(int(cumpct[0])), xy = xy, xytext = (-30, -30), 
-                         textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                         bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[0]), #fc = 'yellow', alpha = 0.3),
-                         arrowprops = dict(arrowstyle = '->', color = 'black'))
-                text += 'When we select %s 1 until %d from model %s in dataset %s the percentage of %s cases in the expected profit is %d' % (description_label, highlight_ntile, models[0], datasets[0], classes[0], int(cumpct[0])) + '.\n'
-            elif scope == "compare_datasets":
-                for col, i in enumerate(datasets):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['dataset_label', 'profit']]
-                    cumpct = cumpct.profit[cumpct.dataset_label == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate("€" + str(int(cumpct[0])), xy = xy, xytext = (-30, -30), 
-                             textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[col]), #fc = 'yellow', alpha = 0.3),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %s 1 until %d from model %s in dataset %s the percentage of %s cases in the expected profit is %d' % (description_label, highlight_ntile, models[0], datasets[col], classes[0], int(cumpct[0])) + '.\n'
-            elif scope == "compare_models":
-                for col, i in enumerate(models):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['model_label', 'profit']]
-                    cumpct = cumpct.profit[cumpct.model_label == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate("€" + str(int(cumpct[0])), xy = xy, xytext = (-30, -30), 
-                             textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[col]), #fc = 'yellow', alpha = 0.3),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %s 1 until %d from model %s in dataset %s the percentage of %s cases in the expected profit is %d' % (description_label, highlight_ntile, models[col], datasets[0], classes[0], int(cumpct[0])) + '.\n'
-            else: # compare targetvalues
-                for col, i in enumerate(classes):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['target_class', 'profit']]
-                    cumpct = cumpct.profit[cumpct.target_class == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate("€" + str(int(cumpct[0])), xy = xy, xytext = (-30, -30), 
-                             textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[col]), #fc = 'yellow', alpha = 0.3),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %s 1 until %d from model %s in dataset %s the percentage of %s cases in the expected profit is %d' % (description_label, highlight_ntile, models[0], datasets[0], classes[col], int(cumpct[0])) + '.\n'
-            if highlight_how in ('text', 'plot_text'):
-                print(text[:-1])
-            if highlight_how in ('plot', 'plot_text'):
-                fig.text(.15, -0.001, text[:-1], ha='left')
-    
-    if save_fig == True:
-        if not save_fig_filename:
-            location = '%s/Profit plot.png' % os.getcwd()
-            plt.savefig(location, dpi = 300)
-            print("The profit plot is saved in %s" % location)
-        else:
-            plt.savefig(save_fig_filename, dpi = 300)
-            print("The profit plot is saved in %s" % save_fig_filename)
-        plt.show()
-        plt.gcf().clear()
-    plt.show()
-    return ax
-
-def plot_roi(plot_input, fixed_costs, variable_costs_per_unit, profit_per_unit, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text'):
+    return _plot_curves(plot_input, 'profit', 'profit', 'Profit', save_fig, save_fig_filename, highlight_ntile, highlight_how,
+                        baseline = (0, 'break even'), percent = False, legend = 'lower right', legend_compare_datasets = 'upper right', compare_models_label = 'profit (%s)',
+                        text = 'When we select %(description)s 1 until %(ntile)d from model %(model)s in dataset %(dataset)s the percentage of %(target_class)s cases in the expected profit is %(amount)d.',
+                        headless = headless, save_fig_format = save_fig_format, save_fig_dpi = save_fig_dpi, save_fig_async = save_fig_async,
+                        name = 'profit', filename = 'Profit plot.png')
+
+def plot_roi(plot_input, fixed_costs, variable_costs_per_unit, profit_per_unit, save_fig = True, save_fig_filename = '', highlight_ntile = False, highlight_how = 'plot_text',
+             headless = False, save_fig_format = None, save_fig_dpi = 300, save_fig_async = False):
     """ Plotting ROI curve
     
     Parameters
@@ -1262,166 +610,507 @@ def plot_roi(plot_input, fixed_costs, variable_costs_per_unit, profit_per_unit,
         
     highlight_how : str, plot_text default
         Highlight_how specifies where information about the model performance is printed. It can be shown as text, on the plot or both.
-    
+
+    headless : bool, default False
+        Render the plot on an Agg canvas of its own instead of a pyplot figure: the plot is never shown and the figure is not
+        kept by pyplot, it is freed together with the returned axes. For batch jobs and for threads that render at the same time.
+
+    save_fig_format : str, default None
+        The file format of the saved plot, for example png, svg or pdf. By default it follows the extension of save_fig_filename
+        and it is png if no save_fig_filename is specified. It must match the extension of save_fig_filename if that names a format.
+
+    save_fig_dpi : int, default 300
+        The resolution of the saved plot in dots per inch. A low value gives small and quickly written png previews.
+
+    save_fig_async : bool, default False
+        Save the plot on a background thread and return at once. The plot is rendered headless and a concurrent.futures.Future
+        is returned instead of the axes, it gives the axes when the file is written. When many plots wait to be written,
+        the next plot waits for the oldest one.
+
     Returns
     -------
     It returns a matplotlib.axes._subplots.AxesSubplot object that can be transformed into the same plot with the .figure command.
     The plot is by default written to disk (save_fig = True). The location and filetype of the file depend on the save_fig_filename parameter.
     If the save_fig_filename parameter is empty (not specified), the plot will be written to the working directory as png. 
-    Otherwise the location and file type is specified by the user.
+    Otherwise the location and file type is specified by the user. With save_fig_async a future of the axes is returned.
         
     Raises
     ------
     TypeError: If `highlight_ntile` is not specified as an int.
-    ValueError: If the wrong `highlight_how` value is specified.
+    ValueError: If the wrong `highlight_how` value is specified or `save_fig_format` does not match the extension of `save_fig_filename`.
+    """
+    # the costs and revenues are added to a copy, so threads can plot the same plot_input with other costs
+    plot_input = plot_input.copy()
+    plot_input['variable_costs'] = variable_costs_per_unit * plot_input.cumtot
+    plot_input['investments'] = fixed_costs + plot_input.variable_costs 
+    plot_input['revenues'] = profit_per_unit * plot_input.cumpos
+    plot_input['profit'] = plot_input.revenues - plot_input.investments
+    plot_input['roi'] = plot_input.profit / plot_input.investments
+    
+    plot_input['variable_costs_tot'] = variable_costs_per_unit * plot_input.tottot
+    plot_input['investments_tot'] = fixed_costs + plot_input.variable_costs_tot
+    plot_input['revenues_tot'] = profit_per_unit * plot_input.postot
+    plot_input['profit_tot'] = plot_input.revenues_tot - plot_input.investments_tot
+    plot_input['roi_ref'] = plot_input.profit_tot / plot_input.investments_tot
+    return _plot_curves(plot_input, 'roi', '% roi', 'Return on Investment (ROI)', save_fig, save_fig_filename, highlight_ntile, highlight_how,
+                        baseline = (0, 'break even'), legend = 'lower right', legend_compare_datasets = 'upper right', compare_models_label = 'roi (%s)',
+                        text = 'When we select %(description)s 1 until %(ntile)d from model %(model)s in dataset %(dataset)s the percentage of %(target_class)s cases in the expected return on investment is %(percent)d%%.',
+                        headless = headless, save_fig_format = save_fig_format, save_fig_dpi = save_fig_dpi, save_fig_async = save_fig_async,
+                        name = 'roi', filename = 'ROI plot.png')
+
+_COLORS = ("#E41A1C", "#377EB8", "#4DAF4A", "#984EA3", "#FF7F00", "#FFFF33", "#A65628", "#F781BF", "#999999")
+
+_PLOTS = dict((plot.__name__, plot) for plot in (plot_response, plot_cumresponse, plot_cumlift, plot_cumgains, plot_all, plot_costsrevs, plot_profit, plot_roi))
+
+def render_plots(jobs, n_jobs = 1, backend = 'processes', cache = None):
+    """ Render and save a batch of plots in parallel
+
+    Every plot is rendered headless (see plot_response) and written to its file. The workers get only the plot function,
+    its plot_input and arguments and the filename, so only the small aggregate of a scope is sent to a worker process.
+
+    Parameters
+    ----------
+    jobs : list of tuples
+        One (plot, plot_input, kwargs, filename) tuple per plot. plot is a plot function or its name, for example plot_cumgains
+        or 'plot_cumgains', plot_input the result of plotting_scope(), kwargs a dict with the other arguments of the plot function,
+        for example {'highlight_ntile': 2} or the costs and profit of plot_roi(), and filename the path of the file to write.
+        save_fig_format and save_fig_dpi in kwargs set the format and resolution of the file, save_fig_async is ignored.
+
+    n_jobs : int, default 1
+        Number of workers that render the plots, -1 uses all cores. With 1 the plots are rendered one by one in this process.
+
+    backend : str / concurrent.futures.Executor, default 'processes'
+        'processes' renders in a process pool, which runs the rasterisation of the plots on all cores, 'threads' in a thread pool.
+        Or a concurrent.futures.Executor to use, for example a pool that is shared with other work.
+
+    cache : render_cache, default None
+        Copy the plots that are in the cache from the cache, only the other plots are rendered and then added to the cache.
+
+    Returns
+    -------
+    Pandas dataframe with a row per job in the order of the jobs: the `filename`, the seconds spent on building (`render`)
+    and on drawing and writing (`save`) the plot and whether it is copied from the cache (`cached`).
+
+    Raises
+    ------
+    ValueError: If a plot is not one of the plot functions, the wrong `backend` value is specified or the save_fig_format of a job
+    does not match the extension of its filename.
+    """
+    jobs = [(plot if isinstance(plot, str) else getattr(plot, '__name__', None), plot_input, kwargs, filename) for plot, plot_input, kwargs, filename in jobs]
+    for job in jobs:
+        if job[0] not in _PLOTS:
+            raise ValueError('Invalid plot value, it must be one of the following: %s.' % ', '.join(_PLOTS))
+        _check_save_fig_format(job[3], job[2].get('save_fig_format'))
+    results = [None] * len(jobs)
+    if cache is not None:
+        keys = [cache.key(*job) for job in jobs]
+        for position, (job, key) in enumerate(zip(jobs, keys)):
+            start = time.perf_counter()
+            if cache._copy(key, job[3]):
+                results[position] = (job[3], 0.0, time.perf_counter() - start, True)
+    rendered = [(position, job) for position, job in enumerate(jobs) if results[position] is None]
+    for (position, job), result in zip(rendered, _render_jobs([job for position, job in rendered], n_jobs, backend)):
+        results[position] = result + (False, )
+        if cache is not None:
+            cache._store(keys[position], job[3])
+    if cache is not None and rendered:
+        cache._evict()
+    return pd.DataFrame(results, columns = ['filename', 'render', 'save', 'cached'])
+
+def _render_jobs(jobs, n_jobs, backend):
+    # the (filename, render seconds, save seconds) of every job, rendered in this process or by n_jobs workers of the backend
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+    if n_jobs == 1 or len(jobs) <= 1:
+        results = [_render_job(*job) for job in jobs]
+    else:
+        executor, shutdown = _executor(backend, n_jobs)
+        try:
+            # a few chunks per worker, so a large batch does not take a round trip per plot
+            results = list(executor.map(_render_job, *zip(*jobs), chunksize = max(1, len(jobs) // (4 * n_jobs))))
+        finally:
+            if shutdown:
+                executor.shutdown()
+    return results
+
+def _executor(backend, n_jobs):
+    # the executor of a backend with n_jobs workers and whether the caller has to shut it down
+    if isinstance(backend, concurrent.futures.Executor):
+        return backend, False
+    if backend == 'threads':
+        return concurrent.futures.ThreadPoolExecutor(n_jobs), True
+    if backend == 'processes':
+        return concurrent.futures.ProcessPoolExecutor(n_jobs), True
+    raise ValueError('Invalid backend value, it must be one of the following: threads, processes or a concurrent.futures.Executor.')
+
+def _render_job(plot, plot_input, kwargs, filename):
+    # renders one plot of render_plots() headless and writes it, returns the filename and the seconds of rendering and saving
+    start = time.perf_counter()
+    kwargs = dict(kwargs, save_fig = False, headless = True, save_fig_async = False)
+    format, dpi = kwargs.pop('save_fig_format', None), kwargs.pop('save_fig_dpi', 300)
+    ax = _PLOTS[plot](plot_input, **kwargs)
+    rendered = time.perf_counter()
+    _save_figure(ax.figure, filename, format, dpi)
+    return filename, rendered - start, time.perf_counter() - rendered
+
+class render_cache(object):
+    """ Cache of rendered plots on disk
+
+    A plot is stored under a hash of everything it depends on: the plot function, the values of plot_input, the other arguments
+    of the plot function (highlight_ntile, highlight_how, the costs and profit of the financial plots), the file format and
+    the matplotlib version. A plot that is rendered again with the same input is copied from the cache by render_plots()
+    and plot_report(), without rendering and rasterising it. When the cached plots take more than `max_size` bytes the least
+    recently used plots are removed. Clear the cache after upgrading modelplotpy, the plots may have changed.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the cached plots, it is created when it does not exist. It can be shared by processes and runs.
+
+    max_size : int, default 1000000000
+        The maximum number of bytes of all cached plots.
     """
-    
-    models   = plot_input.model_label.unique().tolist()
-    datasets = plot_input.dataset_label.unique().tolist()
-    classes  = plot_input.target_class.unique().tolist()
-    scope = plot_input.scope.unique()[0]
-    ntiles = plot_input.ntile.nunique() - 1
-    colors = ("#E41A1C", "#377EB8", "#4DAF4A", "#984EA3", "#FF7F00", "#FFFF33", "#A65628", "#F781BF", "#999999")
-    
-    plot_input['variable_costs'] = variable_costs_per_unit * plot_input.cumtot
-    plot_input['investments'] = fixed_costs + plot_input.variable_costs 
-    plot_input['revenues'] = profit_per_unit * plot_input.cumpos
-    plot_input['profit'] = plot_input.revenues - plot_input.investments
-    plot_input['roi'] = plot_input.profit / plot_input.investments
-    
-    plot_input['variable_costs_tot'] = variable_costs_per_unit * plot_input.tottot
-    plot_input['investments_tot'] = fixed_costs + plot_input.variable_costs_tot
-    plot_input['revenues_tot'] = profit_per_unit * plot_input.postot
-    plot_input['profit_tot'] = plot_input.revenues_tot - plot_input.investments_tot
-    plot_input['roi_ref'] = plot_input.profit_tot / plot_input.investments_tot
-    
+
+    def __init__(self, directory, max_size = 1000000000):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, plot, plot_input, kwargs, filename):
+        """ The name of a plot in the cache: the hash of the plot function, the values of plot_input and kwargs, with the extension of filename """
+        extension = '.%s' % kwargs['save_fig_format'] if kwargs.get('save_fig_format') else os.path.splitext(filename)[1].lower() or '.png'
+        digest = hashlib.sha256()
+        digest.update(repr((plot if isinstance(plot, str) else plot.__name__, sorted(kwargs.items()), extension, matplotlib.__version__,
+                            list(plot_input.columns), [str(dtype) for dtype in plot_input.dtypes])).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(plot_input, index = False).to_numpy().tobytes())
+        return digest.hexdigest() + extension
+
+    def render(self, plot, plot_input, kwargs = {}, filename = 'plot.png'):
+        """ Render a plot, or take it from the cache
+
+        Parameters
+        ----------
+        plot : str / function
+            A plot function or its name, for example plot_cumgains or 'plot_cumgains'.
+
+        plot_input : pandas dataframe
+            The result from plotting_scope().
+
+        kwargs : dict
+            The other arguments of the plot function, for example {'highlight_ntile': 2}.
+
+        filename : str, default 'plot.png'
+            Its extension sets the format of the plot, only the file in the cache is written.
+
+        Returns
+        -------
+        The path of the plot in the cache. On a hit matplotlib is not used at all.
+        """
+        _check_save_fig_format(filename, kwargs.get('save_fig_format'))
+        key = self.key(plot, plot_input, kwargs, filename)
+        path = os.path.join(self.directory, key)
+        if self._hit(path):
+            return path
+        handle, rendered = tempfile.mkstemp(suffix = os.path.splitext(key)[1], dir = self.directory, prefix = '.')
+        os.close(handle)
+        try:
+            _render_job(plot if isinstance(plot, str) else plot.__name__, plot_input, kwargs, rendered)
+            os.replace(rendered, path)
+        finally:
+            if os.path.exists(rendered):
+                os.remove(rendered)
+        self._evict()
+        return path
+
+    def cache_info(self):
+        """ Statistics of the cache
+
+        Returns
+        -------
+        Dictionary with the number of cache `hits` and `misses` of this object, the number of cached plots (`files`)
+        and their total number of bytes (`size`).
+        """
+        files = self._files()
+        return {'hits': self.hits, 'misses': self.misses, 'files': len(files), 'size': sum(size for path, size, mtime in files)}
+
+    def clear(self):
+        """ Remove all cached plots """
+        for path, size, mtime in self._files():
+            os.remove(path)
+
+    def _hit(self, path):
+        # counts a hit and marks the plot as recently used if path is cached, otherwise counts a miss
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def _copy(self, key, filename):
+        # copies the cached plot of key to filename, returns False if it is not cached
+        path = os.path.join(self.directory, key)
+        if not self._hit(path):
+            return False
+        shutil.copyfile(path, filename)
+        return True
+
+    def _store(self, key, filename):
+        # adds a copy of the plot in filename to the cache, through a temporary file that is moved into place
+        # so other processes never see half a plot
+        handle, copy = tempfile.mkstemp(suffix = os.path.splitext(key)[1], dir = self.directory, prefix = '.')
+        os.close(handle)
+        shutil.copyfile(filename, copy)
+        os.replace(copy, os.path.join(self.directory, key))
+
+    def _evict(self):
+        # removes the least recently used plots until the cached plots take at most max_size bytes
+        files = sorted(self._files(), key = lambda item: item[2])
+        size = sum(item[1] for item in files)
+        for path, path_size, mtime in files[:-1]:
+            if size <= self.max_size:
+                break
+            os.remove(path)
+            size -= path_size
+
+    def _files(self):
+        # (path, size, modification time) of every cached plot, the temporary files start with a dot
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.startswith('.'):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((os.path.join(self.directory, name), stat.st_size, stat.st_mtime))
+        return files
+
+def _plot_curves(plot_input, column, ylabel, suptitle, save_fig, save_fig_filename, highlight_ntile, highlight_how, text, name, filename,
+                 reference = None, shared_reference = None, baseline = None, percent = True, xmin = 1, ylim = None, legend = 'upper right',
+                 legend_compare_datasets = None, compare_models_label = '%s', confidence_bands = False, headless = False,
+                 save_fig_format = None, save_fig_dpi = 300, save_fig_async = False):
+    # the rendering core of the single axes plots: the curve of `column` for every series of the scope, with an optional dashed
+    # (column, label) reference per series, one grey (column, label) reference shared by all series or a grey (y, label) baseline.
+    # text is the highlight sentence, formatted with the fields of _highlight_fields()
+    columns = ['ntile', column]
+    for extra in (reference, shared_reference):
+        if extra is not None:
+            columns.append(extra[0])
+    if confidence_bands:
+        if column + '_lower' not in plot_input.columns:
+            raise ValueError('plot_input has no confidence bands, use plotting_scope(..., bootstrap = 1000) to add them.')
+        columns.extend([column + '_lower', column + '_upper'])
+    scope, models, datasets, classes, series = _curve_series(plot_input, columns)
+    ntiles = int(round(max(arrays['ntile'].max() for label, description, arrays in series)))
+
     if ntiles == 10:
         description_label = 'decile'
     elif ntiles == 100:
         description_label = 'percentile'
     else:
         description_label = 'ntile'
-    
+
     if ntiles <= 20:
         xlabper = 1
     elif ntiles <= 40:
         xlabper = 2
     else:
         xlabper = 5
-        
-    fig, ax = plt.subplots(figsize = (12,7))
+
+    fig, ax = _new_figure(headless or save_fig_async)
     ax.set_xlabel(description_label)
-    ax.set_ylabel("% roi")
-    plt.suptitle('Return on Investment (ROI)', fontsize = 16)
-    ax.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
+    ax.set_ylabel(ylabel)
+    fig.suptitle(suptitle, fontsize = 16)
+    if percent:
+        ax.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
     ax.set_xticks(np.arange(0, ntiles + 1, xlabper))
     ax.spines['right'].set_visible(False)
     ax.spines['top'].set_visible(False)
     ax.yaxis.set_ticks_position('left')
     ax.xaxis.set_ticks_position('bottom')
     ax.grid(True)
-    ax.set_xlim([1, ntiles])
-    ax.plot(list(range(1, ntiles + 1, 1)), [0] * ntiles, linestyle = 'dashed', label = "break even", color = 'grey')
+    ax.set_xlim([xmin, ntiles])
+    if ylim is not None:
+        ax.set_ylim(ylim)
+    if baseline is not None:
+        ax.plot(list(range(1, ntiles + 1, 1)), [baseline[0]] * ntiles, linestyle = 'dashed', label = baseline[1], color = 'grey')
 
     if scope == "no_comparison":
         ax.set_title("model: %s & dataset: %s & target class: %s" % (models[0], datasets[0], classes[0]), fontweight = 'bold')
-        ax.plot(plot_input.ntile, plot_input.roi, label = classes[0], color = colors[0])
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
     elif scope == "compare_datasets":
-        for col, i in enumerate(datasets):
-            ax.plot(plot_input.ntile[plot_input.dataset_label == i], plot_input.roi[plot_input.dataset_label == i], label = i, color = colors[col])
         ax.set_title("scope: comparing datasets & model: %s & target class: %s" % (models[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'upper right', shadow = False, frameon = False)
+        legend = legend_compare_datasets or legend
     elif scope == "compare_models":
-        for col, i in enumerate(models):
-            ax.plot(plot_input.ntile[plot_input.model_label == i], plot_input.roi[plot_input.model_label == i], label = "roi (%s)" % i, color = colors[col])
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
         ax.set_title("scope: comparing models & dataset: %s & target class: %s" % (datasets[0], classes[0]), fontweight = 'bold')
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
     else: #compare_targetclasses
-        for col, i in enumerate(classes):
-            ax.plot(plot_input.ntile[plot_input.target_class == i], plot_input.roi[plot_input.target_class == i], label = i, color = colors[col])
-        ax.set_title("Scope: comparing target classes & dataset: %s & model: %s" % (datasets[0], models[0]), fontweight = 'bold')
-        ax.legend(loc = 'lower right', shadow = False, frameon = False)
-    
+        ax.set_title("scope: comparing target classes & dataset: %s & model: %s" % (datasets[0], models[0]), fontweight = 'bold')
+    if shared_reference is not None:
+        arrays = series[0][2]
+        ax.plot(arrays['ntile'], arrays[shared_reference[0]], linestyle = 'dashed', label = shared_reference[1], color = 'grey')
+    label_format = compare_models_label if scope == "compare_models" else '%s'
+    for col, (label, description, arrays) in enumerate(series):
+        ax.plot(arrays['ntile'], arrays[column], label = label_format % label, color = _COLORS[col])
+        if reference is not None:
+            ax.plot(arrays['ntile'], arrays[reference[0]], linestyle = 'dashed', label = reference[1] % label, color = _COLORS[col])
+    ax.legend(loc = legend, shadow = False, frameon = False)
+
+    if confidence_bands:
+        for col, (label, description, arrays) in enumerate(series):
+            ax.fill_between(arrays['ntile'], arrays[column + '_lower'], arrays[column + '_upper'], color = _COLORS[col], alpha = 0.2, linewidth = 0)
+
     if highlight_ntile != False:
-        
+
         if highlight_ntile not in np.linspace(1, ntiles, num = ntiles).tolist():
             raise TypeError('Invalid value for highlight_ntile parameter. It must be an int value between 1 and %d' % (ntiles))
-            
+
         if highlight_how not in ('plot','text','plot_text'):
             raise ValueError('Invalid highlight_how value, it must be one of the following: plot, text or plot_text.')
-            
-        else:
-            text = ''
-            if scope == "no_comparison":
-                cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, 'roi'].tolist()
-                plt.plot([1, highlight_ntile], [cumpct[0]] * 2, linestyle = '-.', color = colors[0], lw = 1.5)
-                plt.plot([highlight_ntile] * 2 , [0] + [cumpct[0]], linestyle = '-.', color = colors[0], lw = 1.5)
-                xy = tuple([highlight_ntile] + [cumpct[0]])
-                ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[0])
-                ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                         textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                         bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[0]), #fc = 'yellow', alpha = 0.3),
-                         arrowprops = dict(arrowstyle = '->', color = 'black'))
-                text += 'When we select %s 1 until %d from model %s in dataset %s the percentage of %s cases in the expected expected return on investment is %d' % (description_label, highlight_ntile, models[0], datasets[0], classes[0], int(cumpct[0] * 100)) + '%.\n'
-            elif scope == "compare_datasets":
-                for col, i in enumerate(datasets):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['dataset_label', 'roi']]
-                    cumpct = cumpct.roi[cumpct.dataset_label == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[col]), #fc = 'yellow', alpha = 0.3),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %s 1 until %d from model %s in dataset %s the percentage of %s cases in the expected expected return on investment is %d' % (description_label, highlight_ntile, models[0], datasets[col], classes[0], int(cumpct[0] * 100)) + '%.\n'
-            elif scope == "compare_models":
-                for col, i in enumerate(models):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['model_label', 'roi']]
-                    cumpct = cumpct.roi[cumpct.model_label == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[col]), #fc = 'yellow', alpha = 0.3),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %s 1 until %d from model %s in dataset %s the percentage of %s cases in the expected expected return on investment is %d' % (description_label, highlight_ntile, models[col], datasets[0], classes[0], int(cumpct[0] * 100)) + '%.\n'
-            else: # compare targetvalues
-                for col, i in enumerate(classes):
-                    cumpct = plot_input.loc[plot_input.ntile == highlight_ntile, ['target_class', 'roi']]
-                    cumpct = cumpct.roi[cumpct.target_class == i].tolist()
-                    plt.plot([1, highlight_ntile], cumpct * 2, linestyle = '-.', color = colors[col], lw = 1.5)
-                    plt.plot([highlight_ntile] * 2, [0] + cumpct, linestyle = '-.', color = colors[col], lw = 1.5)
-                    xy = tuple([highlight_ntile] + cumpct)
-                    ax.plot(xy[0], xy[1], ".r", ms = 20, color = colors[col])
-                    ax.annotate(str(int(cumpct[0] * 100)) + "%", xy = xy, xytext = (-30, -30), 
-                             textcoords='offset points', ha = 'center', va = 'bottom', color = 'black',
-                             bbox=dict(boxstyle='round, pad = 0.4', alpha = 1, fc = colors[col]), #fc = 'yellow', alpha = 0.3),
-                             arrowprops = dict(arrowstyle = '->', color = 'black'))
-                    text += 'When we select %s 1 until %d from model %s in dataset %s the percentage of %s cases in the expected return on investment is %d' % (description_label, highlight_ntile, models[0], datasets[0], classes[col], int(cumpct[0] * 100)) + '%.\n'
-            if highlight_how in ('text', 'plot_text'):
-                print(text[:-1])
-            if highlight_how in ('plot', 'plot_text'):
-                fig.text(.15, -0.001, text[:-1], ha='left')
-    
+
+        sentences = []
+        for col, (label, description, arrays) in enumerate(series):
+            value = arrays[column][arrays['ntile'] == highlight_ntile][0]
+            ax.plot([xmin, highlight_ntile], [value] * 2, linestyle = '-.', color = _COLORS[col], lw = 1.5)
+            ax.plot([highlight_ntile] * 2, [0, value], linestyle = '-.', color = _COLORS[col], lw = 1.5)
+            ax.plot(highlight_ntile, value, ".", ms = 20, color = _COLORS[col])
+            ax.annotate(str(int(value * 100)) + "%" if percent else "€" + str(int(value)), xy = (highlight_ntile, value), xytext = (-30, -30),
+                        textcoords = 'offset points', ha = 'center', va = 'bottom', color = 'black',
+                        bbox = dict(boxstyle = 'round, pad = 0.4', alpha = 1, fc = _COLORS[col]),
+                        arrowprops = dict(arrowstyle = '->', color = 'black'))
+            sentences.append(text % _highlight_fields(description_label, highlight_ntile, ntiles, description, value))
+        if highlight_how in ('text', 'plot_text'):
+            print('\n'.join(sentences))
+        if highlight_how in ('plot', 'plot_text'):
+            fig.text(.15, -0.001, '\n'.join(sentences), ha = 'left')
+
+    return _finish_plot(fig, ax, save_fig, save_fig_filename, filename, name, headless, save_fig_format, save_fig_dpi, save_fig_async)
+
+def _new_figure(headless, nrows = 1, ncols = 1, figsize = (12,7)):
+    # a figure and its axes. Everything is drawn through these objects and never through the current figure of pyplot, so
+    # threads can render at the same time. A headless figure has an Agg canvas of its own and pyplot never knows about it,
+    # otherwise pyplot creates the figure to be able to show it
+    if headless:
+        fig = Figure(figsize = figsize)
+        FigureCanvasAgg(fig)
+    else:
+        fig = plt.figure(figsize = figsize)
+    return fig, fig.subplots(nrows, ncols, sharex = False, sharey = False)
+
+def _finish_plot(fig, ax, save_fig, save_fig_filename, filename, name, headless, save_fig_format, save_fig_dpi, save_fig_async):
+    # writes the figure if save_fig, to filename in the working directory if no save_fig_filename is given, and shows it
+    # unless headless. Returns the axes, or with save_fig_async a future of the axes that is done when the file is written
     if save_fig == True:
         if not save_fig_filename:
-            location = '%s/ROI plot.png' % os.getcwd()
-            plt.savefig(location, dpi = 300)
-            print("The roi plot is saved in %s" % location)
-        else:
-            plt.savefig(save_fig_filename, dpi = 300)
-            print("The roi plot is saved in %s" % save_fig_filename)
+            save_fig_filename = '%s/%s.%s' % (os.getcwd(), os.path.splitext(filename)[0], save_fig_format or 'png')
+        _check_save_fig_format(save_fig_filename, save_fig_format)
+        if save_fig_async:
+            return _writer.submit(fig, ax, save_fig_filename, save_fig_format, save_fig_dpi, name)
+        _save_figure(fig, save_fig_filename, save_fig_format, save_fig_dpi)
+        print("The %s plot is saved in %s" % (name, save_fig_filename))
+    if save_fig_async:
+        future = concurrent.futures.Future()
+        future.set_result(ax)
+        return future
+    if not headless:
         plt.show()
-        plt.gcf().clear()
-    plt.show()
     return ax
 
+def _save_figure(fig, filename, format, dpi):
+    # draws and writes the figure, the format follows the extension of filename if it is None
+    fig.savefig(filename, format = format, dpi = dpi)
+
+def _check_save_fig_format(filename, format):
+    # a format that differs from the file format of the extension would write for example an svg file to plot.png,
+    # an extension that is not a file format (plot.v2) is part of the name
+    aliases = {'jpeg': 'jpg', 'tiff': 'tif'}
+    extension = os.path.splitext(filename)[1][1:].lower()
+    if format and extension in FigureCanvasAgg.get_supported_filetypes() and aliases.get(extension, extension) != aliases.get(format.lower(), format.lower()):
+        raise ValueError('Invalid save_fig_format value, it must match the extension of save_fig_filename %s or be None: %s.' % (filename, format))
+
+class _figure_writer(object):
+    # the background thread that writes the figures of save_fig_async in the order they are submitted. The queue is bounded:
+    # a caller that plots faster than the figures are written waits for a free place instead of keeping every figure in memory
+
+    def __init__(self, maxsize = 8):
+        self.queue = queue.Queue(maxsize)
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def submit(self, fig, ax, filename, format, dpi, name):
+        future = concurrent.futures.Future()
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target = self._run, name = 'modelplotpy figure writer', daemon = True)
+                self.thread.start()
+        self.queue.put((future, fig, ax, filename, format, dpi, name))
+        return future
+
+    def close(self):
+        # writes the figures that are still queued and stops the thread, at exit no submitted plot is lost
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.queue.put(None)
+            thread.join()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            future, fig, ax, filename, format, dpi, name = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                _save_figure(fig, filename, format, dpi)
+            except BaseException as error:
+                future.set_exception(error)
+            else:
+                print("The %s plot is saved in %s" % (name, filename))
+                future.set_result(ax)
+
+_writer = _figure_writer()
+atexit.register(_writer.close)
+
+def _curve_series(plot_input, columns):
+    # the scope, models, datasets and target classes of plot_input, and a (label, (model, dataset, target class), arrays) triple
+    # for every series of the scope with the numpy arrays of the given columns. plot_input is split once, so drawing and
+    # highlighting takes time in the number of points and not in the number of series times the rows of plot_input
+    models   = plot_input.model_label.unique().tolist()
+    datasets = plot_input.dataset_label.unique().tolist()
+    classes  = plot_input.target_class.unique().tolist()
+    scope = plot_input.scope.iat[0]
+    if scope == "no_comparison":
+        parts = {classes[0]: plot_input}
+        descriptions = [(classes[0], (models[0], datasets[0], classes[0]))]
+    elif scope == "compare_datasets":
+        parts = _split_series(plot_input, 'dataset_label')
+        descriptions = [(i, (models[0], i, classes[0])) for i in datasets]
+    elif scope == "compare_models":
+        parts = _split_series(plot_input, 'model_label')
+        descriptions = [(i, (i, datasets[0], classes[0])) for i in models]
+    else: #compare_targetclasses
+        parts = _split_series(plot_input, 'target_class')
+        descriptions = [(i, (models[0], datasets[0], i)) for i in classes]
+    series = [(label, description, dict((column, parts[label][column].to_numpy()) for column in columns)) for label, description in descriptions]
+    return scope, models, datasets, classes, series
+
+def _highlight_fields(description_label, highlight_ntile, ntiles, description, value):
+    # the fields of the highlight sentences of the value of a series at highlight_ntile
+    model, dataset, target_class = description
+    return {'description': description_label, 'ntile': highlight_ntile, 'share': int((float(highlight_ntile) / ntiles) * 100),
+            'model': model, 'dataset': dataset, 'target_class': target_class, 'percent': int(value * 100), 'amount': int(value),
+            'times': str(round(value, 2))}
+
+def _split_series(plot_input, by):
+    # the rows of every curve of plot_input by their label in column `by`, the rows of a curve from plotting_scope() are
+    # contiguous so every curve is a slice instead of a mask over all rows
+    values = plot_input[by].to_numpy()
+    starts = np.flatnonzero(np.append(True, values[1:] != values[:-1])) if len(values) else np.empty(0, dtype = np.int64)
+    if len(set(values[starts])) < len(starts):
+        return dict(tuple(plot_input.groupby(by, sort = False)))
+    stops = np.append(starts[1:], len(values))
+    return dict((values[start], plot_input.iloc[start:stop]) for start, stop in zip(starts, stops))
+
 def range01(x):
     """ Normalizing input
     
@@ -1437,6 +1126,125 @@ def range01(x):
     """
     return (x-np.min(x))/(np.max(x)-np.min(x))
 
+def assign_ntiles(probabilities, ntiles = 10, seed = 999, tie_breaking = 'random', index = None, sample_weight = None):
+    """ Assign ntiles to one or more columns of scores at once
+
+    Every column is ranked with one batched argsort and the ntile of a row is derived from its rank with integer arithmetic.
+    For untied scores this gives the same ntile membership as pd.qcut on each column separately, ntile 1 holds the highest scores.
+
+    Parameters
+    ----------
+    probabilities : numpy array / pandas dataframe
+        Scores of shape (n,) or (n, number of classes), for example the result of predict_proba().
+
+    ntiles : int, default 10
+        The number of splits 10 is called deciles, 100 is called percentiles and any other value is an ntile.
+
+    seed : int, default 999
+        Making the tie breaking reproducible.
+
+    tie_breaking : str, default 'random'
+        How rows with equal scores are ordered. With 'random' a small random value (based on the seed) is added to the scores,
+        the result then depends on the order of the rows. With 'hash' equal scores are ordered by a hash of the row index and the seed,
+        a row then gets the same ntile no matter how the data is ordered, chunked or scored in parallel.
+
+    index : pandas index, default None
+        The row index used by tie_breaking 'hash', by default the index of `probabilities` or the row positions.
+
+    sample_weight : numpy array, default None
+        A non-negative weight for every row. The ntiles then hold equal shares of the total weight (weighted quantiles)
+        instead of equal numbers of rows, with weights of 1 the ntiles are the same as without weights.
+
+    Returns
+    -------
+    Numpy array of int with the same shape as `probabilities` containing the ntile (1 until `ntiles`) of every score.
+
+    Raises
+    ------
+    ValueError: If the wrong `tie_breaking` value is specified or `sample_weight` does not have a non-negative weight for every row.
+    """
+    order, sample_weight = _score_order(probabilities, seed, tie_breaking, index, sample_weight)
+    n = order.shape[1]
+    result = np.empty(order.shape, dtype = np.int64)
+    # the ntile of every position in the order is scattered back to the rows
+    if sample_weight is None:
+        np.put_along_axis(result, order, _ntiles_from_ranks(np.arange(n), n, ntiles).reshape(1, -1), axis = 1)
+    else:
+        sorted_weights = sample_weight[order]
+        before = np.cumsum(sorted_weights, axis = 1) - sorted_weights
+        np.put_along_axis(result, order, _ntiles_from_weights(before, before[:, -1:] if n else 1, ntiles), axis = 1)
+    if np.ndim(probabilities) == 1:
+        return result[0]
+    return result.T
+
+def _score_order(probabilities, seed, tie_breaking, index, sample_weight):
+    # the (classes, n) ascending order of every column of the scores and the validated sample weights
+    if tie_breaking not in ('random', 'hash'):
+        raise ValueError('Invalid tie_breaking value, it must be one of the following: random or hash.')
+    if index is None:
+        index = probabilities.index if isinstance(probabilities, pd.DataFrame) else pd.RangeIndex(len(probabilities))
+    scores = np.asarray(probabilities, dtype = float)
+    if scores.ndim == 1:
+        scores = scores.reshape(-1, 1)
+    n = scores.shape[0]
+    # rank the classes as contiguous rows, sorting along the columns of a (n, classes) array is much slower
+    if tie_breaking == 'random':
+        #! Added small proportion to prevent equal ntile bounds, the same value is added to every class
+        jitter = np.random.RandomState(seed).uniform(size = (1, n)) / 1000000
+        order = np.argsort(scores.T + jitter, axis = 1)
+    else:
+        # order the rows by their hash once, a stable sort of the scores then keeps that order within ties
+        by_hash = np.argsort(_row_hash(index, seed), kind = 'stable')
+        order = by_hash[np.argsort(scores.T[:, by_hash], axis = 1, kind = 'stable')]
+    if sample_weight is not None:
+        sample_weight = np.asarray(sample_weight, dtype = np.float64)
+        if sample_weight.shape != (n,) or not (sample_weight >= 0).all():
+            raise ValueError('Invalid sample_weight value, it must contain a non-negative weight for each of the %s rows.' % n)
+    return order, sample_weight
+
+def _rank_positions(probabilities, seed = 999, tie_breaking = 'random', index = None, sample_weight = None):
+    # ranks every column of the scores once and returns the (n, classes) ascending positions of the scores with their
+    # denominator for _ntiles_from_positions: the ranks and None, or with weights the weight of the rows before every score
+    # and per class the total weight minus the weight of the highest score. Any number of ntiles can be derived from these.
+    order, sample_weight = _score_order(probabilities, seed, tie_breaking, index, sample_weight)
+    n = order.shape[1]
+    if sample_weight is None:
+        positions = np.empty(order.shape, dtype = np.int64)
+        np.put_along_axis(positions, order, np.arange(n).reshape(1, -1), axis = 1)
+        return positions.T, None
+    sorted_weights = sample_weight[order]
+    before = np.cumsum(sorted_weights, axis = 1) - sorted_weights
+    positions = np.empty(order.shape)
+    np.put_along_axis(positions, order, before, axis = 1)
+    return positions.T, before[:, -1] if n else np.ones(len(order))
+
+def _ntiles_from_positions(positions, denominator, n, ntiles):
+    # the ntiles of positions from _rank_positions of a dataset with n rows
+    if denominator is None:
+        return _ntiles_from_ranks(positions, n, ntiles)
+    return _ntiles_from_weights(positions, denominator, ntiles)
+
+def _row_hash(index, seed):
+    # a stable 64 bit hash of every value in the index, salted with the seed. hash_array only uses its hash_key for
+    # object values, so the hash of the seed is mixed into the hash of every value and the result is hashed again
+    salt = pd.util.hash_array(np.array([seed % 2 ** 64], dtype = np.uint64))[0]
+    return pd.util.hash_array(pd.util.hash_array(np.asarray(index)) ^ salt)
+
+def _ntiles_from_ranks(ranks, n, ntiles):
+    # pd.qcut puts the value with ascending rank r in bin ceil(r * ntiles / (n - 1)) - 1 when all values are unique,
+    # ntiles are counted from the top so the bin is flipped
+    ranks = np.asarray(ranks, dtype = np.int64)
+    denominator = max(n - 1, 1)
+    bins = np.maximum((ranks * ntiles + denominator - 1) // denominator - 1, 0)
+    return ntiles - bins
+
+def _ntiles_from_weights(before, denominator, ntiles):
+    # the weighted version of _ntiles_from_ranks: the rank r becomes the weight of the rows before and n - 1 the total weight
+    # minus the weight of the last row (the denominator), with weights of 1 that is the same
+    denominator = np.where(denominator > 0, denominator, 1)
+    bins = np.clip(np.ceil(before * ntiles / denominator) - 1, 0, ntiles - 1).astype(np.int64)
+    return ntiles - bins
+
 def check_input(input_list, check_list, check = ''):
     """ Check if the input matches any of a complete list
     
@@ -1467,6 +1275,610 @@ def check_input(input_list, check_list, check = ''):
             raise ValueError('Invalid input for parameter %s. The input for %s is 1 or more elements from %s and put in a list.' % (check, check, check_list))
     return list(input_list)
 
+def _feature_chunks(feature_data, chunk_size = None):
+    # yields the feature data in chunks of at most chunk_size rows, an iterable of chunks is passed through
+    if isinstance(feature_data, pd.DataFrame):
+        if not chunk_size or feature_data.shape[0] <= chunk_size:
+            yield feature_data
+        else:
+            for start in range(0, feature_data.shape[0], chunk_size):
+                yield feature_data.iloc[start:start + chunk_size]
+    else:
+        for chunk in feature_data:
+            yield chunk
+
+def _score_dataset(models, feature_data, label_data, chunk_size = None, dataset_label = ''):
+    # scores a dataset with every model in one pass over the (chunks of the) feature data,
+    # only the index, probabilities and labels are kept and the feature data is never copied
+    indices = []
+    y_preds = [[] for model in models]
+    for chunk in _feature_chunks(feature_data, chunk_size):
+        indices.append(chunk.index)
+        for y_pred, model in zip(y_preds, models):
+            y_pred.append(np.asarray(model.predict_proba(chunk)))
+    if not indices:
+        raise ValueError('No feature data to score in dataset %s, an iterator of chunks can only be scored once.' % dataset_label)
+    index = indices[0].append(indices[1:]) if len(indices) > 1 else indices[0]
+    y_true = _align_labels(label_data, index)
+    return [(index, np.concatenate(y_pred) if len(y_pred) > 1 else y_pred[0], y_true) for y_pred in y_preds]
+
+def _given_scores(probabilities, label_data, n_classes):
+    # the index, probabilities and labels of scores that are computed outside of modelplotpy
+    if isinstance(probabilities, str):
+        probabilities = pd.read_parquet(probabilities)
+    if isinstance(probabilities, pd.DataFrame):
+        index = probabilities.index
+    elif isinstance(label_data, pd.Series):
+        index = label_data.index
+    else:
+        index = pd.RangeIndex(len(label_data))
+    y_pred = np.asarray(probabilities, dtype = np.float64)
+    if y_pred.ndim != 2 or y_pred.shape[1] != n_classes:
+        raise ValueError('The probabilities must have a column for each of the %d classes, the shape of the probabilities is %s.' % (n_classes, y_pred.shape))
+    if y_pred.shape[0] != len(index):
+        raise ValueError('The probabilities have %d rows and the labels %d, they must be equal.' % (y_pred.shape[0], len(index)))
+    return index, y_pred, _align_labels(label_data, index)
+
+def _align_labels(label_data, index):
+    # the labels of a dataset as an array in the order of `index`, a left join on the index of the feature data
+    if not isinstance(label_data, pd.Series):
+        return np.asarray(label_data)
+    if label_data.index.equals(index):
+        return label_data.to_numpy()
+    return label_data.reindex(index).to_numpy()
+
+_AGGREGATE_COLUMNS = ['model_label', 'dataset_label', 'target_class', 'ntile',
+                      'tot', 'pos', 'neg', 'pct', 'postot', 'negtot',
+                      'tottot', 'pcttot', 'cumpos', 'cumneg', 'cumtot', 'cumpct',
+                      'gain', 'cumgain', 'gain_ref', 'pct_ref', 'gain_opt',
+                      'lift', 'cumlift', 'cumlift_ref']
+
+# the curves that get bootstrap confidence bands, and the number of replicates drawn at once
+_BAND_COLUMNS = ('cumgain', 'cumlift', 'cumpct')
+_BOOTSTRAP_BATCH = 100
+
+def _bootstrap_batch(size, seed_sequence, method, cells, draws, probabilities, scale, ntiles):
+    # the (band columns, size, groups, ntiles) cumulative statistics of `size` replicates of ntile_counts.bootstrap(),
+    # a module level function so a process pool can draw the batches
+    random = np.random.default_rng(seed_sequence)
+    if method == 'multinomial':
+        sample = random.multinomial(draws, probabilities, size = (size, len(draws))) * scale
+    else:
+        sample = random.poisson(cells, size = (size,) + cells.shape).astype(np.float64)
+    statistics = _ntile_statistics(sample[..., :ntiles] + sample[..., ntiles:], sample[..., :ntiles], sample[..., ntiles:], ntiles)
+    return np.stack([statistics[column] for column in _BAND_COLUMNS])
+
+# the columns of the aggregate that count rows, int64 unless the rows are weighted
+_COUNT_COLUMNS = ('tot', 'pos', 'neg', 'postot', 'negtot', 'tottot', 'cumpos', 'cumneg', 'cumtot')
+
+# the keys of an entry of the plan of plot_report()
+_PLAN_KEYS = ('scope', 'select_model_label', 'select_dataset_label', 'select_targetclass', 'select_smallest_targetclass', 'bootstrap', 'confidence', 'curve_points', 'plots')
+
+_CACHE_INVALIDATING = ('feature_data', 'label_data', 'dataset_labels', 'models', 'model_labels', 'probabilities', 'classes', 'ntiles', 'seed', 'tie_breaking', 'compact', 'ntile_method', 'quantile_error', 'sample_weight')
+
+def _ntile_statistics(tot, pos, neg, ntiles):
+    # derives the evaluation measures from the counts per ntile, the last axis of `tot`, `pos` and `neg` is the ntile
+    # and can be preceded by any number of group axes, an origin row (ntile 0) is added in front of every group
+    tot, pos, neg = [np.asarray(x, dtype = np.float64) for x in (tot, pos, neg)]
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        postot = pos.sum(axis = -1, keepdims = True)
+        negtot = neg.sum(axis = -1, keepdims = True)
+        tottot = tot.sum(axis = -1, keepdims = True)
+        pct = pos / tot
+        cumpos = pos.cumsum(axis = -1)
+        cumneg = neg.cumsum(axis = -1)
+        cumtot = tot.cumsum(axis = -1)
+        cumpct = cumpos / cumtot
+        pct_ref = postot / tottot
+        gain_opt = cumtot / postot
+        statistics = {
+            'ntile': np.arange(1, ntiles + 1) + np.zeros_like(tot),
+            'tot': tot, 'pos': pos, 'neg': neg, 'pct': pct,
+            'postot': postot + np.zeros_like(tot), 'negtot': negtot + np.zeros_like(tot),
+            'tottot': tottot + np.zeros_like(tot), 'pcttot': np.nansum(pct, axis = -1, keepdims = True) + np.zeros_like(tot),
+            'cumpos': cumpos, 'cumneg': cumneg, 'cumtot': cumtot, 'cumpct': cumpct,
+            'gain': pos / postot, 'cumgain': cumpos / postot,
+            'gain_ref': np.arange(1, ntiles + 1) / ntiles + np.zeros_like(tot), 'pct_ref': pct_ref + np.zeros_like(tot),
+            'gain_opt': np.where(gain_opt <= 1.0, gain_opt, 1.0),
+            'lift': pct / pct_ref, 'cumlift': cumpct / pct_ref, 'cumlift_ref': np.ones_like(tot)
+        }
+    origin = np.zeros(tot.shape[:-1] + (1,))
+    for column, values in statistics.items():
+        statistics[column] = np.concatenate([origin + (column == 'cumlift_ref'), values], axis = -1)
+    return statistics
+
+def _aggregate_frame(groups, tot, pos, ntiles):
+    # the aggregate dataframe for groups of (model_label, dataset_label, target_class) with counts of shape (groups, ntiles),
+    # all measures are computed at once over the groups
+    statistics = _ntile_statistics(tot, pos, np.asarray(tot) - pos, ntiles)
+    columns = {}
+    for position, column in enumerate(('model_label', 'dataset_label', 'target_class')):
+        labels = np.empty(len(groups), dtype = object)
+        labels[:] = [group[position] for group in groups]
+        columns[column] = np.repeat(labels, ntiles + 1)
+    for column in _AGGREGATE_COLUMNS[3:]:
+        columns[column] = statistics[column].ravel()
+    # counts of rows stay integers, only counts of weights are floats
+    integer = np.asarray(tot).dtype.kind in 'biu' and np.asarray(pos).dtype.kind in 'biu'
+    for column in ('ntile', 'cumlift_ref') + (_COUNT_COLUMNS if integer else ()):
+        columns[column] = columns[column].astype(np.int64)
+    return pd.DataFrame(columns, columns = _AGGREGATE_COLUMNS, copy = False)
+
+def _lttb(x, y, points):
+    # indices of at most `points` points that keep the shape of the curve (largest triangle three buckets),
+    # the first and last point are always kept and every bucket in between keeps the point that spans the largest triangle
+    # with the point kept before it and the average of the next bucket
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    x_average = np.append(np.add.reduceat(x[:n - 1], edges[:-1]) / sizes, x[-1])
+    y_average = np.append(np.add.reduceat(y[:n - 1], edges[:-1]) / sizes, y[-1])
+    selected = np.empty(points, dtype = np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for k in range(points - 2):
+        start, stop = edges[k], edges[k + 1]
+        area = np.abs((x[a] - x_average[k + 1]) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (y_average[k + 1] - y[a]))
+        a = start + np.argmax(area)
+        selected[k + 1] = a
+    return selected
+
+def _curve_statistics(scores, positive, weights, ntiles, points):
+    # the measures of a continuous curve from scores in descending order. Every run of equal scores ends in a point with its
+    # cumulative counts, a shape preserving subset of these is kept together with the (interpolated) integer ntiles.
+    # The measures per ntile (tot, pos, pct, gain, lift) are those of the slice since the previous point.
+    weights = np.ones(len(scores)) if weights is None else weights
+    ends = np.flatnonzero(np.append(scores[1:] != scores[:-1], True))
+    cumtot = np.append(0, np.cumsum(weights)[ends])
+    cumpos = np.append(0, np.cumsum(np.where(positive, weights, 0))[ends])
+    position = cumtot / cumtot[-1] * ntiles
+    keep = _lttb(position, cumpos, points)
+    keep = keep[~np.isclose(position[keep], np.round(position[keep]))]
+    grid = np.arange(ntiles + 1)
+    grid_cumtot = grid * cumtot[-1] / ntiles
+    position = np.concatenate([grid, position[keep]])
+    order = np.argsort(position, kind = 'stable')
+    cumtot, cumpos = np.concatenate([grid_cumtot, cumtot[keep]])[order], np.concatenate([np.interp(grid_cumtot, cumtot, cumpos), cumpos[keep]])[order]
+    tot, pos = np.diff(cumtot), np.diff(cumpos)
+    statistics = _ntile_statistics(tot, pos, tot - pos, len(tot))
+    statistics['ntile'] = position[order]
+    statistics['gain_ref'] = position[order] / ntiles
+    return statistics
+
+def _block_index(ntiles_aggregate):
+    # the (start, stop) rows of every (model_label, dataset_label, target_class) block of an aggregate that is sorted by these labels
+    labels = [ntiles_aggregate[column].to_numpy() for column in ('model_label', 'dataset_label', 'target_class')]
+    change = np.zeros(len(ntiles_aggregate), dtype = bool)
+    change[:1] = True
+    for values in labels:
+        change[1:] |= values[1:] != values[:-1]
+    starts = np.flatnonzero(change)
+    stops = np.append(starts[1:], len(ntiles_aggregate))
+    return dict(((labels[0][start], labels[1][start], labels[2][start]), (start, stop)) for start, stop in zip(starts, stops))
+
+def _select_blocks(ntiles_aggregate, blocks, model_labels, dataset_labels, target_classes):
+    # the rows of the selected blocks in the order of the aggregate, found by lookups instead of masks over all rows
+    selected = sorted(blocks[key] for key in dict.fromkeys((model_label, dataset_label, target_class)
+                      for model_label in model_labels for dataset_label in dataset_labels for target_class in target_classes) if key in blocks)
+    rows = np.concatenate([np.arange(start, stop) for start, stop in selected]) if selected else np.empty(0, dtype = np.int64)
+    return ntiles_aggregate.iloc[rows]
+
+def _code_dtype(n, signed = False):
+    # the smallest integer type that holds the codes 0 until n
+    for dtype in ((np.int8, np.int16, np.int32) if signed else (np.uint8, np.uint16, np.uint32)):
+        if n <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def _class_ntile_counts(positions, denominator, label_codes, ntiles, weights = None):
+    # rows and positives per class and ntile from the (rows, classes) positions of _rank_positions. Every class has the same
+    # number of rows per ntile, that follows from the ranks. The positives take a single pass over the ntile of the true class
+    # of every row. With weights the rows and positives are the sums of their weights.
+    n, n_classes = positions.shape
+    labelled = np.flatnonzero(label_codes >= 0)
+    codes = label_codes[labelled]
+    keys = codes * ntiles + _ntiles_from_positions(positions[labelled, codes], None if denominator is None else denominator[codes], n, ntiles) - 1
+    if weights is None:
+        tot = np.tile(np.bincount(_ntiles_from_ranks(np.arange(n), n, ntiles) - 1, minlength = ntiles), (n_classes, 1))
+        pos = np.bincount(keys, minlength = n_classes * ntiles)
+    else:
+        dec = _ntiles_from_positions(positions, denominator, n, ntiles)
+        tot = np.bincount((dec - 1 + np.arange(n_classes) * ntiles).ravel(), weights = np.repeat(weights, n_classes), minlength = n_classes * ntiles)
+        tot = tot.reshape(n_classes, ntiles)
+        pos = np.bincount(keys, weights = weights[labelled], minlength = n_classes * ntiles)
+    return tot, pos.reshape(n_classes, ntiles)
+
+def _sorted_counts(groups, tot, pos):
+    # ntile_counts per resolution from lists of (classes, ntiles) counts in the order of the groups, sorted by group
+    order = sorted(range(len(groups)), key = lambda g: groups[g])
+    result = {}
+    for ntiles in tot:
+        group_tot = np.concatenate(tot[ntiles])[order] if groups else None
+        group_pos = np.concatenate(pos[ntiles])[order] if groups else None
+        result[ntiles] = ntile_counts(ntiles, [groups[g] for g in order], group_tot, group_pos)
+    return result
+
+class _ResultBuilder(object):
+    # collects blocks of rows in pre-allocated numpy columns and builds the pandas dataframe once,
+    # the final number of rows has to be known up front
+
+    def __init__(self, n_rows):
+        self.n_rows = n_rows
+        self.position = 0
+        self.columns = {}
+        self.categories = {}
+        self.index = []
+
+    def add_column(self, name, dtype, categories = None):
+        # a column with categories stores the category codes and becomes a pandas categorical
+        if categories is not None:
+            self.categories[name] = pd.Index(categories)
+            self.columns[name] = np.full(self.n_rows, -1, dtype = _code_dtype(len(categories) + 1, signed = True))
+        elif np.dtype(dtype) == object:
+            self.columns[name] = np.full(self.n_rows, None, dtype = object)
+        elif np.issubdtype(dtype, np.floating):
+            self.columns[name] = np.full(self.n_rows, np.nan, dtype = dtype)
+        else:
+            self.columns[name] = np.zeros(self.n_rows, dtype = dtype)
+
+    def append(self, block, index = None):
+        # block maps column names to arrays or scalars, the arrays are flattened in C order
+        if index is not None:
+            size = len(index)
+            self.index.append(index)
+        else:
+            size = max(np.size(values) for values in block.values())
+        stop = self.position + size
+        if stop > self.n_rows:
+            raise ValueError('The result builder was allocated for %d rows, but %d rows are appended.' % (self.n_rows, stop))
+        for name, values in block.items():
+            if name in self.categories:
+                values = self.categories[name].get_loc(values) if np.ndim(values) == 0 else self.categories[name].get_indexer(values)
+            self.columns[name][self.position:stop] = np.ravel(values) if np.ndim(values) > 1 else values
+        self.position = stop
+
+    def to_frame(self):
+        columns = dict((name, values[:self.position]) for name, values in self.columns.items())
+        for name, categories in self.categories.items():
+            columns[name] = pd.Categorical.from_codes(columns[name], categories)
+        index = None
+        if self.index:
+            index = self.index[0].append(self.index[1:]) if len(self.index) > 1 else self.index[0]
+        return pd.DataFrame(columns, index = index, copy = False)
+
+class quantile_sketch(object):
+    """ Mergeable quantile sketch with a bounded rank error and a fixed size
+
+    A KLL sketch (Karnin, Lang and Liberty): a stack of compactors where level h holds values that each represent 2 ** h values.
+    The top level holds at most k values and every level below it 2 / 3 of the level above it, with a minimum of 2. A level that
+    is over its capacity is compacted: its values are sorted and every other value, starting at a random offset, is promoted
+    to the next level. However many values are added or merged, the sketch holds at most about 3 * k + 2 * levels values
+    and the number of levels only grows with log2(count / k).
+
+    A compaction at level h moves the rank of a value up or down by 2 ** h with equal probability, or not at all. These errors
+    are independent and add up to at most a few times count / k. With k = ceil(10 / epsilon) the rank of a value returned by
+    quantiles() or cut_points() is off by more than epsilon * count with a probability below 1%, for every single rank.
+    Until the first compaction (at most k values) the quantiles are exact.
+
+    The values can come with ties: unsigned 64 bit integers that order equal values, for example a hash of the row index.
+    The sketch then holds (value, tie) keys, so equal values are split at the quantiles instead of all ending up on one side.
+
+    Parameters
+    ----------
+    epsilon : float, default 0.001
+        The rank error as a fraction of the number of values that is exceeded with a probability below 1%.
+
+    seed : int, default 999
+        Making the compaction offsets reproducible.
+    """
+
+    def __init__(self, epsilon = 0.001, seed = 999):
+        self.epsilon = epsilon
+        self.k = int(np.ceil(10 / epsilon))
+        self.levels = [np.empty(0)]
+        self.ties = None
+        self.count = 0
+        self._random = np.random.RandomState(seed)
+
+    def update(self, values, ties = None):
+        """ Add a chunk of values with their ties (see above) or without, missing values are skipped """
+        values = np.asarray(values, dtype = np.float64).ravel()
+        present = ~np.isnan(values)
+        self._check_ties(ties is not None)
+        if ties is not None:
+            self.ties[0] = np.concatenate([self.ties[0], np.asarray(ties, dtype = np.uint64).ravel()[present]])
+        self.levels[0] = np.concatenate([self.levels[0], values[present]])
+        self.count += int(present.sum())
+        self._compact()
+        return self
+
+    def merge(self, other):
+        """ Merge the values of another sketch into this one, the result is a sketch of all values of both """
+        if other.count == 0:
+            return self
+        self._check_ties(other.ties is not None)
+        for h, items in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty(0))
+                if self.ties is not None:
+                    self.ties.append(np.empty(0, dtype = np.uint64))
+            self.levels[h] = np.concatenate([self.levels[h], items])
+            if self.ties is not None:
+                self.ties[h] = np.concatenate([self.ties[h], other.ties[h]])
+        self.count += other.count
+        self._compact()
+        return self
+
+    def _check_ties(self, tied):
+        # the first values decide whether the sketch holds ties, all later values have to match
+        if self.count == 0 and self.ties is None and tied:
+            self.ties = [np.empty(0, dtype = np.uint64) for items in self.levels]
+        if tied != (self.ties is not None):
+            raise ValueError('A quantile_sketch holds values with ties or without ties, they cannot be mixed.')
+
+    def size(self):
+        """ The number of values that the sketch holds """
+        return sum(len(items) for items in self.levels)
+
+    def _capacity(self, h):
+        # the top level holds k values, every level below it 2 / 3 of the level above it
+        return max(2, int(np.ceil(self.k * (2. / 3) ** (len(self.levels) - 1 - h))))
+
+    def _compact(self):
+        # compacts the levels from the bottom up until every level is within its capacity. A new top level lowers the capacity
+        # of all levels below it, those are checked again
+        h = 0
+        while h < len(self.levels):
+            if len(self.levels[h]) <= self._capacity(h):
+                h += 1
+                continue
+            order = _key_order(self.levels[h], None if self.ties is None else self.ties[h])
+            # with an odd number of values the smallest stays behind, the rest is halved into the next level
+            odd = len(order) % 2
+            promoted, kept = order[odd + self._random.randint(2)::2], order[:odd]
+            grown = h + 1 == len(self.levels)
+            if grown:
+                self.levels.append(np.empty(0))
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], self.levels[h][promoted]])
+            self.levels[h] = self.levels[h][kept]
+            if self.ties is not None:
+                if grown:
+                    self.ties.append(np.empty(0, dtype = np.uint64))
+                self.ties[h + 1] = np.concatenate([self.ties[h + 1], self.ties[h][promoted]])
+                self.ties[h] = self.ties[h][kept]
+            h = 0 if grown else h + 1
+
+    def _sorted(self):
+        # all values with their ties (or None) and weights, in the order of the (value, tie) keys
+        items = np.concatenate(self.levels)
+        ties = None if self.ties is None else np.concatenate(self.ties)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype = np.int64) for h, level in enumerate(self.levels)])
+        order = _key_order(items, ties)
+        return items[order], None if ties is None else ties[order], weights[order]
+
+    def _keys(self, ranks):
+        # the (values, ties) keys with the given ranks, ties is None for a sketch without ties
+        items, ties, weights = self._sorted()
+        position = np.minimum(np.searchsorted(np.cumsum(weights), np.asarray(ranks) + 1, side = 'left'), len(items) - 1)
+        return items[position], None if ties is None else ties[position]
+
+    def _cut_keys(self, ntiles):
+        # the (values, ties) keys of the ntiles - 1 boundaries, for _cut_point_ntiles()
+        return self._keys((np.arange(1, ntiles) * max(self.count - 1, 1)) // ntiles)
+
+    def quantiles(self, ranks):
+        """ The values with the given (0 based, ascending) ranks, each within epsilon * count of the requested rank (see above) """
+        return self._keys(ranks)[0]
+
+    def cut_points(self, ntiles = 10):
+        """ The ntiles - 1 boundaries between the ntiles, without compactions these are the exact boundaries of assign_ntiles """
+        return self._cut_keys(ntiles)[0]
+
+def _key_order(values, ties):
+    # the ascending order of the (value, tie) keys. Sorting the values alone is much faster, the ties are only used
+    # when some values are equal
+    order = np.argsort(values)
+    if ties is not None and len(order) > 1:
+        ordered = values[order]
+        if (ordered[1:] == ordered[:-1]).any():
+            order = np.lexsort((ties, values))
+    return order
+
+def _cut_point_ntiles(values, ties, cut_values, cut_ties, ntiles):
+    # the 0 based ntile of every (value, tie) key for the cut points of _cut_keys(): keys above c cut points are in ntile
+    # ntiles - c, the first ntile holds the highest keys. A value that equals cut values is placed by its tie among them
+    below = np.searchsorted(cut_values, values, side = 'left')
+    if cut_ties is not None and len(cut_values):
+        rows = np.flatnonzero(cut_values[np.minimum(below, len(cut_values) - 1)] == values)
+        if len(rows):
+            start = below[rows]
+            span = np.searchsorted(cut_values, values[rows], side = 'right') - start
+            for d in range(span.max()):
+                # the cut points of one value are ordered by their ties
+                below[rows] += (d < span) & (cut_ties[np.minimum(start + d, len(cut_ties) - 1)] < ties[rows])
+    return ntiles - 1 - below
+
+def _count_array(counts, shape):
+    # counts as an int64 array if they are integers, otherwise as a float64 array (sums of weights)
+    if counts is None:
+        return np.zeros(shape, dtype = np.int64)
+    counts = np.asarray(counts)
+    return counts.astype(np.int64 if counts.dtype.kind in 'biu' else np.float64).reshape(shape)
+
+class ntile_counts(object):
+    """ Mergeable counts per ntile
+
+    The number of rows (tot) and positives (pos) for every (model_label, dataset_label, target_class) group and ntile.
+    The counts are plain sums, so the counts of shards of the data can be computed separately (on other processes or nodes),
+    merged and finalised into the same dataframe as aggregate_over_ntiles() returns. Only the counts have to be moved around,
+    they can be pickled or converted to a JSON compatible dict with to_dict().
+
+    By default the ntiles of a shard are assigned within that shard, merging the shards of a dataset then gives stratified
+    ntiles: every ntile holds the same fraction of every shard. For the ntiles of the whole dataset, merge the
+    modelplotpy.quantile_sketches() of the shards and count every shard against these with aggregate_counts(sketches).
+
+    Parameters
+    ----------
+    ntiles : int, default 10
+        The number of splits 10 is called deciles, 100 is called percentiles and any other value is an ntile.
+
+    groups : list of tuples
+        The (model_label, dataset_label, target_class) of every group.
+
+    tot : numpy array
+        The number of rows per group and ntile, shape (groups, ntiles). Integer counts are kept as int64,
+        other counts (sums of sample weights) as float64.
+
+    pos : numpy array
+        The number of rows with the target class per group and ntile, shape (groups, ntiles).
+
+    Raises
+    ------
+    ValueError: If the shapes of `tot` and `pos` do not match the groups and ntiles.
+    """
+
+    def __init__(self, ntiles = 10, groups = [], tot = None, pos = None):
+        self.ntiles = ntiles
+        self.groups = [tuple(group) for group in groups]
+        shape = (len(self.groups), ntiles)
+        self.tot = _count_array(tot, shape)
+        self.pos = _count_array(pos, shape)
+
+    @property
+    def neg(self):
+        return self.tot - self.pos
+
+    def merge(self, other):
+        """ Merge with the counts of another shard
+
+        Merging is associative and commutative, groups that occur in both are added up.
+
+        Parameters
+        ----------
+        other : ntile_counts
+            The counts of another shard with the same number of ntiles.
+
+        Returns
+        -------
+        A new ntile_counts object with the counts of both shards.
+
+        Raises
+        ------
+        ValueError: If the number of ntiles differs.
+        """
+        if self.ntiles != other.ntiles:
+            raise ValueError('Only counts with the same number of ntiles can be merged, the ntiles are %d and %d.' % (self.ntiles, other.ntiles))
+        groups = sorted(set(self.groups) | set(other.groups))
+        position = dict((group, g) for g, group in enumerate(groups))
+        tot = np.zeros((len(groups), self.ntiles), dtype = np.result_type(self.tot, other.tot))
+        pos = np.zeros((len(groups), self.ntiles), dtype = np.result_type(self.pos, other.pos))
+        for counts in (self, other):
+            rows = [position[group] for group in counts.groups]
+            np.add.at(tot, rows, counts.tot)
+            np.add.at(pos, rows, counts.pos)
+        return ntile_counts(self.ntiles, groups, tot, pos)
+
+    def __add__(self, other):
+        return self.merge(other)
+
+    def to_frame(self):
+        """ Finalise the counts into the aggregate
+
+        Returns
+        -------
+        Pandas dataframe with the same columns as aggregate_over_ntiles(), sorted by model_label, dataset_label, target_class and ntile.
+        """
+        order = sorted(range(len(self.groups)), key = lambda g: self.groups[g])
+        return _aggregate_frame([self.groups[g] for g in order], self.tot[order], self.pos[order], self.ntiles)
+
+    def bootstrap(self, replicates = 1000, confidence = 0.95, seed = 999, n_jobs = 1, method = 'multinomial', backend = 'threads'):
+        """ Bootstrap confidence bands of the cumulative gains, lift and response
+
+        The counts are resampled instead of the rows: the rows of a group fall into 2 * ntiles cells (positive or negative in an ntile)
+        and a replicate draws new cell counts. With 'multinomial' the total of the group is kept and the cells are drawn at once,
+        with 'poisson' every cell count is drawn independently (the Poisson bootstrap). The ntile of a row is not changed by the
+        resampling, so the bands show the sampling variation of the evaluation set given the ntile boundaries.
+        Replicates are drawn in batches of numpy arrays with independent random streams, so the result does not depend on `n_jobs`.
+
+        Parameters
+        ----------
+        replicates : int, default 1000
+            The number of bootstrap replicates.
+
+        confidence : float, default 0.95
+            The coverage of the percentile band, 0.95 takes the 2.5th and 97.5th percentile of the replicates.
+
+        seed : int, default 999
+            Making the replicates reproducible.
+
+        n_jobs : int, default 1
+            The number of batches of replicates that are drawn concurrently, -1 uses as many workers as there are processors.
+
+        method : str, default 'multinomial'
+            How the counts are resampled, 'multinomial' or 'poisson'.
+
+        backend : str / concurrent.futures.Executor, default 'threads'
+            Draw the batches concurrently with 'threads', 'processes' or with the given executor.
+            Threads share the counts and run on several cores, numpy releases the GIL while it draws the replicates and
+            computes their statistics. 'processes' copies the counts to the worker processes.
+
+        Returns
+        -------
+        Pandas dataframe like to_frame() with the columns cumgain_lower, cumgain_upper, cumlift_lower, cumlift_upper,
+        cumpct_lower and cumpct_upper added.
+
+        Raises
+        ------
+        ValueError: If the wrong `method` or `backend` value is specified.
+        """
+        if method not in ('multinomial', 'poisson'):
+            raise ValueError('Invalid method value, it must be one of the following: multinomial or poisson.')
+        order = sorted(range(len(self.groups)), key = lambda g: self.groups[g])
+        tot, pos = self.tot[order], self.pos[order]
+        cells = np.concatenate([pos, tot - pos], axis = 1)
+        totals = cells.sum(axis = 1)
+        draws = np.round(totals).astype(np.int64)
+        probabilities = cells / np.where(totals > 0, totals, 1)[:, None]
+        # weighted counts are drawn as the rounded number of rows and scaled back to their total weight
+        scale = (totals / np.where(draws > 0, draws, 1))[:, None]
+
+        draw = functools.partial(_bootstrap_batch, method = method, cells = cells, draws = draws, probabilities = probabilities,
+                                 scale = scale, ntiles = self.ntiles)
+        sizes = [min(_BOOTSTRAP_BATCH, replicates - start) for start in range(0, replicates, _BOOTSTRAP_BATCH)]
+        seed_sequences = np.random.SeedSequence(seed).spawn(len(sizes))
+        n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        if n_jobs == 1 or len(sizes) == 1:
+            batches = list(map(draw, sizes, seed_sequences))
+        else:
+            executor, shutdown = _executor(backend, n_jobs)
+            try:
+                batches = list(executor.map(draw, sizes, seed_sequences))
+            finally:
+                if shutdown:
+                    executor.shutdown()
+        tail = (1 - confidence) / 2 * 100
+        with warnings.catch_warnings():
+            # a curve that is undefined in every replicate (no positives at all) gets a missing band
+            warnings.simplefilter('ignore', RuntimeWarning)
+            lower, upper = np.nanpercentile(np.concatenate(batches, axis = 1), [tail, 100 - tail], axis = 1)
+        ntiles_aggregate = _aggregate_frame([self.groups[g] for g in order], tot, pos, self.ntiles)
+        for k, column in enumerate(_BAND_COLUMNS):
+            ntiles_aggregate[column + '_lower'] = lower[k].ravel()
+            ntiles_aggregate[column + '_upper'] = upper[k].ravel()
+        return ntiles_aggregate
+
+    def to_dict(self):
+        """ The counts as a JSON compatible dict, ntile_counts.from_dict() restores them """
+        return {'ntiles': self.ntiles, 'groups': [list(group) for group in self.groups],
+                'tot': self.tot.tolist(), 'pos': self.pos.tolist()}
+
+    @classmethod
+    def from_dict(cls, counts):
+        """ Restore the counts from the result of to_dict() """
+        return cls(counts['ntiles'], counts['groups'], counts['tot'], counts['pos'])
+
 class modelplotpy(object):
     """ Create a model_plots object
     
@@ -1474,6 +1886,7 @@ class modelplotpy(object):
     ----------    
     feature_data : list of objects
         Objects containing the X matrix for one or more different datasets.
+        A dataset can also be an iterable of X matrix chunks, for example pd.read_csv(..., chunksize = 100000).
 
     label_data : list of objects 
         Objects of the y vector for one or more different datasets.
@@ -1490,22 +1903,54 @@ class modelplotpy(object):
     seed : int, default 999
         Make results reproducible, in the case of a small dataset the data cannot be split into unique ntiles.
 
+    chunk_size : int, default None
+        Score the feature data in chunks of at most `chunk_size` rows, only the probabilities and labels are kept.
+
+    n_jobs : int, default 1
+        The number of model and dataset combinations that are scored concurrently, -1 uses all processors.
+
+    backend : str / concurrent.futures.Executor, default 'threads'
+        Score concurrently with 'threads', 'processes' or with the given executor.
+
+    cache : bool, default True
+        Keep the scores and the aggregate on the object so that repeated plotting_scope() calls do not score the data again.
+
+    tie_breaking : str, default 'random'
+        How rows with equal scores are assigned to ntiles, 'random' or 'hash' (see assign_ntiles).
+
+    compact : bool, default False
+        Store the scores with float32 probabilities, uint8 / uint16 ntiles and categorical labels.
+
+    ntile_method : str, default 'exact'
+        With 'approximate' the ntile boundaries are estimated with a quantile_sketch in a streaming pass over the (chunks of the) data.
+
+    quantile_error : float, default 0.001
+        The rank error of the approximate ntile boundaries as a fraction of the number of rows, exceeded with a probability below 1%.
+
+    sample_weight : list of objects, default []
+        Objects of the row weights for one or more different datasets, or an empty list to weigh every row equally.
+
+    cache_selections : int, default 32
+        The number of aggregates of selected models, datasets and target classes that the cache keeps, the least recently used are removed.
+
     Raises
     ------
     ValueError: If there is no match with the complete list or the input list again
 
     """
 
-    def __init__(self, feature_data = [], label_data = [], dataset_labels = [], models = [], model_labels = [], ntiles = 10, seed = 999):
+    def __init__(self, feature_data = [], label_data = [], dataset_labels = [], models = [], model_labels = [], ntiles = 10, seed = 999, chunk_size = None, n_jobs = 1, backend = 'threads', cache = True, tie_breaking = 'random', compact = False, ntile_method = 'exact', quantile_error = 0.001, sample_weight = [], cache_selections = 32):
         """ Create a model_plots object
 
         Parameters
         ----------
         feature_data : list of objects
             Objects containing the X matrix for one or more different datasets.
+            A dataset can also be an iterable of X matrix chunks, for example pd.read_csv(..., chunksize = 100000).
             
         label_data : list of objects 
             Objects of the y vector for one or more different datasets.
+            When the X matrix is chunked the y vector is aligned on the index of every chunk.
             
         dataset_labels : list of str 
             Containing the names of the different `feature_data` and `label_data` combination pairs.
@@ -1522,6 +1967,59 @@ class modelplotpy(object):
         seed : int, default 999
             Making the splits reproducible.
 
+        chunk_size : int, default None
+            Score the feature data in chunks of at most `chunk_size` rows, the peak memory of scoring is then bounded by the chunk size.
+            Each chunk is scored by all models and only the probabilities and labels are kept.
+
+        n_jobs : int, default 1
+            The number of model and dataset combinations that are scored concurrently, -1 uses all processors.
+
+        backend : str / concurrent.futures.Executor, default 'threads'
+            Score concurrently with 'threads', 'processes' or with the given executor.
+            The results are identical to scoring one combination after the other.
+            With 'processes' the models and feature data are sent to the worker processes,
+            an iterable of chunks is always scored in the calling process.
+
+        cache : bool, default True
+            Keep the scores and the aggregate on the object so that repeated plotting_scope() calls do not score the data again.
+            The cache is invalidated when `feature_data`, `label_data`, `dataset_labels`, `models`, `model_labels`, `ntiles` or `seed`
+            is set or when an element of one of these lists is replaced. Use clear_cache() after changing the data itself in place.
+
+        tie_breaking : str, default 'random'
+            How rows with equal scores are assigned to ntiles. With 'random' a small random value (based on the seed) is added to the scores.
+            With 'hash' equal scores are ordered by a hash of the row index and the seed, so a row gets the same ntile
+            no matter how the data is ordered, chunked or scored in parallel.
+
+        compact : bool, default False
+            Return prepare_scores_and_ntiles() with float32 probabilities, uint8 (or uint16 for more than 255 ntiles) ntiles
+            and categorical target_class, dataset_label and model_label columns, a fraction of the default memory.
+
+        ntile_method : str, default 'exact'
+            How aggregate_over_ntiles() assigns the ntiles. 'exact' ranks all probabilities of a dataset at once.
+            'approximate' streams over the chunks of the data twice and never keeps all probabilities: the first pass learns
+            the ntile boundaries with a quantile_sketch, the second pass counts the rows per ntile.
+            The feature data must then be a dataframe or a list of chunks, an iterator cannot be read twice.
+            prepare_scores_and_ntiles() always uses the exact ntiles.
+
+        quantile_error : float, default 0.001
+            The rank error of the approximate ntile boundaries as a fraction of the number of rows n, every boundary is within
+            quantile_error * n ranks of the exact one with a probability of at least 99% (see quantile_sketch).
+            Only rows within that many ranks of a boundary then end up in a neighbouring ntile, so at most
+            (ntiles - 1) * quantile_error of the rows differ from the exact ntiles and none by more than one ntile
+            (as long as quantile_error < 1 / ntiles). Rows with equal probabilities are ordered as with the exact ntiles,
+            by the hash of their index with tie_breaking 'hash' and at random otherwise, so ties are split at the boundaries
+            and the bound also holds for tied probabilities.
+
+        sample_weight : list of objects, default []
+            Objects of the (sampling) weight of every row for each of the datasets, aligned like `label_data`.
+            The ntiles then hold equal shares of the total weight and the counts tot, pos and neg are sums of weights,
+            so the gains, lift and response are those of the weighted population. Not available with ntile_method 'approximate'.
+
+        cache_selections : int, default 32
+            plotting_scope() aggregates only the selected models, datasets and target classes as long as the complete aggregate
+            is not cached, and caches every selection. The cache keeps the `cache_selections` most recently used selections
+            and removes the least recently used ones, so exploring many scopes does not grow the memory without limit.
+
         Raises
         ------
         ValueError: If there is no match with the complete list or the input list again
@@ -1534,6 +2032,114 @@ class modelplotpy(object):
         self.model_labels = model_labels
         self.ntiles = ntiles
         self.seed = seed
+        self.tie_breaking = tie_breaking
+        self.compact = compact
+        self.ntile_method = ntile_method
+        self.quantile_error = quantile_error
+        self.sample_weight = sample_weight
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.cache = cache
+        self.cache_selections = cache_selections
+        self.probabilities = None
+        self.classes = None
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def __setattr__(self, name, value):
+        # setting the data, models or ntiles invalidates the cached scores and aggregates
+        if name in _CACHE_INVALIDATING:
+            self.__dict__['_cache'] = {}
+        object.__setattr__(self, name, value)
+
+    def _cache_fingerprint(self):
+        # replacing an element of one of the lists in place also invalidates the cache
+        fingerprint = [self.ntiles, self.seed, self.tie_breaking, self.compact, self.ntile_method, self.quantile_error]
+        for name in ('feature_data', 'label_data', 'dataset_labels', 'models', 'model_labels', 'probabilities', 'classes', 'sample_weight'):
+            fingerprint.append(tuple(id(x) for x in getattr(self, name) or []))
+        return tuple(fingerprint)
+
+    def _cached(self, key, compute):
+        # returns the cached value of key, or computes and caches it
+        if not self.cache:
+            return compute()
+        fingerprint = self._cache_fingerprint()
+        if key in self._cache and self._cache[key][0] == fingerprint:
+            self._cache_hits += 1
+            return self._cache[key][1]
+        self._cache_misses += 1
+        value = compute()
+        self._cache[key] = (fingerprint, value)
+        return value
+
+    def _is_cached(self, key):
+        # whether key has a valid cached value, without counting a hit or a miss
+        return self.cache and key in self._cache and self._cache[key][0] == self._cache_fingerprint()
+
+    def cache_info(self):
+        """ Statistics of the cache with the scores and aggregates
+
+        Returns
+        -------
+        Dictionary with the number of cache `hits`, `misses` and the number of cached results (`size`).
+        """
+        return {'hits': self._cache_hits, 'misses': self._cache_misses, 'size': len(self._cache)}
+
+    def clear_cache(self):
+        """ Remove the cached scores and aggregates, for example after the data has been changed in place """
+        self._cache = {}
+
+    @classmethod
+    def from_scores(cls, probabilities, classes, label_data, dataset_labels, model_labels, ntiles = 10, seed = 999, **kwargs):
+        """ Create a model_plots object from probabilities that are already computed
+
+        The models are not needed and predict_proba() is never called, no feature data is used.
+
+        Parameters
+        ----------
+        probabilities : list of lists
+            For every model a list with for every dataset the probabilities of shape (n, number of classes).
+            These can be numpy arrays, pandas dataframes or paths to parquet files.
+
+        classes : list / list of lists
+            The target classes in the order of the probability columns, or a list of them for every model.
+            The classes can be strings or other labels like integers, as long as they match the values of label_data.
+
+        label_data : list of objects
+            Objects of the y vector for one or more different datasets, in the order of the probabilities.
+
+        dataset_labels : list of str
+            Containing the names of the different datasets.
+
+        model_labels : list of str
+            Names of the models.
+
+        ntiles : int, default 10
+            The number of splits 10 is called deciles, 100 is called percentiles and any other value is an ntile.
+
+        seed : int, default 999
+            Making the splits reproducible.
+
+        **kwargs
+            Other options of modelplotpy, for example `cache`.
+
+        Returns
+        -------
+        A modelplotpy object that can be used like one that is created from models and feature data.
+
+        Raises
+        ------
+        ValueError: If the number of models, datasets and their labels do not match.
+        """
+        # a single list of classes is shared by all models, the classes themselves can be strings, numbers or booleans
+        if len(classes) > 0 and not any(isinstance(k, (list, tuple, np.ndarray, pd.Index)) for k in classes):
+            classes = [list(classes)] * len(model_labels)
+        obj = cls(label_data = label_data, dataset_labels = dataset_labels, model_labels = model_labels, ntiles = ntiles, seed = seed, **kwargs)
+        obj.probabilities = probabilities
+        obj.classes = [list(k) for k in classes]
+        obj._check_input_lengths()
+        return obj
 
     def prepare_scores_and_ntiles(self):
         """ Create eval_tot
@@ -1573,43 +2179,255 @@ class modelplotpy(object):
         ------
         ValueError: If there is no match with the complete list or the input list again
         """
+        self._check_input_lengths()
+        scores = self._scores()
+
+        model_classes = [self._model_classes(i) for i in range(len(self.model_labels))]
+        classes = []
+        for model_class in model_classes:
+            classes += [k for k in model_class if k not in classes]
+        # classes that some of the models do not predict get missing values
+        complete = [all(k in model_class for model_class in model_classes) for k in classes]
+        builder = _ResultBuilder(sum(len(index) for index, y_pred, y_true in scores.values()))
+        if self.compact:
+            prob_dtype, dec_dtype = np.float32, _code_dtype(self.ntiles)
+            labels = pd.Index(classes)
+            for index, y_pred, y_true in scores.values():
+                labels = labels.append(pd.Index(pd.unique(y_true)).dropna().difference(labels))
+            label_categories = {'target_class': labels, 'dataset_label': pd.unique(np.asarray(self.dataset_labels, dtype = object)),
+                                'model_label': pd.unique(np.asarray(self.model_labels, dtype = object))}
+        else:
+            prob_dtype, dec_dtype, label_categories = np.float64, np.int64, {}
+        for k in classes:
+            builder.add_column('prob_%s' % k, prob_dtype)
+        for column in ('target_class', 'dataset_label', 'model_label'):
+            builder.add_column(column, object, label_categories.get(column))
+        for k, is_complete in zip(classes, complete):
+            builder.add_column('dec_%s' % k, dec_dtype if is_complete else prob_dtype)
+
+        for i in range(len(self.model_labels)):
+            for j in range(len(self.dataset_labels)):
+                index, y_pred, y_true = scores.pop((i, j))
+                # make ntiles for all outcomes at once
+                ntiles = assign_ntiles(y_pred, self.ntiles, self.seed, self.tie_breaking, index, self._weights(j, index))
+                block = {'target_class': y_true, 'dataset_label': self.dataset_labels[j], 'model_label': self.model_labels[i]}
+                for col, k in enumerate(model_classes[i]):
+                    block['prob_%s' % k] = y_pred[:, col]
+                    block['dec_%s' % k] = ntiles[:, col]
+                builder.append(block, index)
+        return builder.to_frame()
+
+    def _check_input_lengths(self):
+        if self.probabilities is not None:
+            if (len(self.probabilities) == len(self.classes) == len(self.model_labels)) == False:
+                raise ValueError('The number of models in probabilities and classes and their model_labels must be equal. The number of models in probabilities = %s, classes = %s and model_labels = %s.' % (len(self.probabilities), len(self.classes), len(self.model_labels)))
+            if any(len(x) != len(self.dataset_labels) for x in self.probabilities) or len(self.label_data) != len(self.dataset_labels):
+                raise ValueError('Every model in probabilities and label_data must have a dataset for each of the %s dataset_labels.' % len(self.dataset_labels))
+            self._check_sample_weight()
+            return
+
         if (len(self.models) == len(self.model_labels)) == False:
-            raise ValueError('The number of models and the their description model_name must be equal. The number of model = %s and model_name = %s.' % (len(self.model), len(self.model_name)) )
+            raise ValueError('The number of models and the their description model_labels must be equal. The number of models = %s and model_labels = %s.' % (len(self.models), len(self.model_labels)))
 
         if (len(self.feature_data) == len(self.label_data) == len(self.dataset_labels)) == False:
-            raise ValueError('The number of datasets in feature_data and label_data and their description pairs must be equal. The number of datasets in feature_data = %s, label_data = %s and description = %s.' % (len(self.feature_data), len(self.label_data), len(self.description)))
-        
-        final = pd.DataFrame()
-        for i in range(len(self.models)):
-            data_set = pd.DataFrame()
-            for j in range(len(self.dataset_labels)):
-                y_true = self.label_data[j]
-                y_true = y_true.rename('target_class')
-                # probabilities and rename them
-                y_pred = self.models[i].predict_proba(self.feature_data[j])
-                probabilities = pd.DataFrame(data = y_pred, index = self.feature_data[j].index)
-                probabilities.columns = 'prob_' + self.models[i].classes_
-                # combine the datasets
-                dataset = pd.concat([self.feature_data[j], probabilities, y_true], axis = 1, join_axes = [self.feature_data[j].index])
-                dataset['dataset_label'] = self.dataset_labels[j]
-                dataset['model_label'] = self.model_labels[i]
-                # remove the feature columns
-                dataset = dataset.drop(list(self.feature_data[j].columns), axis=1)
-                # make deciles
-                # loop over different outcomes
-                n = dataset.shape[0]
-                for k in self.models[i].classes_:
-                    #! Added small proportion to prevent equal decile bounds and reset to 0-1 range (to prevent probs > 1.0)
-                    np.random.seed(self.seed)
-                    prob_plus_smallrandom = range01(dataset[['prob_' + k]] + (np.random.uniform(size = (n, 1)) / 1000000))
-                    prob_plus_smallrandom = np.array(prob_plus_smallrandom['prob_' + k]) # cast to a 1 dimension thing
-                    dataset["dec_" + k] = self.ntiles - pd.DataFrame(pd.qcut(prob_plus_smallrandom, self.ntiles, labels = False), index = self.feature_data[j].index)
-                    # append the different datasets
-                data_set = data_set.append(dataset)
-            final = final.append(data_set)
-        return final
-    
-    def aggregate_over_ntiles(self):
+            raise ValueError('The number of datasets in feature_data and label_data and their description pairs must be equal. The number of datasets in feature_data = %s, label_data = %s and dataset_labels = %s.' % (len(self.feature_data), len(self.label_data), len(self.dataset_labels)))
+        self._check_sample_weight()
+
+    def _check_sample_weight(self):
+        if len(self.sample_weight) not in (0, len(self.dataset_labels)):
+            raise ValueError('sample_weight must be empty or contain the weights for each of the %s dataset_labels, it contains %s.' % (len(self.dataset_labels), len(self.sample_weight)))
+
+    def _weights(self, j, index):
+        # the weights of dataset j aligned on the index of its scores, None without weights
+        if len(self.sample_weight) == 0:
+            return None
+        return np.asarray(_align_labels(self.sample_weight[j], index), dtype = np.float64)
+
+    def _model_classes(self, i):
+        # the target classes of model i, in the order of its probability columns
+        if self.probabilities is not None:
+            return list(self.classes[i])
+        return list(self.models[i].classes_)
+
+    def _scores(self, pairs = None):
+        # the scores of the (model, dataset) pairs, by default all of them. Every pair is cached on its own,
+        # so a selection only scores the pairs that it needs and that are not cached yet
+        if pairs is None:
+            pairs = [(i, j) for i in range(len(self.model_labels)) for j in range(len(self.dataset_labels))]
+        if not self.cache:
+            return self._score_all(pairs)
+        fingerprint = self._cache_fingerprint()
+        cached = dict((pair, self._cache[('scores',) + pair][1]) for pair in pairs
+                      if ('scores',) + pair in self._cache and self._cache[('scores',) + pair][0] == fingerprint)
+        missing = [pair for pair in pairs if pair not in cached]
+        if not missing:
+            self._cache_hits += 1
+            return cached
+        self._cache_misses += 1
+        for pair, score in self._score_all(missing).items():
+            self._cache[('scores',) + pair] = (fingerprint, score)
+            cached[pair] = score
+        return cached
+
+    def _score_all(self, pairs = None):
+        # scores the (model, dataset) pairs, by default all of them, concurrently when n_jobs is not 1
+        # and returns a dict with (model, dataset) positions as keys
+        if pairs is None:
+            pairs = [(i, j) for i in range(len(self.model_labels)) for j in range(len(self.dataset_labels))]
+        if self.probabilities is not None:
+            scores = {}
+            for i, j in pairs:
+                scores[(i, j)] = _given_scores(self.probabilities[i][j], self.label_data[j], len(self.classes[i]))
+            return scores
+
+        jobs = []
+        for j in range(len(self.dataset_labels)):
+            model_indices = [i for i in range(len(self.models)) if (i, j) in pairs]
+            if not model_indices:
+                continue
+            if isinstance(self.feature_data[j], pd.DataFrame):
+                jobs += [([i], j) for i in model_indices]
+            elif iter(self.feature_data[j]) is self.feature_data[j]:
+                # an iterator of chunks can be read only once, it is scored by all models in a single pass
+                jobs.append((list(range(len(self.models))), j))
+            else:
+                # an iterable of chunks is scored by all needed models in a single pass
+                jobs.append((model_indices, j))
+
+        def arguments(job):
+            model_indices, j = job
+            return ([self.models[i] for i in model_indices], self.feature_data[j], self.label_data[j], self.chunk_size, self.dataset_labels[j])
+
+        n_jobs = os.cpu_count() if self.n_jobs == -1 else self.n_jobs
+        if n_jobs == 1 or len(jobs) == 1:
+            results = [_score_dataset(*arguments(job)) for job in jobs]
+        else:
+            executor, shutdown = _executor(self.backend, n_jobs)
+            try:
+                in_process = isinstance(executor, concurrent.futures.ProcessPoolExecutor)
+                futures = []
+                for job in jobs:
+                    if in_process and not isinstance(self.feature_data[job[1]], pd.DataFrame):
+                        futures.append(None)
+                    else:
+                        futures.append(executor.submit(_score_dataset, *arguments(job)))
+                results = [_score_dataset(*arguments(job)) if future is None else future.result() for job, future in zip(jobs, futures)]
+            finally:
+                if shutdown:
+                    executor.shutdown()
+
+        scores = {}
+        for (model_indices, j), result in zip(jobs, results):
+            for i, score in zip(model_indices, result):
+                scores[(i, j)] = score
+        return scores
+    
+    def _chunked_scores(self, j, models):
+        # yields the index, the probabilities of the models at positions `models` and the labels of every chunk of dataset j
+        if self.probabilities is not None:
+            scores = [_given_scores(self.probabilities[i][j], self.label_data[j], len(self.classes[i])) for i in models]
+            n = len(scores[0][0])
+            step = self.chunk_size or max(n, 1)
+            for start in range(0, n, step):
+                yield scores[0][0][start:start + step], [y_pred[start:start + step] for index, y_pred, y_true in scores], scores[0][2][start:start + step]
+            return
+        # labels without an index (numpy arrays, lists) are in the order of the rows, they are sliced chunk by chunk
+        labels = self.label_data[j] if isinstance(self.label_data[j], pd.Series) else np.asarray(self.label_data[j])
+        offset = 0
+        for chunk in _feature_chunks(self.feature_data[j], self.chunk_size):
+            y_preds = [np.asarray(self.models[i].predict_proba(chunk)) for i in models]
+            if isinstance(labels, pd.Series):
+                y_true = _align_labels(labels, chunk.index)
+            else:
+                y_true = labels[offset:offset + len(chunk)]
+            offset += len(chunk)
+            yield chunk.index, y_preds, y_true
+
+    def _approximate_counts(self, resolutions, selection = None):
+        # two streaming passes per dataset: the first learns the ntile boundaries of every resolution, the second counts the rows per ntile
+        self._check_input_lengths()
+        models, datasets, classes = self._selection(selection)
+        columns = [self._class_columns(i, classes) for i in models]
+        if len(self.sample_weight) > 0:
+            raise ValueError('sample_weight is not supported with ntile_method approximate, use ntile_method exact.')
+        groups = []
+        tot = dict((ntiles, []) for ntiles in resolutions)
+        pos = dict((ntiles, []) for ntiles in resolutions)
+        for j in datasets:
+            if self.probabilities is None and iter(self.feature_data[j]) is self.feature_data[j]:
+                raise ValueError('Approximate ntiles read dataset %s twice, pass a dataframe or a list of chunks instead of an iterator.' % self.dataset_labels[j])
+            counts = self._count_dataset(j, models, columns, self._sketch_dataset(j, models, columns), resolutions)
+            for m, i in enumerate(models):
+                groups.extend((self.model_labels[i], self.dataset_labels[j], k) for col, k in columns[m])
+                for ntiles in resolutions:
+                    tot[ntiles].append(counts[ntiles][m][0])
+                    pos[ntiles].append(counts[ntiles][m][1])
+        return _sorted_counts(groups, tot, pos)
+
+    def _sketch_dataset(self, j, models, columns):
+        # the first pass of the approximate ntiles over dataset j: a quantile_sketch of the (probability, tie) keys
+        # of every selected class of every model at the positions `models`
+        sketches = [[quantile_sketch(self.quantile_error, self.seed) for col, k in model_columns] for model_columns in columns]
+        random = np.random.RandomState(self.seed)
+        for index, y_preds, y_true in self._chunked_scores(j, models):
+            ties = self._ties(index, random)
+            for m, y_pred in enumerate(y_preds):
+                for (col, k), sketch in zip(columns[m], sketches[m]):
+                    sketch.update(y_pred[:, col], ties)
+        return sketches
+
+    def _count_dataset(self, j, models, columns, sketches, resolutions):
+        # the second pass over dataset j: the (rows, positives) counts per class and ntile of every model and resolution,
+        # with the ntiles assigned against the cut points of the sketches of _sketch_dataset()
+        cut_points = dict((ntiles, [[sketch._cut_keys(ntiles) for sketch in model_sketches] for model_sketches in sketches]) for ntiles in resolutions)
+        counts = dict((ntiles, [np.zeros((2, len(model_columns), ntiles), dtype = np.int64) for model_columns in columns]) for ntiles in resolutions)
+        random = np.random.RandomState(self.seed)
+        for index, y_preds, y_true in self._chunked_scores(j, models):
+            ties = self._ties(index, random)
+            for m, y_pred in enumerate(y_preds):
+                for c, (col, k) in enumerate(columns[m]):
+                    for ntiles in resolutions:
+                        dec = _cut_point_ntiles(y_pred[:, col], ties, *(cut_points[ntiles][m][c] + (ntiles,)))
+                        counts[ntiles][m][0, c] += np.bincount(dec, minlength = ntiles)
+                        counts[ntiles][m][1, c] += np.bincount(dec[y_true == k], minlength = ntiles)
+        return counts
+
+    def quantile_sketches(self):
+        """ Sketch the distribution of the probabilities
+
+        A single streaming pass over the (chunks of the) data that builds a quantile_sketch of the probabilities of every
+        combination of model, dataset and target class, with the quantile_error and tie_breaking of the object.
+        For data that is split into row shards: merge the sketches of the shards, then count every shard with
+        aggregate_counts(sketches) and merge the counts. Every shard then uses the ntile boundaries of the whole dataset.
+
+        Returns
+        -------
+        Dictionary with a quantile_sketch for every (model_label, dataset_label, target_class).
+
+        Raises
+        ------
+        ValueError: If there is no match with the complete list or the input list again.
+        """
+        self._check_input_lengths()
+        models = list(range(len(self.model_labels)))
+        columns = [self._class_columns(i) for i in models]
+        sketches = {}
+        for j in range(len(self.dataset_labels)):
+            for m, model_sketches in enumerate(self._sketch_dataset(j, models, columns)):
+                for (col, k), sketch in zip(columns[m], model_sketches):
+                    sketches[(self.model_labels[m], self.dataset_labels[j], k)] = sketch
+        return sketches
+
+    def _ties(self, index, random):
+        # the keys that order equal probabilities in the approximate ntiles: the row hashes of tie_breaking 'hash',
+        # otherwise random keys drawn chunk by chunk from `random`, which gives the same keys in both passes
+        if self.tie_breaking == 'hash':
+            return _row_hash(index, self.seed)
+        if self.tie_breaking != 'random':
+            raise ValueError('Invalid tie_breaking value, it must be one of the following: random or hash.')
+        return random.randint(0, 2 ** 64, size = len(index), dtype = np.uint64)
+
+    def aggregate_over_ntiles(self, resolutions = None):
         """ Create eval_t_tot
         
         This function builds the pandas dataframe eval_t_tot and contains the aggregated output.
@@ -1638,74 +2456,196 @@ class modelplotpy(object):
         seed : int, default 999
             Making the splits reproducible.
 
+        resolutions : list of int, default None
+            Aggregate over several numbers of ntiles at once instead of `ntiles`, for example [10, 20, 100].
+            Every probability column is ranked once and the ntiles of all resolutions are derived from the same ranks.
+
         Returns
         -------
         Pandas dataframe with combination of all datasets, models, target values and ntiles.
         It already contains almost all necessary information for model plotting.
+        The counts tot, pos, neg, postot, negtot, tottot, cumpos, cumneg and cumtot are int64,
+        with sample_weight they are float64 sums of weights.
+        With resolutions the dataframe starts with an ntiles column, the aggregate of every resolution is the same as the one
+        of a modelplotpy object with that number of ntiles.
 
         Raises
         ------
         ValueError: If there is no match with the complete list or the input list again.
         """
-        scores_and_ntiles = self.prepare_scores_and_ntiles()
-        scores_and_ntiles['all'] = 1
-        ntiles_aggregate = pd.DataFrame()
-        add_origin = pd.DataFrame()
-        for i in range(len(self.model_labels)):
-            for j in self.models[i].classes_:
-                for k in self.dataset_labels:
-                    add_origin_add = pd.DataFrame({
-                        'model_label': self.model_labels[i], 'dataset_label': [k],  'target_class': [j], 'ntile': [0], 
-                        'tot': [0], 'pos': [0], 'neg': [0], 'pct': [0], 'postot': [0], 'negtot': [0], 
-                        'tottot': [0], 'pcttot': [0], 'cumpos': [0], 'cumneg': [0], 'cumtot': [0], 'cumpct': [0], 
-                        'gain': [0], 'cumgain': [0], 'gain_ref': [0], 'pct_ref': [0], 'gain_opt': [0], 
-                        'lift': [0], 'cumlift': [0], 'cumlift_ref': [1]
-                    })
-                    ntiles_agg = []
-                    ntiles_agg = pd.DataFrame(index=range(1, self.ntiles + 1))
-                    ntiles_agg['model_label'] = self.model_labels[i]
-                    ntiles_agg['dataset_label'] = k
-                    ntiles_agg['target_class'] = j
-                    ntiles_agg['ntile'] = range(1, self.ntiles + 1, 1)
-                    relvars = ['dec_%s' % j,'all']
-                    ntiles_agg['tot'] = scores_and_ntiles[(scores_and_ntiles.dataset_label == k) & (scores_and_ntiles.model_label == self.model_labels[i])][relvars].groupby('dec_%s' % j).agg('sum')
-                    scores_and_ntiles['pos'] = scores_and_ntiles.target_class == j
-                    relvars = ['dec_%s' % j, 'pos']
-                    ntiles_agg['pos'] = scores_and_ntiles[(scores_and_ntiles.dataset_label == k) & (scores_and_ntiles.model_label == self.model_labels[i])][relvars].groupby('dec_%s' % j).agg('sum')
-                    scores_and_ntiles['neg'] = scores_and_ntiles.target_class != j
-                    relvars = ['dec_%s' % j, 'neg']
-                    ntiles_agg['neg'] = scores_and_ntiles[(scores_and_ntiles.dataset_label == k) & (scores_and_ntiles.model_label == self.model_labels[i])][relvars].groupby('dec_%s' % j).agg('sum')
-                    ntiles_agg['pct'] = ntiles_agg.pos / ntiles_agg.tot
-                    ntiles_agg['postot'] = ntiles_agg.pos.sum()
-                    ntiles_agg['negtot'] = ntiles_agg.neg.sum()
-                    ntiles_agg['tottot'] = ntiles_agg.tot.sum()
-                    ntiles_agg['pcttot'] = ntiles_agg.pct.sum()
-                    ntiles_agg['cumpos'] = ntiles_agg.pos.cumsum()
-                    ntiles_agg['cumneg'] = ntiles_agg.neg.cumsum()
-                    ntiles_agg['cumtot'] = ntiles_agg.tot.cumsum()
-                    ntiles_agg['cumpct'] = ntiles_agg.cumpos / ntiles_agg.cumtot
-                    ntiles_agg['gain'] = ntiles_agg.pos / ntiles_agg.postot
-                    ntiles_agg['cumgain'] = ntiles_agg.cumpos / ntiles_agg.postot
-                    ntiles_agg['gain_ref'] = ntiles_agg.ntile / self.ntiles
-                    ntiles_agg['pct_ref'] = ntiles_agg.postot / ntiles_agg.tottot
-                    ntiles_agg['gain_opt'] = 1.0
-                    ntiles_agg.loc[(ntiles_agg.cumtot / ntiles_agg.postot) <= 1.0, 'gain_opt'] = (ntiles_agg.cumtot / ntiles_agg.postot)
-                    ntiles_agg['lift'] = ntiles_agg.pct / (ntiles_agg.postot / ntiles_agg.tottot)
-                    ntiles_agg['cumlift'] = ntiles_agg.cumpct / (ntiles_agg.postot / ntiles_agg.tottot)
-                    ntiles_agg['cumlift_ref'] = 1
-
-                    ntiles_aggregate = ntiles_aggregate.append(ntiles_agg, ignore_index = True)
-                    add_origin = pd.concat([add_origin, add_origin_add], axis = 0)
-
-        ntiles_aggregate = pd.concat([add_origin, ntiles_aggregate], axis = 0).sort_values(by=['model_label', 'dataset_label', 'target_class', 'ntile'])
-        cols = ntiles_aggregate.columns
-        return ntiles_aggregate[cols]
-    
-    def plotting_scope(self, scope = 'no_comparison', select_model_label = [], select_dataset_label = [], select_targetclass = [], select_smallest_targetclass = True):
+        if resolutions is not None:
+            resolutions = list(dict.fromkeys(resolutions))
+            return self._cached(('resolutions', tuple(resolutions)), lambda: self._aggregate_over_resolutions(resolutions)).copy()
+        return self._cached('aggregate', self._aggregate_over_ntiles).copy()
+
+    def aggregate_curves(self, points = 1000):
+        """ Create the continuous curves
+
+        Instead of aggregating over ntiles every probability column is sorted once and the cumulative positives are computed
+        at every row with a cumulative sum, so the curves have the full resolution of the data for the price of one sort.
+        Every curve is then downsampled to about `points` points with the largest triangle three buckets algorithm,
+        which keeps the shape of the cumulative gains curve, plus the integer ntiles 0 until `ntiles`.
+
+        Parameters
+        ----------
+        points : int, default 1000
+            The number of points of every curve, next to the ntiles.
+
+        Returns
+        -------
+        Pandas dataframe with the columns of aggregate_over_ntiles(). The ntile column is a float: the selected fraction of
+        the (weighted) rows times ntiles, so the curves share the x axis of the ntiles. The cumulative measures are exact
+        at every point, up to the interpolation within a run of rows with equal probabilities. At the integer ntiles they agree
+        with aggregate_over_ntiles() up to the row on the boundary. tot, pos, neg, pct, gain and lift describe the slice since
+        the previous point.
+
+        Raises
+        ------
+        ValueError: If there is no match with the complete list or the input list again.
+        """
+        return self._cached(('curves', points), lambda: self._aggregate_curves(points)).copy()
+
+    def _aggregate_curves(self, points, selection = None):
+        self._check_input_lengths()
+        models, datasets, classes = self._selection(selection)
+        scores = self._scores([(i, j) for i in models for j in datasets])
+        curves = []
+        for i in models:
+            columns = self._class_columns(i, classes)
+            for j in datasets:
+                index, y_pred, y_true = scores[(i, j)]
+                weights = self._weights(j, index)
+                # sort all (selected) classes at once, highest probabilities first
+                y_pred = y_pred[:, [col for col, k in columns]]
+                order = np.argsort(-y_pred.T, axis = 1, kind = 'stable')
+                for c, (col, k) in enumerate(columns):
+                    statistics = _curve_statistics(y_pred[order[c], c], np.asarray(y_true == k)[order[c]],
+                                                   None if weights is None else weights[order[c]], self.ntiles, points)
+                    curves.append(((self.model_labels[i], self.dataset_labels[j], k), statistics))
+        curves.sort(key = lambda curve: curve[0])
+        columns = {}
+        for position, column in enumerate(('model_label', 'dataset_label', 'target_class')):
+            labels = np.empty(sum(len(statistics['ntile']) for group, statistics in curves), dtype = object)
+            labels[:] = [group[position] for group, statistics in curves for n in range(len(statistics['ntile']))]
+            columns[column] = labels
+        for column in _AGGREGATE_COLUMNS[3:]:
+            columns[column] = np.concatenate([statistics[column] for group, statistics in curves])
+        return pd.DataFrame(columns, columns = _AGGREGATE_COLUMNS, copy = False)
+
+    def aggregate_counts(self, sketches = None):
+        """ Create the counts per ntile
+
+        The number of rows (tot) and of rows with the target class (pos) for every combination of model, dataset, target class and ntile.
+        These counts are additive, the counts of shards of the data can be merged with ntile_counts.merge() into the counts of all data.
+
+        Parameters
+        ----------
+        sketches : dict, default None
+            Assign the ntiles against the cut points of these quantile sketches instead of ranking the data of the object,
+            a dict with a quantile_sketch for every (model_label, dataset_label, target_class) like quantile_sketches() returns.
+            With the merged sketches of all row shards of a dataset, the merged counts of the shards are those of the whole
+            dataset: exactly, with tie_breaking 'hash' and sketches without compactions, otherwise within the quantile_error.
+            The data is read once, so the feature data can be an iterator of chunks.
+
+        Returns
+        -------
+        ntile_counts object, its to_frame() method returns the result of aggregate_over_ntiles().
+
+        Raises
+        ------
+        ValueError: If there is no match with the complete list or the input list again, or a sketch is missing.
+        """
+        if sketches is not None:
+            return self._sketch_counts(sketches)
+        return self._cached('counts', self._aggregate_counts)
+
+    def _sketch_counts(self, sketches):
+        # counts every model and dataset against the cut points of the given sketches, in a single pass over the data
+        self._check_input_lengths()
+        if len(self.sample_weight) > 0:
+            raise ValueError('sample_weight is not supported with quantile sketches, the sketches count rows and not weights.')
+        models = list(range(len(self.model_labels)))
+        columns = [self._class_columns(i) for i in models]
+        groups = []
+        tot, pos = {self.ntiles: []}, {self.ntiles: []}
+        for j in range(len(self.dataset_labels)):
+            dataset_sketches = []
+            for m, i in enumerate(models):
+                group_sketches = []
+                for col, k in columns[m]:
+                    group = (self.model_labels[i], self.dataset_labels[j], k)
+                    if group not in sketches:
+                        raise ValueError('There is no quantile sketch for model %s, dataset %s and target class %s.' % group)
+                    group_sketches.append(sketches[group])
+                    groups.append(group)
+                dataset_sketches.append(group_sketches)
+            counts = self._count_dataset(j, models, columns, dataset_sketches, [self.ntiles])[self.ntiles]
+            for m in range(len(models)):
+                tot[self.ntiles].append(counts[m][0])
+                pos[self.ntiles].append(counts[m][1])
+        return _sorted_counts(groups, tot, pos)[self.ntiles]
+
+    def _aggregate_over_ntiles(self):
+        return self.aggregate_counts().to_frame()
+
+    def _aggregate_over_resolutions(self, resolutions):
+        counts = self._resolution_counts(resolutions)
+        frames = []
+        for ntiles in resolutions:
+            ntiles_aggregate = counts[ntiles].to_frame()
+            ntiles_aggregate.insert(0, 'ntiles', ntiles)
+            frames.append(ntiles_aggregate)
+        return pd.concat(frames, ignore_index = True)
+
+    def _aggregate_counts(self):
+        return self._resolution_counts([self.ntiles])[self.ntiles]
+
+    def _selection(self, selection):
+        # the model positions, dataset positions and target classes of a selection, None selects everything
+        if selection is None:
+            return list(range(len(self.model_labels))), list(range(len(self.dataset_labels))), None
+        return selection
+
+    def _class_columns(self, i, classes = None):
+        # the (probability column, target class) pairs of model i, limited to the given target classes
+        return [(col, k) for col, k in enumerate(self._model_classes(i)) if classes is None or k in classes]
+
+    def _resolution_counts(self, resolutions, selection = None):
+        # a dict with the ntile_counts of every number of ntiles in resolutions, of all or of the selected models, datasets and classes
+        if self.ntile_method not in ('exact', 'approximate'):
+            raise ValueError('Invalid ntile_method value, it must be one of the following: exact or approximate.')
+        if self.ntile_method == 'approximate':
+            return self._approximate_counts(resolutions, selection)
+        # straight from the (rows, classes) probabilities of every model and dataset, the wide scores_and_ntiles frame is never built
+        # and every model and dataset is ranked once for all resolutions
+        self._check_input_lengths()
+        models, datasets, classes = self._selection(selection)
+        scores = self._scores([(i, j) for i in models for j in datasets])
+        groups = []
+        tot = dict((ntiles, []) for ntiles in resolutions)
+        pos = dict((ntiles, []) for ntiles in resolutions)
+        for i in models:
+            columns = self._class_columns(i, classes)
+            for j in datasets:
+                index, y_pred, y_true = scores[(i, j)]
+                weights = self._weights(j, index)
+                # only the selected classes are ranked, the rows of other classes are negatives
+                positions, denominator = _rank_positions(y_pred[:, [col for col, k in columns]], self.seed, self.tie_breaking, index, weights)
+                label_codes = pd.Index([k for col, k in columns]).get_indexer(y_true)
+                groups.extend((self.model_labels[i], self.dataset_labels[j], k) for col, k in columns)
+                for ntiles in resolutions:
+                    pair_tot, pair_pos = _class_ntile_counts(positions, denominator, label_codes, ntiles, weights)
+                    tot[ntiles].append(pair_tot)
+                    pos[ntiles].append(pair_pos)
+        return _sorted_counts(groups, tot, pos)
+
+    def plotting_scope(self, scope = 'no_comparison', select_model_label = [], select_dataset_label = [], select_targetclass = [], select_smallest_targetclass = True, bootstrap = 0, confidence = 0.95, curve_points = 0):
         """ Create plot_input
         
         This function builds the pandas dataframe plot_input wich is a subset of scores_and_ntiles.
         The dataset is the subset of scores_and_ntiles that is dependent of 1 of the 4 evaluation types that a user can request.
+        Unless the complete aggregate is already cached, only the selected models are scored on the selected datasets
+        and only the selected target classes are ranked and aggregated.
         
         How is this function evaluated?
         There are 4 different perspectives to evaluate model plots.
@@ -1751,6 +2691,19 @@ class modelplotpy(object):
             Should the plot only contain the results of the smallest targetclass.
             If True, the specific target is defined from the first dataset.
 
+        bootstrap : int, default 0
+            The number of bootstrap replicates of the counts, with 0 no confidence bands are added.
+            Otherwise plot_input gets the columns cumgain_lower, cumgain_upper, cumlift_lower, cumlift_upper, cumpct_lower
+            and cumpct_upper for plot_cumgains(), plot_cumlift() and plot_cumresponse() with confidence_bands = True.
+            The replicates are drawn with the seed, n_jobs and backend of the object (see ntile_counts.bootstrap).
+
+        confidence : float, default 0.95
+            The coverage of the bootstrap confidence bands.
+
+        curve_points : int, default 0
+            With 0 the curves are plotted at the ntiles. Otherwise plot_input holds continuous curves of about `curve_points`
+            points each (see aggregate_curves), these cannot be combined with bootstrap confidence bands.
+
         Returns
         -------
         Pandas dataframe, a subset of scores_and_ntiles, for all dataset, model and target value combinations for all ntiles.
@@ -1758,18 +2711,22 @@ class modelplotpy(object):
 
         Raises
         ------
-        ValueError: If the wrong `scope` value is specified.
+        ValueError: If the wrong `scope` value is specified or both `bootstrap` and `curve_points` are specified.
         """
-        ntiles_aggregate = self.aggregate_over_ntiles()
-        ntiles_aggregate['scope'] = scope
+        key, compute = self._aggregate_key(bootstrap, confidence, curve_points)
+        selection = self._scope_selection(scope, select_model_label, select_dataset_label, select_targetclass, select_smallest_targetclass)
+        plot_input = self._select(key, compute, *selection).assign(scope = scope)
+        return plot_input
 
+    def _scope_selection(self, scope = 'no_comparison', select_model_label = [], select_dataset_label = [], select_targetclass = [], select_smallest_targetclass = True):
+        # the (model labels, dataset labels, target classes) of a scope of plotting_scope()
         if scope not in ('no_comparison', 'compare_models', 'compare_datasets', 'compare_targetclasses'):
             raise ValueError('Invalid scope value, it must be one of the following: no_comparison, compare_models, compare_datasets or compare_targetclasses.')
         
         # check parameters
         select_model_label = check_input(select_model_label, self.model_labels, 'select_model_label')
         select_dataset_label = check_input(select_dataset_label, self.dataset_labels, 'select_dataset_label')
-        select_targetclass = check_input(select_targetclass, list(self.models[1].classes_), 'select_targetclass')
+        select_targetclass = check_input(select_targetclass, self._model_classes(0), 'select_targetclass')
 
         if scope == 'no_comparison':
             print('Default scope value no_comparison selected, single evaluation line will be plotted.')
@@ -1784,14 +2741,11 @@ class modelplotpy(object):
             if len(select_targetclass) >= 1:
                 select_targetclass = select_targetclass
             elif select_smallest_targetclass == True:
-                select_targetclass = [self.label_data[0].value_counts(ascending = True).idxmin()]
+                select_targetclass = [pd.Series(self.label_data[0]).value_counts(ascending = True).idxmin()]
                 print("The label with smallest class is %s" % select_targetclass[0])
             else:
-                select_targetvalue = list(self.models[1].classes_)
-            plot_input = ntiles_aggregate[
-                (ntiles_aggregate.model_label == select_model_label[0]) & 
-                (ntiles_aggregate.dataset_label == select_dataset_label[0]) & 
-                (ntiles_aggregate.target_class == select_targetclass[0])]
+                select_targetclass = self._model_classes(0)
+            selection = (select_model_label[:1], select_dataset_label[:1], select_targetclass[:1])
             print('Target class %s, dataset %s and model %s.' % (select_targetclass[0], select_dataset_label[0], select_model_label[0]))
         elif scope == 'compare_models':
             print('compare models')
@@ -1806,14 +2760,11 @@ class modelplotpy(object):
             if len(select_targetclass) >= 1:
                 select_targetclass = select_targetclass
             elif select_smallest_targetclass == True:
-                select_targetclass = [self.label_data[0].value_counts(ascending = True).idxmin()]
+                select_targetclass = [pd.Series(self.label_data[0]).value_counts(ascending = True).idxmin()]
                 print("The label with smallest class is %s" % select_targetclass)
             else:
-                select_targetclass = list(self.models[1].classes_)
-            plot_input = ntiles_aggregate[
-                (ntiles_aggregate.model_label.isin(select_model_label)) &
-                (ntiles_aggregate.dataset_label == select_dataset_label[0]) &
-                (ntiles_aggregate.target_class == select_targetclass[0])]
+                select_targetclass = self._model_classes(0)
+            selection = (select_model_label, select_dataset_label[:1], select_targetclass[:1])
         elif scope == 'compare_datasets':
             print('compare datasets')
             if len(select_model_label) >= 1:
@@ -1827,14 +2778,11 @@ class modelplotpy(object):
             if len(select_targetclass) >= 1:
                 select_targetclass = select_targetclass
             elif select_smallest_targetclass == True:
-                select_targetclass = [self.label_data[0].value_counts(ascending = True).idxmin()]
+                select_targetclass = [pd.Series(self.label_data[0]).value_counts(ascending = True).idxmin()]
                 print("The label with smallest class is %s" % select_targetclass)
             else:
-                select_targetclass = list(self.models[1].classes_)
-            plot_input = ntiles_aggregate[
-                (ntiles_aggregate.model_label == select_model_label[0]) &
-                (ntiles_aggregate.dataset_label.isin(select_dataset_label)) &
-                (ntiles_aggregate.target_class == select_targetclass[0])]
+                select_targetclass = self._model_classes(0)
+            selection = (select_model_label[:1], select_dataset_label, select_targetclass[:1])
         else: # scope == 'compare_targetclasses'
             print('compare target classes')
             if len(select_model_label) >= 1:
@@ -1848,9 +2796,117 @@ class modelplotpy(object):
             if len(select_targetclass) >= 2:
                 select_targetclass = select_targetclass
             else:
-                select_targetclass = list(self.models[1].classes_)
-            plot_input = ntiles_aggregate[
-                (ntiles_aggregate.model_label == select_model_label[0]) &
-                (ntiles_aggregate.dataset_label == select_dataset_label[0]) &
-                (ntiles_aggregate.target_class.isin(select_targetclass))]
-        return plot_input
+                select_targetclass = self._model_classes(0)
+            selection = (select_model_label[:1], select_dataset_label[:1], select_targetclass)
+        return selection
+
+    def _aggregate_key(self, bootstrap, confidence, curve_points):
+        # the cache key of the complete aggregate that plotting_scope() selects from and the function that computes it,
+        # of all or of the (model positions, dataset positions, target classes) selection
+        if bootstrap and curve_points:
+            raise ValueError('Bootstrap confidence bands are only available at the ntiles, use either bootstrap or curve_points.')
+        if curve_points:
+            key = ('curves', curve_points)
+            compute = lambda selection = None: self._aggregate_curves(curve_points, selection)
+        elif bootstrap:
+            key = ('bootstrap', bootstrap, confidence)
+            compute = lambda selection = None: self._resolution_counts([self.ntiles], selection)[self.ntiles].bootstrap(bootstrap, confidence, self.seed, self.n_jobs, backend = self.backend)
+        else:
+            key = 'aggregate'
+            compute = lambda selection = None: self._resolution_counts([self.ntiles], selection)[self.ntiles].to_frame()
+        return key, compute
+
+    def _select(self, key, compute, model_labels, dataset_labels, target_classes):
+        # the aggregate rows of the selected models, datasets and target classes. When the complete aggregate is not cached
+        # only the selected models are scored on the selected datasets and only the selected classes are ranked and aggregated
+        if not self._is_cached(key):
+            selection = ([i for i, model_label in enumerate(self.model_labels) if model_label in model_labels],
+                         [j for j, dataset_label in enumerate(self.dataset_labels) if dataset_label in dataset_labels],
+                         list(dict.fromkeys(target_classes)))
+            key = ('selection', key, tuple(selection[0]), tuple(selection[1]), tuple(selection[2]))
+            compute = lambda compute = compute, selection = selection: compute(selection)
+        ntiles_aggregate = self._cached(key, compute)
+        # the rows of every model, dataset and target class, so selecting a scope takes lookups instead of masks over all rows
+        blocks = self._cached(('blocks', key), lambda: _block_index(ntiles_aggregate))
+        if key[0] == 'selection':
+            self._evict_selections(key)
+        return _select_blocks(ntiles_aggregate, blocks, model_labels, dataset_labels, target_classes)
+
+    def _evict_selections(self, key):
+        # marks the selection `key` as the most recently used one and removes the least recently used selections with their
+        # block index beyond cache_selections. The cache is a dict in insertion order, a used selection is moved to its end
+        if key in self._cache:
+            self._cache[key] = self._cache.pop(key)
+        selections = [cached for cached in self._cache if isinstance(cached, tuple) and cached[0] == 'selection']
+        for selection in selections[:max(0, len(selections) - self.cache_selections)]:
+            del self._cache[selection]
+            self._cache.pop(('blocks', selection), None)
+
+    def plot_report(self, plan, n_jobs = 1, cache = None):
+        """ Create a batch of plots in one run
+
+        Every scope of the plan is selected from the same complete aggregate, which is computed once for the whole plan
+        (once per combination of bootstrap, confidence and curve_points), instead of one plotting_scope() call per scope.
+        Then the plots of all scopes are rendered headless and saved by render_plots(), pyplot keeps none of the figures.
+
+        Parameters
+        ----------
+        plan : list of dict
+            One dict per scope with the arguments of plotting_scope(): scope, select_model_label, select_dataset_label,
+            select_targetclass, select_smallest_targetclass, bootstrap, confidence and curve_points, and a `plots` list of
+            (plot, filename) or (plot, filename, kwargs) tuples. plot is the name of a plot function, for example 'plot_cumgains',
+            and kwargs are its other arguments, for example {'highlight_ntile': 2} or the costs and profit of plot_roi().
+
+        n_jobs : int, default 1
+            Number of processes that render the plots, -1 uses all cores (see render_plots).
+
+        cache : render_cache, default None
+            Copy the plots that did not change since an earlier run from this cache instead of rendering them.
+
+        Returns
+        -------
+        Dictionary with the written `files` and the `timings` in seconds of the stages: computing the aggregates (`aggregate`),
+        selecting the scopes (`scope`), building the plots (`render`) and drawing and writing the files (`save`).
+        The render and save timings add up the time of all plots, with n_jobs they run in parallel.
+
+        Raises
+        ------
+        ValueError: If a key, scope, selection or plot of the plan is invalid, the plan is checked before anything is computed.
+        """
+        # check the plan, select the scopes and collect the aggregates they need before anything is computed
+        timings = dict.fromkeys(('aggregate', 'scope', 'render', 'save'), 0.0)
+        scopes = []
+        for entry in plan:
+            entry = dict(entry)
+            for name in entry:
+                if name not in _PLAN_KEYS:
+                    raise ValueError('Invalid plan key %s, it must be one of the following: %s.' % (name, ', '.join(_PLAN_KEYS)))
+            plots = entry.pop('plots', [])
+            for plot in plots:
+                if plot[0] not in _PLOTS:
+                    raise ValueError('Invalid plot value, it must be one of the following: %s.' % ', '.join(_PLOTS))
+            key, compute = self._aggregate_key(entry.pop('bootstrap', 0), entry.pop('confidence', 0.95), entry.pop('curve_points', 0))
+            start = time.perf_counter()
+            selection = self._scope_selection(**entry)
+            timings['scope'] += time.perf_counter() - start
+            scopes.append((entry.get('scope', 'no_comparison'), selection, key, compute, plots))
+
+        start = time.perf_counter()
+        aggregates = {}
+        for scope, selection, key, compute, plots in scopes:
+            if key not in aggregates:
+                ntiles_aggregate = self._cached(key, compute)
+                aggregates[key] = (ntiles_aggregate, self._cached(('blocks', key), lambda: _block_index(ntiles_aggregate)))
+        timings['aggregate'] = time.perf_counter() - start
+
+        jobs = []
+        for scope, selection, key, compute, plots in scopes:
+            start = time.perf_counter()
+            plot_input = _select_blocks(*(aggregates[key] + selection)).assign(scope = scope)
+            timings['scope'] += time.perf_counter() - start
+            jobs.extend((plot[0], plot_input, plot[2] if len(plot) > 2 else {}, plot[1]) for plot in plots)
+        rendered = render_plots(jobs, n_jobs, cache = cache)
+        timings['render'] = float(rendered.render.sum())
+        timings['save'] = float(rendered.save.sum())
+        files = rendered.filename.tolist()
+        return {'files': files, 'timings': timings}
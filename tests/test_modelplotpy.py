@@ -1,25 +1,743 @@
-#!/usr/bin/env python
-# -*- coding: utf-8 -*-
-
-"""Tests for `modelplotpy` package."""
-
-import pytest
-
-
-from modelplotpy import modelplotpy
-
-
-@pytest.fixture
-def response():
-    """Sample pytest fixture.
-
-    See more at: http://doc.pytest.org/en/latest/fixture.html
-    """
-    # import requests
-    # return requests.get('https://github.com/audreyr/cookiecutter-pypackage')
-
-
-def test_content(response):
-    """Sample pytest test function with the pytest fixture as an argument."""
-    # from bs4 import BeautifulSoup
-    # assert 'GitHub' in BeautifulSoup(response.content).title.string
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `modelplotpy` package."""
+
+import gc
+import io
+import os
+import concurrent.futures
+import pytest
+import tracemalloc
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from modelplotpy import modelplotpy, plot_cumgains, plot_cumlift, plot_response, plot_roi, plot_all, render_plots, render_cache
+
+
+class ThresholdModel(object):
+    """Minimal classifier that only looks at the first feature."""
+
+    classes_ = np.array(['no', 'yes'])
+
+    def __init__(self, slope = 1.0):
+        self.slope = slope
+
+    def predict_proba(self, X):
+        p = 1 / (1 + np.exp(-self.slope * np.asarray(X)[:, 0]))
+        return np.column_stack([1 - p, p])
+
+
+class CopyingModel(ThresholdModel):
+    """Classifier that copies all the feature data it gets, like most models do."""
+
+    def predict_proba(self, X):
+        return ThresholdModel.predict_proba(self, np.array(X, dtype = np.float64, copy = True))
+
+
+def make_dataset(n = 1000, columns = 3, seed = 0):
+    X = pd.DataFrame(np.random.RandomState(seed).normal(size = (n, columns)))
+    noise = np.random.RandomState(seed + 1).normal(size = n)
+    y = pd.Series(np.where(X[0] + noise > 1, 'yes', 'no'), index = X.index)
+    return X, y
+
+
+@pytest.fixture
+def response():
+    """Sample pytest fixture.
+
+    See more at: http://doc.pytest.org/en/latest/fixture.html
+    """
+    # import requests
+    # return requests.get('https://github.com/audreyr/cookiecutter-pypackage')
+
+
+def test_content(response):
+    """Sample pytest test function with the pytest fixture as an argument."""
+    # from bs4 import BeautifulSoup
+    # assert 'GitHub' in BeautifulSoup(response.content).title.string
+
+
+def test_assign_ntiles_matches_qcut():
+    """The rank based ntiles are equal to the per class pd.qcut ntiles."""
+    from modelplotpy import assign_ntiles, range01
+
+    probabilities = np.random.RandomState(1).dirichlet([1, 1, 1], size = 1001)
+    for ntiles in (10, 20, 100):
+        result = assign_ntiles(probabilities, ntiles = ntiles, seed = 999)
+        for col in range(probabilities.shape[1]):
+            np.random.seed(999)
+            jittered = range01(probabilities[:, [col]] + np.random.uniform(size = (1001, 1)) / 1000000)[:, 0]
+            expected = ntiles - pd.qcut(jittered, ntiles, labels = False)
+            assert (result[:, col] == expected).all()
+
+
+def test_scoring_does_not_copy_feature_data():
+    """Scoring builds the probability, label and ntile columns without copying the (wide) feature matrix."""
+    X, y = make_dataset(n = 20000, columns = 200)
+    obj = modelplotpy(feature_data = [X], label_data = [y], dataset_labels = ['test data'],
+                      models = [ThresholdModel()], model_labels = ['threshold'])
+    tracemalloc.start()
+    scores_and_ntiles = obj.prepare_scores_and_ntiles()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < X.memory_usage(deep = True).sum() / 4
+    assert list(scores_and_ntiles.columns) == ['prob_no', 'prob_yes', 'target_class', 'dataset_label', 'model_label', 'dec_no', 'dec_yes']
+    assert (scores_and_ntiles.target_class == y).all()
+
+
+@pytest.fixture
+def two_models():
+    X_train, y_train = make_dataset(n = 3000, seed = 0)
+    X_test, y_test = make_dataset(n = 2000, seed = 10)
+    return modelplotpy(feature_data = [X_train, X_test], label_data = [y_train, y_test],
+                       dataset_labels = ['train data', 'test data'],
+                       models = [ThresholdModel(1.0), ThresholdModel(0.5)], model_labels = ['steep', 'flat'])
+
+
+def test_prepare_scores_and_ntiles(two_models):
+    scores_and_ntiles = two_models.prepare_scores_and_ntiles()
+    assert scores_and_ntiles.shape[0] == 2 * (3000 + 2000)
+    assert scores_and_ntiles.groupby(['model_label', 'dataset_label']).dec_yes.nunique().eq(10).all()
+    assert scores_and_ntiles.dec_yes.dtype == np.int64
+
+
+def test_aggregate_over_ntiles(two_models):
+    ntiles_aggregate = two_models.aggregate_over_ntiles()
+    # models x datasets x classes x (ntiles + origin)
+    assert ntiles_aggregate.shape[0] == 2 * 2 * 2 * 11
+    groups = ntiles_aggregate.groupby(['model_label', 'dataset_label', 'target_class'])
+    assert (groups.tot.sum() == groups.tottot.max()).all()
+    assert (groups.cumgain.max() == 1).all()
+    assert (ntiles_aggregate.pos + ntiles_aggregate.neg == ntiles_aggregate.tot).all()
+    first_ntile = ntiles_aggregate[ntiles_aggregate.ntile == 1]
+    assert (first_ntile.cumlift[first_ntile.target_class == 'yes'] > 1).all()
+    counts = ['tot', 'pos', 'neg', 'postot', 'negtot', 'tottot', 'cumpos', 'cumneg', 'cumtot']
+    assert (ntiles_aggregate[counts].dtypes == np.int64).all()
+
+
+def test_chunked_scoring(two_models):
+    expected = two_models.prepare_scores_and_ntiles()
+    two_models.chunk_size = 256
+    two_models.clear_cache()
+    assert two_models.prepare_scores_and_ntiles().equals(expected)
+    # an iterable of chunks, the labels are aligned on the index of the chunks
+    two_models.chunk_size = None
+    X_train = two_models.feature_data[0]
+    two_models.feature_data[0] = (X_train.iloc[start:start + 700] for start in range(0, X_train.shape[0], 700))
+    assert two_models.prepare_scores_and_ntiles().equals(expected)
+
+
+def test_chunked_scoring_peak_memory():
+    """The model copies the feature data it gets, with chunks the peak memory is bounded by the chunk size."""
+    X, y = make_dataset(n = 20000, columns = 200)
+    obj = modelplotpy(feature_data = [X], label_data = [y], dataset_labels = ['test data'],
+                      models = [CopyingModel()], model_labels = ['copying'], chunk_size = 1000)
+    tracemalloc.start()
+    obj.prepare_scores_and_ntiles()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < X.memory_usage(deep = True).sum() / 4
+
+
+@pytest.mark.parametrize('backend', ['threads', 'processes'])
+def test_parallel_scoring(two_models, backend):
+    expected = two_models.prepare_scores_and_ntiles()
+    two_models.n_jobs = 4
+    two_models.backend = backend
+    two_models.clear_cache()
+    assert two_models.prepare_scores_and_ntiles().equals(expected)
+
+
+def test_parallel_scoring_invalid_backend(two_models):
+    two_models.n_jobs = 2
+    two_models.backend = 'gpu'
+    two_models.clear_cache()
+    with pytest.raises(ValueError):
+        two_models.prepare_scores_and_ntiles()
+
+
+class CountingModel(ThresholdModel):
+    """Classifier that counts the rows it scores."""
+
+    def __init__(self, slope = 1.0):
+        ThresholdModel.__init__(self, slope)
+        self.scored = 0
+
+    def predict_proba(self, X):
+        self.scored += len(X)
+        return ThresholdModel.predict_proba(self, X)
+
+
+def test_cache():
+    X, y = make_dataset(n = 1000)
+    model = CountingModel()
+    obj = modelplotpy(feature_data = [X], label_data = [y], dataset_labels = ['test data'],
+                      models = [model], model_labels = ['counting'])
+    for scope in ('no_comparison', 'compare_models', 'compare_datasets', 'compare_targetclasses'):
+        obj.plotting_scope(scope = scope, select_targetclass = ['no', 'yes'])
+    assert model.scored == 1000
+    # the scopes aggregate only the selected target classes: the selection of 'no' and its block index are reused by
+    # the second and third scope, the scores by the fourth scope that selects both classes
+    assert obj.cache_info()['hits'] == 5
+    # the cached aggregate is not changed by its users
+    assert 'scope' not in obj.aggregate_over_ntiles().columns
+    obj.ntiles = 20
+    assert obj.aggregate_over_ntiles().ntile.max() == 20
+    assert model.scored == 2000
+    obj.models[0] = CountingModel(2.0)
+    obj.aggregate_over_ntiles()
+    assert obj.models[0].scored == 1000
+    # two selections with their block index and the scores, the counts and the aggregate,
+    # then the scores, the counts and the aggregate twice
+    assert obj.cache_info()['misses'] == 13
+
+
+def test_from_scores(two_models):
+    expected = two_models.aggregate_over_ntiles()
+    probabilities = [[model.predict_proba(X) for X in two_models.feature_data] for model in two_models.models]
+    obj = modelplotpy.from_scores(probabilities = probabilities, classes = ['no', 'yes'],
+                                  label_data = [y.to_numpy() for y in two_models.label_data],
+                                  dataset_labels = ['train data', 'test data'], model_labels = ['steep', 'flat'])
+    assert obj.feature_data == [] and obj.models == []
+    pd.testing.assert_frame_equal(obj.aggregate_over_ntiles(), expected)
+    plot_input = obj.plotting_scope(scope = 'compare_models')
+    assert set(plot_input.model_label) == {'steep', 'flat'}
+    with pytest.raises(ValueError):
+        modelplotpy.from_scores(probabilities = [[probabilities[0][0]]], classes = ['no', 'yes'],
+                                label_data = [two_models.label_data[1]], dataset_labels = ['test data'], model_labels = ['steep']).aggregate_over_ntiles()
+    with pytest.raises(ValueError):
+        modelplotpy.from_scores(probabilities = probabilities, classes = ['no', 'yes'], label_data = two_models.label_data,
+                                dataset_labels = ['train data'], model_labels = ['steep', 'flat'])
+
+
+def test_from_scores_integer_classes(two_models):
+    # classes that are not strings, shared by all models or given per model
+    expected = two_models.aggregate_over_ntiles()
+    probabilities = [[model.predict_proba(X) for X in two_models.feature_data] for model in two_models.models]
+    label_data = [(y == 'yes').astype(int).to_numpy() for y in two_models.label_data]
+    for classes in ([0, 1], np.array([0, 1]), [[0, 1], (0, 1)]):
+        obj = modelplotpy.from_scores(probabilities = probabilities, classes = classes, label_data = label_data,
+                                      dataset_labels = ['train data', 'test data'], model_labels = ['steep', 'flat'])
+        assert obj.classes == [[0, 1], [0, 1]]
+        assert {'prob_0', 'prob_1', 'dec_0', 'dec_1'} <= set(obj.prepare_scores_and_ntiles().columns)
+        result = obj.aggregate_over_ntiles()
+        assert set(result.target_class) == {0, 1}
+        assert (result.drop(columns = 'target_class').to_numpy() == expected.drop(columns = 'target_class').to_numpy()).all()
+    plot_input = obj.plotting_scope(select_targetclass = [1])
+    assert (plot_input.target_class == 1).all()
+
+def test_hash_tie_breaking_does_not_depend_on_row_order():
+    from modelplotpy import assign_ntiles
+
+    index = pd.Index(np.arange(5000) * 7)
+    # few distinct scores, so most rows are tied
+    scores = np.random.RandomState(3).randint(0, 5, size = (5000, 2)) / 4
+    state = np.random.get_state()[1].copy()
+    result = pd.DataFrame(assign_ntiles(scores, 10, tie_breaking = 'hash', index = index), index = index)
+    shuffled = np.random.RandomState(4).permutation(5000)
+    result_shuffled = pd.DataFrame(assign_ntiles(scores[shuffled], 10, tie_breaking = 'hash', index = index[shuffled]), index = index[shuffled])
+    pd.testing.assert_frame_equal(result_shuffled.loc[index], result)
+    assert (result.apply(pd.Series.value_counts) == 500).all().all()
+    # the global random state is not used
+    assert (np.random.get_state()[1] == state).all()
+    with pytest.raises(ValueError):
+        assign_ntiles(scores, 10, tie_breaking = 'sorted')
+
+
+def test_hash_tie_breaking_depends_on_seed():
+    from modelplotpy import assign_ntiles
+
+    # all rows tied on the default RangeIndex, the seed decides their order
+    scores = np.zeros(1000)
+    results = [assign_ntiles(scores, 10, seed = seed, tie_breaking = 'hash') for seed in (1, 2, 1)]
+    assert (results[0] == results[2]).all()
+    assert (results[0] != results[1]).mean() > 0.5
+    assert (np.bincount(results[1])[1:] == 100).all()
+
+
+def test_compact_scores(two_models):
+    expected = two_models.prepare_scores_and_ntiles()
+    ntiles_aggregate = two_models.aggregate_over_ntiles()
+    two_models.compact = True
+    scores_and_ntiles = two_models.prepare_scores_and_ntiles()
+    assert scores_and_ntiles.prob_yes.dtype == np.float32
+    assert scores_and_ntiles.dec_yes.dtype == np.uint8
+    assert isinstance(scores_and_ntiles.model_label.dtype, pd.CategoricalDtype)
+    assert (scores_and_ntiles.target_class.astype(object) == expected.target_class).all()
+    assert (scores_and_ntiles.dec_no == expected.dec_no).all()
+    assert scores_and_ntiles.memory_usage(deep = True).sum() < expected.memory_usage(deep = True).sum() / 4
+    pd.testing.assert_frame_equal(two_models.aggregate_over_ntiles(), ntiles_aggregate)
+
+
+def test_aggregate_counts_match_groupby(two_models):
+    scores_and_ntiles = two_models.prepare_scores_and_ntiles()
+    ntiles_aggregate = two_models.aggregate_over_ntiles().set_index(['model_label', 'dataset_label', 'target_class', 'ntile'])
+    for k in ('no', 'yes'):
+        counts = scores_and_ntiles.assign(pos = scores_and_ntiles.target_class == k).groupby(['model_label', 'dataset_label', 'dec_' + k])
+        expected = counts.pos.agg(['size', 'sum'])
+        result = ntiles_aggregate.xs(k, level = 'target_class')
+        assert (result.loc[expected.index, 'tot'].to_numpy() == expected['size'].to_numpy()).all()
+        assert (result.loc[expected.index, 'pos'].to_numpy() == expected['sum'].to_numpy()).all()
+
+
+def test_multiclass_counts():
+    classes = ['class_%02d' % k for k in range(40)]
+    random = np.random.RandomState(0)
+    probabilities = random.dirichlet([0.5] * len(classes), size = 3000)
+    labels = pd.Series(np.array(classes)[[random.choice(len(classes), p = p) for p in probabilities]])
+    obj = modelplotpy.from_scores([[probabilities]], classes, [labels], ['test'], ['model'])
+    ntiles_aggregate = obj.aggregate_over_ntiles().set_index(['target_class', 'ntile'])
+    scores_and_ntiles = obj.prepare_scores_and_ntiles()
+    for k in classes:
+        counts = scores_and_ntiles.assign(pos = scores_and_ntiles.target_class == k).groupby('dec_' + k).pos.agg(['size', 'sum'])
+        assert (ntiles_aggregate.loc[k].loc[counts.index, 'tot'].to_numpy() == counts['size'].to_numpy()).all()
+        assert (ntiles_aggregate.loc[k].loc[counts.index, 'pos'].to_numpy() == counts['sum'].to_numpy()).all()
+
+
+def test_sample_weight(two_models):
+    kwargs = dict(feature_data = two_models.feature_data, label_data = two_models.label_data, dataset_labels = two_models.dataset_labels,
+                  models = two_models.models, model_labels = ['steep', 'flat'])
+    unweighted = two_models.aggregate_over_ntiles()
+    # equal weights give the same ntiles, with the counts multiplied by the weight
+    doubled = modelplotpy(sample_weight = [np.full(len(X), 2.0) for X in two_models.feature_data], **kwargs).aggregate_over_ntiles()
+    for column in ('tot', 'pos', 'neg'):
+        assert (doubled[column] == 2 * unweighted[column]).all()
+    assert doubled.tot.dtype == np.float64 and unweighted.tot.dtype == np.int64
+    pd.testing.assert_frame_equal(doubled.drop(columns = ['tot', 'pos', 'neg', 'postot', 'negtot', 'tottot', 'cumpos', 'cumneg', 'cumtot']),
+                                  unweighted.drop(columns = ['tot', 'pos', 'neg', 'postot', 'negtot', 'tottot', 'cumpos', 'cumneg', 'cumtot']))
+
+    # every ntile holds an equal share of the weight, up to the largest weight
+    weights = [pd.Series(np.random.RandomState(j).choice([1.0, 5.0, 20.0], size = len(X)), index = X.index) for j, X in enumerate(two_models.feature_data)]
+    obj = modelplotpy(sample_weight = weights, **kwargs)
+    counts = obj.aggregate_counts()
+    totals = np.array([weights[two_models.dataset_labels.index(dataset_label)].sum() for model_label, dataset_label, k in counts.groups])
+    assert np.allclose(counts.tot.sum(axis = 1), totals)
+    assert (np.abs(counts.tot - totals[:, None] / 10) <= 20).all()
+    scores_and_ntiles = obj.prepare_scores_and_ntiles().assign(weight = pd.concat(weights * 2))
+    expected = scores_and_ntiles[scores_and_ntiles.target_class == 'yes'].groupby(['model_label', 'dataset_label', 'dec_yes']).weight.sum()
+    result = obj.aggregate_over_ntiles().set_index(['model_label', 'dataset_label', 'target_class', 'ntile']).xs('yes', level = 'target_class')
+    assert np.allclose(result.loc[expected.index, 'pos'], expected)
+
+    with pytest.raises(ValueError):
+        modelplotpy(sample_weight = weights[:1], **kwargs).aggregate_over_ntiles()
+
+
+def test_bootstrap_confidence_bands(two_models):
+    counts = two_models.aggregate_counts()
+    bands = counts.bootstrap(replicates = 400, seed = 1)
+    pd.testing.assert_frame_equal(bands[two_models.aggregate_over_ntiles().columns], counts.to_frame())
+    for column in ('cumgain', 'cumlift', 'cumpct'):
+        inside = bands[bands.ntile > 0]
+        assert (inside[column + '_lower'] <= inside[column] + 1e-12).all()
+        assert (inside[column] <= inside[column + '_upper'] + 1e-12).all()
+    # all positives are selected in the last ntile, whatever the replicate
+    assert np.allclose(bands.loc[bands.ntile == 10, ['cumgain_lower', 'cumgain_upper']], 1)
+    # batches have their own random streams, the result does not depend on the number of jobs or the backend
+    pd.testing.assert_frame_equal(counts.bootstrap(replicates = 400, seed = 1, n_jobs = 4), bands)
+    pd.testing.assert_frame_equal(counts.bootstrap(replicates = 400, seed = 1, n_jobs = 2, backend = 'processes'), bands)
+    narrow = counts.bootstrap(replicates = 400, confidence = 0.5, seed = 1, method = 'poisson')
+    assert ((narrow.cumgain_upper - narrow.cumgain_lower) <= (bands.cumgain_upper - bands.cumgain_lower) + 1e-12).all()
+
+    plot_input = two_models.plotting_scope(scope = 'compare_models', bootstrap = 400)
+    assert {'cumgain_lower', 'cumlift_upper', 'cumpct_lower'} <= set(plot_input.columns)
+    with pytest.raises(ValueError):
+        counts.bootstrap(method = 'jackknife')
+    with pytest.raises(ValueError):
+        counts.bootstrap(n_jobs = 2, backend = 'fibers')
+
+
+def test_aggregate_curves(two_models):
+    curves = two_models.aggregate_curves(points = 200)
+    ntiles_aggregate = two_models.aggregate_over_ntiles()
+    assert list(curves.columns) == list(ntiles_aggregate.columns)
+    for group, curve in curves.groupby(['model_label', 'dataset_label', 'target_class']):
+        assert curve.ntile.is_monotonic_increasing and curve.cumgain.is_monotonic_increasing
+        assert 200 <= len(curve) <= 211 and curve.ntile.iloc[-1] == 10
+    # at the integer ntiles the curves agree with the ntiles up to the row on the boundary
+    at_ntiles = curves[curves.ntile == curves.ntile.round()].reset_index(drop = True)
+    pd.testing.assert_frame_equal(at_ntiles[['model_label', 'dataset_label', 'target_class']], ntiles_aggregate[['model_label', 'dataset_label', 'target_class']])
+    assert np.allclose(at_ntiles.ntile, ntiles_aggregate.ntile)
+    assert (np.abs(at_ntiles.cumtot - ntiles_aggregate.cumtot) <= 1).all()
+    assert (np.abs(at_ntiles.cumpos - ntiles_aggregate.cumpos) <= 1).all()
+
+    plot_input = two_models.plotting_scope(scope = 'compare_models', curve_points = 200)
+    assert len(plot_input) > 2 * 200
+    with pytest.raises(ValueError):
+        two_models.plotting_scope(bootstrap = 100, curve_points = 200)
+
+
+@pytest.mark.parametrize('options', [{}, {'sample_weight': 'random'}, {'ntile_method': 'approximate', 'quantile_error': 0.01}])
+def test_aggregate_over_resolutions(two_models, options):
+    options = dict(options)
+    if options.get('sample_weight') == 'random':
+        options['sample_weight'] = [np.random.RandomState(j).uniform(size = len(X)) for j, X in enumerate(two_models.feature_data)]
+    kwargs = dict(feature_data = two_models.feature_data, label_data = two_models.label_data, dataset_labels = two_models.dataset_labels,
+                  models = two_models.models, model_labels = ['steep', 'flat'], **options)
+    resolutions = modelplotpy(**kwargs).aggregate_over_ntiles(resolutions = [10, 20, 100])
+    assert resolutions.columns[0] == 'ntiles'
+    for ntiles in (10, 20, 100):
+        expected = modelplotpy(ntiles = ntiles, **kwargs).aggregate_over_ntiles()
+        result = resolutions[resolutions.ntiles == ntiles].drop(columns = 'ntiles').reset_index(drop = True)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_plotting_scope_selects_blocks(two_models):
+    from modelplotpy.functions import _split_series
+
+    ntiles_aggregate = two_models.aggregate_over_ntiles()
+    masks = {'no_comparison': (ntiles_aggregate.model_label == 'steep') & (ntiles_aggregate.dataset_label == 'train data') & (ntiles_aggregate.target_class == 'yes'),
+             'compare_models': (ntiles_aggregate.dataset_label == 'train data') & (ntiles_aggregate.target_class == 'yes'),
+             'compare_datasets': (ntiles_aggregate.model_label == 'steep') & (ntiles_aggregate.target_class == 'yes'),
+             'compare_targetclasses': (ntiles_aggregate.model_label == 'steep') & (ntiles_aggregate.dataset_label == 'train data')}
+    for scope, mask in masks.items():
+        plot_input = two_models.plotting_scope(scope = scope, select_targetclass = ['yes'] if scope != 'compare_targetclasses' else [])
+        pd.testing.assert_frame_equal(plot_input, ntiles_aggregate[mask].assign(scope = scope))
+    series = _split_series(plot_input, 'target_class')
+    assert list(series) == ['no', 'yes']
+    pd.testing.assert_frame_equal(series['yes'], plot_input[plot_input.target_class == 'yes'])
+    shuffled = plot_input.sample(frac = 1, random_state = 0)
+    pd.testing.assert_frame_equal(_split_series(shuffled, 'target_class')['no'], shuffled[shuffled.target_class == 'no'])
+
+
+def test_plotting_scope_pushdown(two_models):
+    models = [CountingModel(), CountingModel(2.0), CountingModel(0.5)]
+    X, y = two_models.feature_data[0], two_models.label_data[0]
+    obj = modelplotpy(feature_data = [X, X.iloc[:500]], label_data = [y, y.iloc[:500]], dataset_labels = ['all', 'head'],
+                      models = models, model_labels = ['a', 'b', 'c'])
+    plot_input = obj.plotting_scope(select_model_label = ['b'], select_dataset_label = ['head'], select_targetclass = ['yes'])
+    # a single line scores one model on one dataset
+    assert [model.scored for model in models] == [0, 500, 0]
+    assert set(plot_input.target_class) == {'yes'}
+    compare_models = obj.plotting_scope(scope = 'compare_models', select_dataset_label = ['head'], select_targetclass = ['yes'])
+    assert [model.scored for model in models] == [500, 500, 500]
+    # the selections are the rows of the complete aggregate, which is then used for the next scopes
+    ntiles_aggregate = obj.aggregate_over_ntiles()
+    expected = ntiles_aggregate[(ntiles_aggregate.dataset_label == 'head') & (ntiles_aggregate.target_class == 'yes')]
+    pd.testing.assert_frame_equal(compare_models.drop(columns = 'scope').reset_index(drop = True), expected.reset_index(drop = True))
+    pd.testing.assert_frame_equal(plot_input.drop(columns = 'scope').reset_index(drop = True), expected[expected.model_label == 'b'].reset_index(drop = True))
+    pd.testing.assert_frame_equal(obj.plotting_scope(scope = 'compare_models', select_dataset_label = ['head'], select_targetclass = ['yes']).reset_index(drop = True),
+                                  compare_models.reset_index(drop = True))
+    # only the pairs that were not scored yet
+    assert [model.scored for model in models] == [3500, 3500, 3500]
+
+
+def test_plotting_scope_cache_is_bounded():
+    X, y = make_dataset(n = 1000)
+    model = CountingModel()
+    obj = modelplotpy(feature_data = [X, X.iloc[:500], X.iloc[500:]], label_data = [y, y, y], dataset_labels = ['all', 'head', 'tail'],
+                      models = [model], model_labels = ['counting'], cache_selections = 2)
+    for dataset_label in ('all', 'head', 'tail', 'all', 'head', 'tail'):
+        for target_class in ('no', 'yes'):
+            obj.plotting_scope(select_dataset_label = [dataset_label], select_targetclass = [target_class])
+    # two selections with their block index and the three scores, the other selections were removed
+    assert obj.cache_info()['size'] == 2 * 2 + 3
+    assert model.scored == 2000
+    misses = obj.cache_info()['misses']
+    obj.plotting_scope(select_dataset_label = ['tail'], select_targetclass = ['no'])
+    obj.plotting_scope(select_dataset_label = ['all'], select_targetclass = ['yes'])
+    assert obj.cache_info()['misses'] == misses + 2
+    assert obj.cache_info()['size'] == 2 * 2 + 3
+
+
+def test_plot_report(two_models, tmp_path, capsys):
+    costs = {'fixed_costs': 1000, 'variable_costs_per_unit': 10, 'profit_per_unit': 50}
+    plan = [{'scope': 'compare_models', 'select_targetclass': ['yes'],
+             'plots': [('plot_cumgains', str(tmp_path / 'gains.png'), {'highlight_ntile': 2}), ('plot_roi', str(tmp_path / 'roi.png'), costs)]},
+            {'scope': 'compare_datasets', 'plots': [('plot_all', str(tmp_path / 'all.png'))]},
+            {'scope': 'compare_targetclasses', 'bootstrap': 100,
+             'plots': [('plot_cumlift', str(tmp_path / 'lift.png'), {'confidence_bands': True})]}]
+    # an invalid plot, selection, scope or key is found before anything is computed
+    for entry in ({'plots': [('plot_pie', str(tmp_path / 'pie.png'))]}, {'select_model_label': ['stepp']},
+                  {'scope': 'compare_all'}, {'select_models': ['steep']}):
+        with pytest.raises(ValueError):
+            two_models.plot_report(plan + [entry])
+    assert two_models.cache_info()['misses'] == 0
+    report = two_models.plot_report(plan)
+    assert report['files'] == [str(tmp_path / name) for name in ('gains.png', 'roi.png', 'all.png', 'lift.png')]
+    assert all((tmp_path / name).stat().st_size > 0 for name in ('gains.png', 'roi.png', 'all.png', 'lift.png'))
+    assert set(report['timings']) == {'aggregate', 'scope', 'render', 'save'}
+    # the scores, the aggregate at the ntiles, the bootstrap aggregate and their block indexes are computed once
+    assert two_models.cache_info()['misses'] == 5
+    assert plt.get_fignums() == []
+    # one highlight sentence per model
+    assert capsys.readouterr().out.count('When we select 20% with the highest probability') == 2
+
+
+def test_headless_plots_are_freed(two_models):
+    plot_input = two_models.plotting_scope(scope = 'compare_models')
+    def render(plots):
+        for n in range(plots):
+            ax = plot_cumgains(plot_input, save_fig = False, highlight_ntile = 2, highlight_how = 'plot', headless = True)
+        gc.collect()
+        return ax
+    # warm up the caches of matplotlib
+    render(10)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        ax = render(40)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # one figure takes about 0.7 MB while it is alive
+    assert after - before < 5e6
+    assert plt.get_fignums() == []
+    assert ax.figure.canvas.get_default_filetype() == 'png' and len(ax.lines) > 0
+
+
+def test_render_plots(two_models, tmp_path):
+    costs = {'fixed_costs': 1000, 'variable_costs_per_unit': 10, 'profit_per_unit': 50}
+    jobs = []
+    for scope in ('compare_models', 'compare_datasets'):
+        plot_input = two_models.plotting_scope(scope = scope)
+        jobs.append((plot_cumgains, plot_input, {'highlight_ntile': 3}, str(tmp_path / ('%s gains.png' % scope))))
+        jobs.append(('plot_roi', plot_input, costs, str(tmp_path / ('%s roi.png' % scope))))
+    serial = render_plots(jobs)
+    expected = dict((filename, open(filename, 'rb').read()) for filename in serial.filename)
+    rendered = render_plots(jobs, n_jobs = 2)
+    assert rendered.filename.tolist() == [job[3] for job in jobs]
+    assert (rendered[['render', 'save']] > 0).all().all()
+    # the worker processes write the same files
+    assert all(open(filename, 'rb').read() == expected[filename] for filename in rendered.filename)
+    with pytest.raises(ValueError):
+        render_plots([(len, plot_input, {}, str(tmp_path / 'len.png'))])
+    with pytest.raises(ValueError):
+        render_plots(jobs, n_jobs = 2, backend = 'fibers')
+
+
+def test_render_cache(two_models, tmp_path, monkeypatch):
+    cache = render_cache(str(tmp_path / 'cache'))
+    costs = {'fixed_costs': 1000, 'variable_costs_per_unit': 10, 'profit_per_unit': 50}
+    plot_input = two_models.plotting_scope(scope = 'compare_models')
+    jobs = [(plot_cumgains, plot_input, {'highlight_ntile': 3}, str(tmp_path / 'gains.png')),
+            ('plot_roi', plot_input, costs, str(tmp_path / 'roi.png'))]
+    assert not render_plots(jobs, cache = cache).cached.any()
+    expected = [open(job[3], 'rb').read() for job in jobs]
+    for job in jobs:
+        os.remove(job[3])
+    # the second run copies the plots from the cache, without rendering anything
+    with monkeypatch.context() as patch:
+        patch.setattr('modelplotpy.functions._render_job', None)
+        assert render_plots(jobs, cache = cache).cached.all()
+        assert open(cache.render(*jobs[0][:3]), 'rb').read() == expected[0]
+    assert [open(job[3], 'rb').read() for job in jobs] == expected
+    assert cache.cache_info() == {'hits': 3, 'misses': 2, 'files': 2, 'size': sum(len(png) for png in expected)}
+    # other arguments, other values or another format are other plots
+    key = cache.key('plot_roi', plot_input, costs, 'roi.png')
+    assert cache.key('plot_roi', plot_input, dict(costs, fixed_costs = 2000), 'roi.png') != key
+    assert cache.key('plot_roi', plot_input.assign(cumpos = plot_input.cumpos + 1), costs, 'roi.png') != key
+    assert cache.key('plot_roi', plot_input, costs, 'roi.svg') != key
+    assert cache.key(plot_roi, plot_input.copy(), dict(costs), str(tmp_path / 'other.png')) == key
+    # the least recently used plot (roi) is removed first when the cache is full
+    cache.max_size = cache.cache_info()['size']
+    lift = cache.render(plot_cumlift, plot_input)
+    assert os.path.exists(lift) and not os.path.exists(os.path.join(cache.directory, key))
+    assert cache.cache_info()['size'] <= cache.max_size
+    cache.clear()
+    assert cache.cache_info()['files'] == 0
+
+
+def test_threaded_rendering(two_models):
+    scopes = dict((scope, two_models.plotting_scope(scope = scope)) for scope in ('no_comparison', 'compare_models', 'compare_datasets', 'compare_targetclasses'))
+    jobs = []
+    for scope, plot_input in scopes.items():
+        jobs.append((plot_cumgains, plot_input, {'highlight_ntile': 3, 'highlight_how': 'plot'}))
+        jobs.append((plot_cumlift, plot_input, {}))
+        jobs.append((plot_response, plot_input, {'highlight_ntile': 5, 'highlight_how': 'plot'}))
+        jobs.append((plot_all, plot_input, {}))
+        for fixed_costs in (1000, 5000):
+            jobs.append((plot_roi, plot_input, {'fixed_costs': fixed_costs, 'variable_costs_per_unit': 10, 'profit_per_unit': 50}))
+    def render(job):
+        plot, plot_input, kwargs = job
+        ax = plot(plot_input, save_fig = False, headless = True, **kwargs)
+        png = io.BytesIO()
+        ax.figure.savefig(png, format = 'png', dpi = 30)
+        return png.getvalue()
+    serial = [render(job) for job in jobs]
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        for repeat in range(2):
+            assert list(executor.map(render, jobs[::-1]))[::-1] == serial
+    assert plt.get_fignums() == []
+
+
+def test_save_fig_formats(two_models, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    plot_input = two_models.plotting_scope(scope = 'compare_models')
+    plot_cumgains(plot_input, save_fig_format = 'svg', headless = True)
+    assert open('Cumulative gains plot.svg', 'rb').read(5) == b'<?xml'
+    plot_response(plot_input, save_fig_filename = str(tmp_path / 'response.pdf'), headless = True)
+    assert open(tmp_path / 'response.pdf', 'rb').read(4) == b'%PDF'
+    plot_cumlift(plot_input, save_fig_filename = str(tmp_path / 'lift.png'), save_fig_dpi = 30, headless = True)
+    assert plt.imread(str(tmp_path / 'lift.png')).shape[:2] == (7 * 30, 12 * 30)
+    render_plots([(plot_cumlift, plot_input, {'save_fig_dpi': 30}, str(tmp_path / 'rendered.png'))])
+    assert open(tmp_path / 'rendered.png', 'rb').read() == open(tmp_path / 'lift.png', 'rb').read()
+    # a format that agrees with the extension, or an extension that is not a file format, is written as the format
+    plot_response(plot_input, save_fig_filename = str(tmp_path / 'response.JPG'), save_fig_format = 'jpeg', save_fig_dpi = 30, headless = True)
+    plot_response(plot_input, save_fig_filename = str(tmp_path / 'response.v2'), save_fig_format = 'svg', headless = True)
+    assert open(tmp_path / 'response.v2', 'rb').read(5) == b'<?xml'
+    # a format that contradicts the extension raises before anything is written
+    with pytest.raises(ValueError, match = 'save_fig_format'):
+        plot_response(plot_input, save_fig_filename = str(tmp_path / 'conflict.png'), save_fig_format = 'svg', headless = True)
+    with pytest.raises(ValueError, match = 'save_fig_format'):
+        plot_all(plot_input, save_fig_filename = str(tmp_path / 'conflict.pdf'), save_fig_format = 'png', save_fig_async = True)
+    with pytest.raises(ValueError, match = 'save_fig_format'):
+        render_plots([(plot_cumlift, plot_input, {'save_fig_format': 'pdf'}, str(tmp_path / 'conflict.svg'))])
+    assert not list(tmp_path.glob('conflict.*'))
+
+
+def test_save_fig_async(two_models, tmp_path, capsys):
+    plot_input = two_models.plotting_scope(scope = 'compare_models')
+    costs = {'fixed_costs': 1000, 'variable_costs_per_unit': 10, 'profit_per_unit': 50}
+    figures = plt.get_fignums()
+    futures = []
+    for plot, kwargs in [(plot_cumgains, {'highlight_ntile': 3}), (plot_all, {}), (plot_roi, costs)] * 4:
+        filename = str(tmp_path / ('%s %d.png' % (plot.__name__, len(futures))))
+        futures.append((plot, kwargs, filename, plot(plot_input, save_fig_filename = filename, save_fig_dpi = 30, save_fig_async = True, **kwargs)))
+    # the figures are rendered headless and written in the background, the futures give the axes
+    assert plt.get_fignums() == figures
+    for plot, kwargs, filename, future in futures:
+        assert future.result(timeout = 60).figure.canvas is not None
+        plot(plot_input, save_fig_filename = str(tmp_path / 'sync.png'), save_fig_dpi = 30, headless = True, **kwargs)
+        assert open(filename, 'rb').read() == open(tmp_path / 'sync.png', 'rb').read()
+    assert capsys.readouterr().out.count('is saved in') == 2 * len(futures)
+    # an error of writing the file is raised by the future
+    future = plot_cumlift(plot_input, save_fig_filename = str(tmp_path / 'missing' / 'lift.png'), save_fig_async = True)
+    with pytest.raises(FileNotFoundError):
+        future.result(timeout = 60)
+    assert plot_cumlift(plot_input, save_fig = False, save_fig_async = True).result().get_title()
+
+
+def test_ntile_counts_merge(two_models):
+    import json
+    from modelplotpy import ntile_counts
+
+    expected = two_models.aggregate_over_ntiles()
+    shards = []
+    for j in range(2):
+        shard = modelplotpy(feature_data = [two_models.feature_data[j]], label_data = [two_models.label_data[j]],
+                            dataset_labels = [two_models.dataset_labels[j]], models = two_models.models, model_labels = ['steep', 'flat'])
+        # the counts only need to be moved around, here through json
+        shards.append(ntile_counts.from_dict(json.loads(json.dumps(shard.aggregate_counts().to_dict()))))
+    pd.testing.assert_frame_equal(shards[1].merge(shards[0]).to_frame(), expected)
+    # associative, with the empty counts as identity
+    third = two_models.aggregate_counts()
+    left = (shards[0] + shards[1]) + third
+    right = shards[0] + (shards[1] + ntile_counts(10) + third)
+    pd.testing.assert_frame_equal(left.to_frame(), right.to_frame())
+    assert (left.tot == 2 * third.tot).all()
+    with pytest.raises(ValueError):
+        third.merge(ntile_counts(20))
+
+
+def test_ntile_counts_merge_row_shards(two_models):
+    # row shards of one dataset, split on the score like a partitioned table: every shard on its own has other ntiles
+    X, y = two_models.feature_data[0], two_models.label_data[0]
+    kwargs = dict(dataset_labels = ['train data'], models = two_models.models, model_labels = ['steep', 'flat'], tie_breaking = 'hash')
+    expected = modelplotpy(feature_data = [X], label_data = [y], **kwargs).aggregate_over_ntiles()
+    high = X[0] >= 0
+    shards = [modelplotpy(feature_data = [X[part]], label_data = [y[part]], quantile_error = 0.0001, **kwargs) for part in (high, ~high)]
+    stratified = shards[0].aggregate_counts() + shards[1].aggregate_counts()
+    assert not np.array_equal(stratified.to_frame().pos, expected.pos)
+    # with the merged sketches every shard is counted against the cut points of the whole dataset
+    sketches = shards[0].quantile_sketches()
+    for group, sketch in shards[1].quantile_sketches().items():
+        sketches[group].merge(sketch)
+    counts = shards[0].aggregate_counts(sketches) + shards[1].aggregate_counts(sketches)
+    pd.testing.assert_frame_equal(counts.to_frame(), expected)
+    # a single pass, so an iterator of chunks can be counted
+    chunks = iter([X[~high].iloc[:500], X[~high].iloc[500:]])
+    shard = modelplotpy(feature_data = [chunks], label_data = [y[~high]], **kwargs)
+    assert (shard.aggregate_counts(sketches).tot == shards[1].aggregate_counts(sketches).tot).all()
+    with pytest.raises(ValueError):
+        modelplotpy(feature_data = [X], label_data = [y], **dict(kwargs, dataset_labels = ['other'])).aggregate_counts(sketches)
+
+
+def test_quantile_sketch_rank_error():
+    from modelplotpy import quantile_sketch
+
+    x = np.random.RandomState(0).normal(size = 1000000)
+    sizes = []
+    for n in (100000, 1000000):
+        sketch = quantile_sketch(epsilon = 0.01)
+        for chunk in np.array_split(x[:n * 3 // 4], 30):
+            sketch.update(chunk)
+        sketch.merge(quantile_sketch(epsilon = 0.01, seed = 1).update(x[n * 3 // 4:n]))
+        assert sketch.count == n
+        target = (np.arange(1, 10) * (n - 1)) // 10
+        assert (np.abs(np.searchsorted(np.sort(x[:n]), sketch.cut_points(10)) - target) <= 0.01 * n).all()
+        sizes.append(sketch.size())
+    # the size does not grow with the number of values: ten times more values stay below the same constant
+    assert max(sizes) <= 3 * sketch.k + 2 * len(sketch.levels) < 4 * sketch.k
+
+    # without compactions the quantiles are exact
+    small = quantile_sketch(epsilon = 0.01).update(x[:1000])
+    assert small.size() == 1000
+    assert (small.quantiles([0, 499, 999]) == np.sort(x[:1000])[[0, 499, 999]]).all()
+
+
+def test_approximate_ntiles(two_models):
+    # without compactions the approximate boundaries are the exact ones
+    exact = modelplotpy(feature_data = two_models.feature_data, label_data = two_models.label_data, dataset_labels = ['train', 'test'],
+                        models = two_models.models, model_labels = ['steep', 'flat'], tie_breaking = 'hash')
+    chunks = [[X.iloc[start:start + 500] for start in range(0, len(X), 500)] for X in two_models.feature_data]
+    approximate = modelplotpy(feature_data = chunks, label_data = two_models.label_data, dataset_labels = ['train', 'test'],
+                              models = two_models.models, model_labels = ['steep', 'flat'], ntile_method = 'approximate', quantile_error = 0.0001)
+    pd.testing.assert_frame_equal(approximate.aggregate_over_ntiles(), exact.aggregate_over_ntiles())
+
+    # with compactions at most (ntiles - 1) * quantile_error of the rows move, each to a neighbouring ntile
+    X, y = make_dataset(50000, seed = 3)
+    exact = modelplotpy(feature_data = [X], label_data = [y], dataset_labels = ['test'], models = [ThresholdModel(1.0)], model_labels = ['model'])
+    approximate = modelplotpy(feature_data = [X], label_data = [y], dataset_labels = ['test'], models = [ThresholdModel(1.0)], model_labels = ['model'],
+                              chunk_size = 5000, ntile_method = 'approximate', quantile_error = 0.01)
+    exact_tot = exact.aggregate_counts().tot
+    approximate_tot = approximate.aggregate_counts().tot
+    assert approximate_tot.sum() == exact_tot.sum()
+    moved = np.abs(np.cumsum(approximate_tot - exact_tot, axis = 1)).sum()
+    assert 0 < moved <= 9 * 0.01 * len(X)
+
+    with pytest.raises(ValueError):
+        modelplotpy(feature_data = [iter(chunks[0])], label_data = [two_models.label_data[0]], dataset_labels = ['train'],
+                    models = two_models.models, model_labels = ['steep', 'flat'], ntile_method = 'approximate').aggregate_counts()
+
+
+def test_approximate_ntiles_with_ties():
+    # a tree like model with 11 distinct probabilities, the ties are split at the boundaries like the exact ntiles do
+    n = 20000
+    random = np.random.RandomState(0)
+    p = np.round(random.uniform(size = n), 1)
+    y = np.where(random.uniform(size = n) < p, 'yes', 'no')
+    kwargs = dict(probabilities = [[np.column_stack([1 - p, p])]], classes = ['no', 'yes'], label_data = [y], dataset_labels = ['data'],
+                  model_labels = ['tree'], chunk_size = 3000)
+    for tie_breaking in ('random', 'hash'):
+        exact = modelplotpy.from_scores(tie_breaking = tie_breaking, **kwargs).aggregate_counts()
+        approximate = modelplotpy.from_scores(tie_breaking = tie_breaking, ntile_method = 'approximate', quantile_error = 0.001, **kwargs).aggregate_counts()
+        assert (approximate.tot > 0).all()
+        assert np.abs(np.cumsum(approximate.tot - exact.tot, axis = 1)).sum() <= 2 * 9 * 0.001 * n
+    # without compactions the hashed ties give exactly the exact ntiles
+    approximate = modelplotpy.from_scores(tie_breaking = 'hash', ntile_method = 'approximate', quantile_error = 0.0001, **kwargs).aggregate_counts()
+    assert (approximate.tot == exact.tot).all() and (approximate.pos == exact.pos).all()
+
+
+def test_invalid_tie_breaking():
+    kwargs = dict(probabilities = [[np.column_stack([1 - np.zeros(100), np.zeros(100)])]], classes = ['no', 'yes'], label_data = [np.repeat(['no', 'yes'], 50)],
+                  dataset_labels = ['data'], model_labels = ['constant'], tie_breaking = 'first')
+    for ntile_method in ('exact', 'approximate'):
+        with pytest.raises(ValueError, match = 'tie_breaking'):
+            modelplotpy.from_scores(ntile_method = ntile_method, **kwargs).aggregate_counts()
+
+def test_approximate_chunked_numpy_labels(two_models):
+    # labels without an index are in the order of the rows, every chunk gets its own slice of them
+    X, y = two_models.feature_data[0], two_models.label_data[0]
+    kwargs = dict(feature_data = [X], dataset_labels = ['train data'], models = two_models.models, model_labels = ['steep', 'flat'],
+                  chunk_size = 500, tie_breaking = 'hash')
+    expected = modelplotpy(label_data = [y], **kwargs).aggregate_counts()
+    for labels in (y.to_numpy(), y.tolist()):
+        approximate = modelplotpy(label_data = [labels], ntile_method = 'approximate', quantile_error = 0.0001, **kwargs)
+        counts = approximate.aggregate_counts()
+        assert (counts.tot == expected.tot).all() and (counts.pos == expected.pos).all()
+        sharded = approximate.aggregate_counts(approximate.quantile_sketches())
+        assert (sharded.pos == expected.pos).all()